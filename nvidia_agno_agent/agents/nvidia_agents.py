@@ -27,7 +27,7 @@ class AgentConfig:
 
 
 def build_base_model() -> OpenAIChat:
-    return OpenAIChat(id=os.getenv('OPENAI_MODEL', 'gpt-4'))
+    return OpenAIChat(id=os.getenv('OPENAI_MODEL', 'gpt-4'), base_url=os.getenv('OPENAI_API_BASE') or None)
 
 
 def build_memory() -> SqliteMemory:
@@ -4,6 +4,7 @@ This module adapts the existing knowledge base to work with Agno's knowledge sys
 """
 
 import os
+import sys
 import logging
 from pathlib import Path
 from typing import List, Dict, Any, Optional
@@ -12,19 +13,29 @@ from dataclasses import dataclass
 
 from agno.knowledge import Knowledge, Document
 from agno.vectordb import QdrantVectorDb, ChromaVectorDb
-from sentence_transformers import SentenceTransformer
 import chromadb
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams, PointStruct
 from dotenv import load_dotenv
 import structlog
 
+# Share the chunking engine with the nvidia_ai_agent knowledge base
+sys.path.append(str(Path(__file__).resolve().parents[2] / "nvidia_ai_agent" / "src"))
+from chunking import TokenChunker
+from model_registry import get_embedding_model
+
 # Load environment variables
 load_dotenv()
 
 # Configure structured logging
 logger = structlog.get_logger(__name__)
 
+# Source types used by the nvidia_ai_agent knowledge base -> Agno document_type
+DOCUMENT_TYPES = {
+    "transcript": "course_transcript",
+    "web_article": "web_content"
+}
+
 
 @dataclass
 class NVIDIADocument:
@@ -67,8 +78,9 @@ class NVIDIAKnowledge(Knowledge):
             'EMBEDDING_MODEL',
             'sentence-transformers/all-MiniLM-L6-v2'
         )
-        logger.info(f"Loading embedding model: {self.embedding_model_name}")
-        self.embedding_model = SentenceTransformer(self.embedding_model_name)
+        # Process-wide shared model, also used by the nvidia_ai_agent knowledge base
+        self.embedding_model = get_embedding_model(self.embedding_model_name)
+        self.chunker = TokenChunker.from_sentence_transformer(self.embedding_model)
         
         # Initialize vector database
         if vector_db is None:
@@ -224,9 +236,11 @@ class NVIDIAKnowledge(Knowledge):
         """Add documents to the Agno knowledge base."""
         agno_documents = []
         
-        for doc in documents:
-            # Create chunks for better retrieval
-            chunks = self._chunk_content(doc.content)
+        # Tokenize all documents in one batch and create chunks for better retrieval
+        chunked_documents = self.chunker.chunk_many([doc.content for doc in documents])
+        
+        for doc, doc_chunks in zip(documents, chunked_documents):
+            chunks = [chunk.text for chunk in doc_chunks]
             
             for i, chunk in enumerate(chunks):
                 chunk_id = f"{doc.id}_chunk_{i}"
@@ -252,43 +266,31 @@ class NVIDIAKnowledge(Knowledge):
         await self.add_documents(agno_documents)
         logger.info(f"Added {len(agno_documents)} document chunks to knowledge base")
     
-    def _chunk_content(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
-        """Split text into overlapping chunks."""
-        if len(text) <= chunk_size:
-            return [text]
-        
-        chunks = []
-        start = 0
-        
-        while start < len(text):
-            end = start + chunk_size
-            
-            # Try to end at a sentence boundary
-            if end < len(text):
-                sentence_end = text.rfind('.', start + chunk_size - 100, end)
-                if sentence_end != -1:
-                    end = sentence_end + 1
-            
-            chunks.append(text[start:end].strip())
-            start = end - overlap
-            
-            if start >= len(text):
-                break
-        
-        return chunks
+    def _chunk_content(self, text: str) -> List[str]:
+        """Split text into overlapping, sentence-aligned chunks sized in model tokens."""
+        return self.chunker.chunk_text(text)
     
     async def search_nvidia_knowledge(
         self,
         query: str,
         num_results: int = 5,
-        filter_course: str = None
+        filter_course: str = None,
+        filter_lesson: str = None,
+        filter_source_type: str = None
     ) -> List[Dict[str, Any]]:
-        """Search NVIDIA knowledge base with optional course filtering."""
+        """
+        Search NVIDIA knowledge base with optional course, lesson and source type
+        ('transcript' or 'web_article') filtering, applied inside the vector database.
+        """
         
         # Create search filters if specified
         filters = {}
         if filter_course:
             filters["course_name"] = filter_course
+        if filter_lesson:
+            filters["lesson_title"] = filter_lesson
+        if filter_source_type:
+            filters["document_type"] = DOCUMENT_TYPES.get(filter_source_type, filter_source_type)
         
         # Search using Agno's knowledge search
         results = await self.search(
@@ -4,16 +4,21 @@ Provides search capabilities for NVIDIA Developer Blog and NVIDIA Blog.
 """
 
 import os
-import asyncio
+import sys
+from pathlib import Path
 from typing import List, Dict, Any, Optional
-import feedparser
-import requests
-from bs4 import BeautifulSoup
 from dataclasses import dataclass
 
 from dotenv import load_dotenv
 load_dotenv()
 
+# Share retrieval components with the nvidia_ai_agent package
+sys.path.append(str(Path(__file__).resolve().parents[2] / "nvidia_ai_agent" / "src"))
+from lexical_index import bm25_scores
+from feed_cache import get_feed_cache
+from article_cache import get_article_cache
+from http_client import close_async_session
+
 @dataclass
 class BlogResult:
     title: str
@@ -35,16 +40,21 @@ class NVIDIABlogTool:
             'developer': os.getenv('NVIDIA_DEV_BLOG_RSS', 'https://developer.nvidia.com/blog/feed'),
             'main': os.getenv('NVIDIA_BLOG_RSS', 'https://blogs.nvidia.com/feed')
         }
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127 Safari/537.36'
-        })
+        # Parsed feeds are shared with the other blog tools and refreshed in the background
+        self.feed_cache = get_feed_cache()
+        self.feed_cache.prefetch(list(self.feeds.values()))
+        self.article_cache = get_article_cache()
+
+    async def aclose(self):
+        """Close this event loop's shared aiohttp session."""
+        await close_async_session()
 
     async def search(self, query: str, include_content: bool = False) -> List[Dict[str, Any]]:
-        loop = asyncio.get_event_loop()
-        dev = await loop.run_in_executor(None, self._search_feed, self.feeds['developer'], query, 'NVIDIA Developer Blog')
-        main = await loop.run_in_executor(None, self._search_feed, self.feeds['main'], query, 'NVIDIA Blog')
-        all_results = (dev or []) + (main or [])
+        # Both feeds at once; cached feeds return immediately, cold ones download off the event loop
+        feeds = await self.feed_cache.get_many_async(list(self.feeds.values()), timeout=self.timeout)
+        dev = self._search_feed(feeds.get(self.feeds['developer'], []), query, 'NVIDIA Developer Blog')
+        main = self._search_feed(feeds.get(self.feeds['main'], []), query, 'NVIDIA Blog')
+        all_results = dev + main
 
         # Deduplicate by URL and sort
         seen = set()
@@ -57,21 +67,21 @@ class NVIDIABlogTool:
         unique = unique[: self.max_results]
 
         if include_content:
-            # fetch top 2 articles' content
-            tasks = [self._fetch_content(r) for r in unique[:2]]
-            await asyncio.gather(*tasks)
+            # fetch top 2 articles' content concurrently on the shared aiohttp pool
+            contents = await self.article_cache.fetch_many_async([r.url for r in unique[:2]], timeout=self.timeout)
+            for r in unique[:2]:
+                content = contents.get(r.url)
+                r.full_content = content[:3000] if content else None
 
         return [r.__dict__ for r in unique]
 
-    def _search_feed(self, feed_url: str, query: str, source_name: str) -> List[BlogResult]:
-        parsed = feedparser.parse(feed_url)
+    def _search_feed(self, entries: List[Any], query: str, source_name: str) -> List[BlogResult]:
         out: List[BlogResult] = []
-        q = query.lower().split()
-        for entry in parsed.entries[:30]:
+        entries = entries[:30]
+        scores = bm25_scores(query, [f"{e.get('title', '')} {e.get('summary', '')}" for e in entries])
+        for entry, score in zip(entries, scores):
             title = entry.get('title', '')
             summary = entry.get('summary', '')
-            content_lc = f"{title} {summary}".lower()
-            score = sum(1 for w in q if w in content_lc)
             if score > 0:
                 published = entry.get('published', '')
                 out.append(BlogResult(
@@ -83,22 +93,3 @@ class NVIDIABlogTool:
                     relevance_score=float(score)
                 ))
         return out
-
-    async def _fetch_content(self, result: BlogResult):
-        try:
-            resp = self.session.get(result.url, timeout=self.timeout)
-            resp.raise_for_status()
-            soup = BeautifulSoup(resp.content, 'html.parser')
-            content_selectors = ['.post-content', '.entry-content', '.article-content', 'main article', '.content']
-            text = None
-            for sel in content_selectors:
-                node = soup.select_one(sel)
-                if node:
-                    text = node.get_text(" ", strip=True)
-                    break
-            if not text:
-                text = " ".join([p.get_text(" ", strip=True) for p in soup.find_all('p')])
-            result.full_content = (text or '')[:3000]
-        except Exception:
-            result.full_content = None
-
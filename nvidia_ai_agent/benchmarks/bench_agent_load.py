@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Offline load test of the conversational agent.
+Runs concurrent sessions through NVIDIAConversationalAgent.aprocess_query with
+the LLM served by the bundled stub server (src/stub_llm_server.py), so the
+throughput and tail latency measured are those of our own stack: retrieval,
+routing, prompt assembly, caching and call coalescing. Reports queries per
+second, p50/p95/p99 latency, error count and the upstream calls the stub saw.
+The blog search leg is stubbed out unless --web is given, and the response
+cache and call coalescing can be switched off to measure the uncached stack;
+the settings used are recorded in the results.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import requests
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+QUERIES_FILE = Path(__file__).parent / "retrieval_queries.jsonl"
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+class OfflineBlogSearchTool:
+    """Blog search stand-in that finds no articles, so the web leg makes no network requests."""
+
+    blog_index = None
+
+    def prefetch_feeds(self):
+        pass
+
+    def search_with_content_extraction(self, query, extract_full_content=False, timeout=None):
+        return []
+
+    async def asearch_with_content_extraction(self, query, extract_full_content=False, timeout=None):
+        return []
+
+    async def aclose(self):
+        pass
+
+
+def start_stub(port: int) -> str:
+    """Serve the stub LLM in a background thread; returns its OpenAI base URL."""
+    from waitress import create_server
+    from stub_llm_server import StubLLMServer
+
+    stub = StubLLMServer()
+    server = create_server(stub.app, host='127.0.0.1', port=port, threads=stub.threads)
+    threading.Thread(target=server.run, daemon=True).start()
+    return f"http://127.0.0.1:{server.effective_port}/v1"
+
+
+async def run_load(agent, queries, concurrency: int, rounds: int):
+    """Each simulated user asks every query in its own session; returns per-query latencies and errors."""
+    from nvidia_agent import ERROR_RESPONSE
+
+    latencies, errors = [], 0
+
+    async def user(index: int):
+        nonlocal errors
+        session = agent.get_session(f"load-{index}")
+        for _ in range(rounds):
+            for i in range(len(queries)):
+                query = queries[(i + index) % len(queries)]
+                started = time.perf_counter()
+                response = await agent.aprocess_query(query, session)
+                latencies.append((time.perf_counter() - started) * 1000)
+                errors += response == ERROR_RESPONSE
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+    finally:
+        # The loop's aiohttp session is closed here, before asyncio.run closes the loop
+        await agent.aclose()
+    return latencies, errors, time.perf_counter() - started
+
+
+def main():
+    """Run the agent load test against the stub LLM server."""
+    parser = argparse.ArgumentParser(description='Offline agent throughput and tail latency benchmark')
+    parser.add_argument('--queries', default=str(QUERIES_FILE), help='Queries (JSONL with a "query" field)')
+    parser.add_argument('--limit', type=int, default=20, help='Distinct queries to use')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent sessions')
+    parser.add_argument('--rounds', type=int, default=1, help='Times each session asks every query')
+    parser.add_argument('--base-url', default=None,
+                        help='Running stub (or other OpenAI-compatible) server; default starts one in-process')
+    parser.add_argument('--stub-port', type=int, default=0, help='Port for the in-process stub (0 = any free port)')
+    parser.add_argument('--web', action='store_true',
+                        help='Search the live NVIDIA blogs (default: the web leg finds nothing, offline)')
+    parser.add_argument('--response-cache', action=argparse.BooleanOptionalAction, default=None,
+                        help='Answer repeated questions from the response cache (default: RESPONSE_CACHE_ENABLED)')
+    parser.add_argument('--coalescing', action=argparse.BooleanOptionalAction, default=None,
+                        help='Share identical in-flight LLM calls (default: LLM_COALESCING_ENABLED)')
+    parser.add_argument('--output', default=None, help='JSON results file (default: benchmarks/results/)')
+    args = parser.parse_args()
+
+    base_url = args.base_url or start_stub(args.stub_port)
+    os.environ['OPENAI_API_BASE'] = base_url
+    os.environ.setdefault('OPENAI_API_KEY', 'stub')
+    for name, value in [('RESPONSE_CACHE_ENABLED', args.response_cache), ('LLM_COALESCING_ENABLED', args.coalescing)]:
+        if value is not None:
+            os.environ[name] = str(value).lower()
+
+    from nvidia_agent import NVIDIAConversationalAgent
+
+    with open(args.queries, 'r', encoding='utf-8') as f:
+        queries = [json.loads(line)['query'] for line in f if line.strip()][:args.limit]
+
+    agent = NVIDIAConversationalAgent(web_search_tool=None if args.web else OfflineBlogSearchTool())
+    agent.warm_up()
+    settings = {
+        'web_search': 'live' if args.web else 'off',
+        'response_cache': agent.response_cache is not None,
+        'coalescing': agent.llm_calls.enabled,
+        'batch_window_ms': agent.llm_calls.batch_window * 1000,
+        'rounds': args.rounds
+    }
+    latencies, errors, elapsed = asyncio.run(run_load(agent, queries, args.concurrency, args.rounds))
+
+    stub_stats = {}
+    try:
+        stub_stats = requests.get(base_url.rsplit('/v1', 1)[0] + '/stats', timeout=5).json()
+    except (requests.RequestException, ValueError):
+        pass
+
+    result = {
+        'created_at': datetime.now().isoformat(),
+        'base_url': base_url,
+        'concurrency': args.concurrency,
+        'settings': settings,
+        'queries': len(latencies),
+        'errors': errors,
+        'elapsed_s': elapsed,
+        'queries_per_s': len(latencies) / elapsed if elapsed else 0.0,
+        'latency_p50_ms': float(np.percentile(latencies, 50)),
+        'latency_p95_ms': float(np.percentile(latencies, 95)),
+        'latency_p99_ms': float(np.percentile(latencies, 99)),
+        'stub': stub_stats,
+        'agent': agent.get_agent_stats()
+    }
+
+    print(f"{result['queries']} queries from {args.concurrency} sessions in {elapsed:.1f}s "
+          f"({result['queries_per_s']:.2f} q/s, {errors} errors)")
+    print(f"web search {settings['web_search']}, response cache {'on' if settings['response_cache'] else 'off'}, "
+          f"coalescing {'on' if settings['coalescing'] else 'off'}")
+    print(f"latency p50 {result['latency_p50_ms']:.0f} ms, p95 {result['latency_p95_ms']:.0f} ms, "
+          f"p99 {result['latency_p99_ms']:.0f} ms")
+    if stub_stats:
+        print(f"upstream LLM calls {stub_stats['requests']}, peak concurrent {stub_stats['max_in_flight']}")
+
+    output_path = Path(args.output) if args.output else \
+        RESULTS_DIR / f"agent-load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, default=str)
+    print(f"\nResults written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark for transcript chunking.
+Compares the legacy character-based chunker with the token-aware chunker on the
+bundled course transcripts: throughput and chunk-size distribution in model tokens.
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from chunking import TokenChunker, SPECIAL_TOKENS_PER_INPUT
+
+
+def load_transcripts(base_path: str) -> List[str]:
+    """Load and clean every transcript under base_path."""
+    texts = []
+    for root, dirs, files in os.walk(base_path):
+        for file in files:
+            if file.endswith("Transcript.txt"):
+                with open(os.path.join(root, file), 'r', encoding='utf-8') as f:
+                    content = f.read()
+                content = re.sub(r'-{50,}', '', content)
+                content = re.sub(r'Video URL: https?://[^\s]+', '', content)
+                texts.append(content.strip())
+    return texts
+
+
+def legacy_chunk_content(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+    """The original character-based chunker, kept here as the baseline."""
+    if len(text) <= chunk_size:
+        return [text]
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + chunk_size
+        if end < len(text):
+            sentence_end = text.rfind('.', start + chunk_size - 100, end)
+            if sentence_end != -1:
+                end = sentence_end + 1
+        chunks.append(text[start:end].strip())
+        start = end - overlap
+        if start >= len(text):
+            break
+    return chunks
+
+
+def summarize(name: str, token_counts: np.ndarray, seconds: float, n_bytes: int, window: int):
+    """Print throughput and the chunk-size distribution for one chunker."""
+    content_window = window - SPECIAL_TOKENS_PER_INPUT
+    over = np.count_nonzero(token_counts > content_window)
+    fill = np.minimum(token_counts, content_window) / content_window
+
+    print(f"\n{name}")
+    print("-" * 60)
+    print(f"  chunks:            {len(token_counts)}")
+    print(f"  throughput:        {n_bytes / seconds / 1e6:.2f} MB/s ({len(token_counts) / seconds:,.0f} chunks/s)")
+    print(f"  tokens min/p50/p95/max: {token_counts.min()} / {np.percentile(token_counts, 50):.0f}"
+          f" / {np.percentile(token_counts, 95):.0f} / {token_counts.max()}")
+    print(f"  truncated (> {content_window} tokens): {over} ({over / len(token_counts):.1%})")
+    print(f"  mean window fill:  {fill.mean():.1%}")
+
+
+def main():
+    """Run the chunking benchmark."""
+    parser = argparse.ArgumentParser(description='Chunking throughput and size distribution benchmark')
+    parser.add_argument('--path', default=str(Path(__file__).resolve().parents[2]),
+                        help='Directory containing course transcripts')
+    parser.add_argument('--model', default=os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2'),
+                        help='Embedding model whose tokenizer is used')
+    parser.add_argument('--window', type=int, default=256, help='Model max sequence length')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions')
+    args = parser.parse_args()
+
+    texts = load_transcripts(args.path)
+    n_bytes = sum(len(t.encode('utf-8')) for t in texts)
+    print(f"Loaded {len(texts)} transcripts ({n_bytes / 1024:.0f} KiB)")
+
+    chunker = TokenChunker.for_model(args.model, max_tokens=args.window - SPECIAL_TOKENS_PER_INPUT)
+    tokenizer_name = args.model if chunker.uses_model_tokenizer else "regex approximation"
+    print(f"Token counts measured with: {tokenizer_name}")
+
+    # Legacy chunker
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        legacy_chunks = [c for t in texts for c in legacy_chunk_content(t)]
+    legacy_seconds = (time.perf_counter() - start) / args.repeat
+    legacy_tokens = np.array([chunker.count_tokens(c) for c in legacy_chunks])
+    summarize("Legacy character chunker (1000 chars, 200 overlap)",
+              legacy_tokens, legacy_seconds, n_bytes, args.window)
+
+    # Token-aware chunker
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        token_chunks = [c for doc in chunker.chunk_many(texts) for c in doc]
+    token_seconds = (time.perf_counter() - start) / args.repeat
+    token_counts = np.array([chunker.count_tokens(c.text) for c in token_chunks])
+    summarize(f"Token chunker ({chunker.max_tokens} tokens, {chunker.overlap_tokens} overlap)",
+              token_counts, token_seconds, n_bytes, args.window)
+
+
+if __name__ == "__main__":
+    main()
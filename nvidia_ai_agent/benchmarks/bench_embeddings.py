@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark for CPU embedding backends.
+Encodes transcript chunks with the PyTorch, ONNX Runtime and int8-quantized backends
+and reports load time, batch throughput, single-query latency and agreement with the
+PyTorch embeddings (cosine similarity and top-k neighbour overlap).
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from chunking import TokenChunker
+from embeddings import load_embedding_model, EMBEDDING_BACKENDS
+from vector_index import normalize_rows
+from bench_chunking import load_transcripts
+
+QUERIES = [
+    "What is NVIDIA NIM?",
+    "How does retrieval augmented generation work?",
+    "Deploying LLMs with TensorRT-LLM",
+    "What are CUDA cores used for?",
+    "How do I evaluate a RAG pipeline?",
+    "Agentic AI workflows with tools",
+    "Fine-tuning a model with NeMo",
+    "GPU memory requirements for inference",
+]
+
+
+def encode_timed(model, texts, batch_size: int):
+    """Encode texts and return (embeddings, seconds)."""
+    start = time.perf_counter()
+    embeddings = model.encode(texts, batch_size=batch_size)
+    return normalize_rows(np.asarray(embeddings)), time.perf_counter() - start
+
+
+def main():
+    """Run the embedding backend benchmark."""
+    parser = argparse.ArgumentParser(description='Embedding backend throughput and agreement benchmark')
+    parser.add_argument('--path', default=str(Path(__file__).resolve().parents[2]),
+                        help='Directory containing course transcripts')
+    parser.add_argument('--model', default=os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2'),
+                        help='Embedding model name')
+    parser.add_argument('--backends', default=','.join(EMBEDDING_BACKENDS),
+                        help='Comma-separated backends to compare (torch is always the reference)')
+    parser.add_argument('--threads', type=int, default=int(os.getenv('EMBEDDING_THREADS', 0)),
+                        help='Inference threads (0 = library default)')
+    parser.add_argument('--batch-size', type=int, default=32, help='Encode batch size')
+    parser.add_argument('--max-chunks', type=int, default=1000, help='Number of chunks to encode')
+    parser.add_argument('-k', type=int, default=5, help='Neighbours compared for ranking agreement')
+    args = parser.parse_args()
+
+    texts = load_transcripts(args.path)
+    chunks = [c for doc in TokenChunker.for_model(args.model).chunk_many(texts) for c in doc]
+    chunks = [c.text for c in chunks][:args.max_chunks]
+    print(f"{len(chunks)} chunks, {len(QUERIES)} queries, model {args.model}, "
+          f"threads {args.threads or 'default'}, batch size {args.batch_size}\n")
+
+    backends = ['torch'] + [b for b in args.backends.split(',') if b and b != 'torch']
+
+    reference = None
+    print(f"{'backend':<8}{'load s':>9}{'chunks/s':>11}{'query ms':>10}{'cos mean':>10}{'cos min':>10}{'top-k':>8}")
+    for backend in backends:
+        start = time.perf_counter()
+        model = load_embedding_model(args.model, backend, args.threads)
+        load_seconds = time.perf_counter() - start
+
+        # Warm up kernels and caches before timing
+        model.encode(chunks[:args.batch_size], batch_size=args.batch_size)
+
+        corpus, seconds = encode_timed(model, chunks, args.batch_size)
+
+        latencies = []
+        query_embeddings = []
+        for query in QUERIES:
+            embedding, query_seconds = encode_timed(model, [query], 1)
+            latencies.append(query_seconds * 1000)
+            query_embeddings.append(embedding[0])
+        query_embeddings = np.asarray(query_embeddings)
+        neighbours = np.argsort(-(query_embeddings @ corpus.T), axis=1)[:, :args.k]
+
+        if reference is None:
+            reference = (corpus, neighbours)
+        cosine = np.sum(corpus * reference[0], axis=1)
+        overlap = np.mean([
+            len(set(a) & set(b)) / args.k for a, b in zip(neighbours, reference[1])
+        ])
+
+        print(f"{backend:<8}{load_seconds:>9.2f}{len(chunks) / seconds:>11.1f}{np.median(latencies):>10.2f}"
+              f"{cosine.mean():>10.4f}{cosine.min():>10.4f}{overlap:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark for vector retrieval backends.
+Compares the memory-mapped flat index (float32 and float16) with the ChromaDB
+collection on open time, query latency, recall@k against exact search and RSS.
+Each backend is measured in a fresh subprocess so RSS figures are not shared.
+"""
+
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from vector_index import MmapVectorIndex, normalize_rows
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MiB."""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Highest resident set size this process has reached, in MiB."""
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_dataset(n_vectors: int, dim: int, n_queries: int, seed: int = 0):
+    """Synthetic normalised corpus with queries that are noisy copies of stored vectors."""
+    rng = np.random.default_rng(seed)
+    corpus = normalize_rows(rng.standard_normal((n_vectors, dim), dtype=np.float32))
+    targets = rng.integers(0, n_vectors, n_queries)
+    queries = normalize_rows(corpus[targets] + 0.5 * rng.standard_normal((n_queries, dim), dtype=np.float32) / np.sqrt(dim) * 4)
+    return corpus, queries
+
+
+def build_stores(workdir: Path, corpus: np.ndarray):
+    """Write the corpus into every available backend."""
+    ids = [f"chunk_{i}" for i in range(len(corpus))]
+    documents = [f"document {i}" for i in range(len(corpus))]
+    metadatas = [{"course_name": "bench", "chunk_index": i} for i in range(len(corpus))]
+
+    for dtype in ('float32', 'float16'):
+        index = MmapVectorIndex(workdir / f"mmap_{dtype}", dtype=dtype)
+        index.add(ids, corpus, documents, metadatas)
+
+    try:
+        import chromadb
+        from chromadb.config import Settings
+    except ImportError:
+        print("chromadb not installed, skipping Chroma backend")
+        return ['mmap_float32', 'mmap_float16']
+
+    client = chromadb.PersistentClient(path=str(workdir / "chroma"), settings=Settings(anonymized_telemetry=False))
+    collection = client.get_or_create_collection(name="nvidia_transcripts")
+    for start in range(0, len(corpus), 1000):
+        collection.add(
+            ids=ids[start:start + 1000],
+            embeddings=corpus[start:start + 1000].tolist(),
+            documents=documents[start:start + 1000],
+            metadatas=metadatas[start:start + 1000]
+        )
+    return ['mmap_float32', 'mmap_float16', 'chroma']
+
+
+def run_worker(backend: str, workdir: Path, k: int):
+    """Open one backend, run all queries and print a JSON result line."""
+    queries = np.load(workdir / "queries.npy")
+    truth = np.load(workdir / "truth.npy")
+    rss_before = current_rss_mb()
+
+    start = time.perf_counter()
+    if backend == 'chroma':
+        import chromadb
+        from chromadb.config import Settings
+        client = chromadb.PersistentClient(path=str(workdir / "chroma"), settings=Settings(anonymized_telemetry=False))
+        store = client.get_collection(name="nvidia_transcripts")
+    else:
+        store = MmapVectorIndex(workdir / backend)
+    open_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = store.query(query_embeddings=[query.tolist()], n_results=k, include=["distances"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {int(doc_id.rsplit('_', 1)[1]) for doc_id in result['ids'][0]}
+        hits += len(found & set(expected.tolist()))
+
+    latencies = np.array(latencies)
+    print(json.dumps({
+        'backend': backend,
+        'open_ms': open_ms,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'recall_at_k': hits / truth.size,
+        'rss_mb': current_rss_mb(),
+        'rss_delta_mb': current_rss_mb() - rss_before
+    }))
+
+
+def main():
+    """Run the vector index benchmark."""
+    parser = argparse.ArgumentParser(description='Vector backend latency, recall and RSS benchmark')
+    parser.add_argument('--vectors', type=int, default=5000, help='Number of stored chunks')
+    parser.add_argument('--dim', type=int, default=384, help='Embedding dimension')
+    parser.add_argument('--queries', type=int, default=200, help='Number of queries')
+    parser.add_argument('-k', type=int, default=5, help='Results per query')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, Path(args.workdir), args.k)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        corpus, queries = make_dataset(args.vectors, args.dim, args.queries)
+
+        # Exact top-k in float32 is the recall reference
+        truth = np.argsort(-(queries @ corpus.T), axis=1)[:, :args.k]
+        np.save(workdir / "queries.npy", queries)
+        np.save(workdir / "truth.npy", truth)
+
+        backends = build_stores(workdir, corpus)
+
+        print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, k={args.k}\n")
+        print(f"{'backend':<14}{'open ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'recall@k':>10}{'RSS MiB':>10}")
+        for backend in backends:
+            output = subprocess.run(
+                [sys.executable, __file__, '--worker', backend, '--workdir', str(workdir), '-k', str(args.k)],
+                capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]
+            result = json.loads(output)
+            print(f"{backend:<14}{result['open_ms']:>10.1f}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}"
+                  f"{result['recall_at_k']:>10.3f}{result['rss_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Retrieval quality and latency benchmark for the knowledge base.
+Ingests the bundled course transcripts once per retrieval backend and chunking
+configuration, runs the labelled queries in retrieval_queries.jsonl and reports
+recall@k, MRR, p50/p95/p99 query latency, ingest throughput and peak memory.
+Each configuration runs in a fresh subprocess; results are written as JSON.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import itertools
+import subprocess
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from bench_vector_index import current_rss_mb, peak_rss_mb
+
+QUERIES_FILE = Path(__file__).parent / "retrieval_queries.jsonl"
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def load_queries(path: Path):
+    """Labelled queries: question -> expected course and lesson."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def is_relevant(result, expected) -> bool:
+    return result['course_name'] == expected['course'] and result['lesson_title'] == expected['lesson']
+
+
+def run_worker(config: dict, transcripts: str, queries_file: Path, k: int) -> dict:
+    """Ingest, query and measure one configuration."""
+    from chunking import TokenChunker
+    from knowledge_base import KnowledgeBaseProcessor
+    from model_registry import get_embedding_model
+
+    os.environ['VECTOR_INDEX_DTYPE'] = config.get('dtype', 'float32')
+    queries = load_queries(queries_file)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Load the model outside the measured region, it is shared by every configuration
+        model = get_embedding_model()
+        chunker = TokenChunker.from_sentence_transformer(
+            model, max_tokens=config['chunk_tokens'], overlap_tokens=config['overlap_tokens']
+        )
+        kb = KnowledgeBaseProcessor(persist_directory=workdir, vector_backend=config['backend'], chunker=chunker)
+        kb.hybrid_search = config['hybrid']
+        kb.rerank = config['rerank']
+        # Measure retrieval itself, not semantic cache hits
+        kb.semantic_cache = None
+
+        tracemalloc.start()
+        rss_before = current_rss_mb()
+
+        start = time.perf_counter()
+        documents = kb.process_all_transcripts(transcripts)
+        kb.add_documents_to_knowledge_base(documents)
+        ingest_seconds = time.perf_counter() - start
+        n_chunks = kb.collection.count()
+        n_bytes = sum(len(doc.content.encode('utf-8')) for doc in documents)
+
+        # Tracing slows Python code, so it only covers ingest
+        _, peak_traced = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # Warm up caches so the first query does not dominate the tail
+        kb.search_knowledge_base(queries[0]['query'], n_results=k)
+
+        latencies, reciprocal_ranks, hits = [], [], []
+        for expected in queries:
+            start = time.perf_counter()
+            results = kb.search_knowledge_base(expected['query'], n_results=k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            rank = next((i for i, result in enumerate(results, 1) if is_relevant(result, expected)), None)
+            hits.append(rank is not None)
+            reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+    latencies = np.array(latencies)
+    return {
+        **config,
+        'k': k,
+        'queries': len(queries),
+        'documents': len(documents),
+        'chunks': n_chunks,
+        f'recall_at_{k}': float(np.mean(hits)),
+        'mrr': float(np.mean(reciprocal_ranks)),
+        'latency_p50_ms': float(np.percentile(latencies, 50)),
+        'latency_p95_ms': float(np.percentile(latencies, 95)),
+        'latency_p99_ms': float(np.percentile(latencies, 99)),
+        'ingest_seconds': ingest_seconds,
+        'ingest_chunks_per_s': n_chunks / ingest_seconds,
+        'ingest_mb_per_s': n_bytes / ingest_seconds / 1e6,
+        'ingest_peak_traced_mb': peak_traced / 1e6,
+        'peak_rss_mb': peak_rss_mb(),
+        'rss_delta_mb': current_rss_mb() - rss_before
+    }
+
+
+def available_backends():
+    backends = ['mmap', 'mmap_float16']
+    try:
+        import chromadb  # noqa: F401
+        backends.append('chroma')
+    except ImportError:
+        print("chromadb not installed, skipping Chroma backend")
+    return backends
+
+
+def main():
+    """Run the retrieval benchmark grid."""
+    parser = argparse.ArgumentParser(description='Knowledge base retrieval quality and latency benchmark')
+    parser.add_argument('--path', default=str(Path(__file__).resolve().parents[2]),
+                        help='Directory containing course transcripts')
+    parser.add_argument('--queries', default=str(QUERIES_FILE), help='Labelled queries (JSONL)')
+    parser.add_argument('--backends', default=None, help='Comma-separated: mmap, mmap_float16, chroma')
+    parser.add_argument('--chunk-tokens', default='128,254', help='Comma-separated chunk sizes in tokens')
+    parser.add_argument('--overlap-tokens', default='0,32', help='Comma-separated overlaps in tokens')
+    parser.add_argument('--hybrid', default='on,off', help='Comma-separated hybrid BM25 fusion modes: on, off')
+    parser.add_argument('--rerank', action='store_true', help='Enable cross-encoder reranking')
+    parser.add_argument('-k', type=int, default=5, help='Results per query')
+    parser.add_argument('--output', default=None, help='JSON results file (default: benchmarks/results/)')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(json.loads(args.worker), args.path, Path(args.queries), args.k)))
+        return
+
+    backends = args.backends.split(',') if args.backends else available_backends()
+    grid = itertools.product(
+        backends,
+        [int(v) for v in args.chunk_tokens.split(',')],
+        [int(v) for v in args.overlap_tokens.split(',')],
+        [v == 'on' for v in args.hybrid.split(',')]
+    )
+
+    results = []
+    print(f"{'backend':<14}{'chunk':>6}{'ovl':>5}{'hybrid':>7}{'chunks':>7}{f'R@{args.k}':>7}{'MRR':>7}"
+          f"{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}{'ingest/s':>10}{'peak MB':>9}")
+    for backend, chunk_tokens, overlap_tokens, hybrid in grid:
+        if overlap_tokens >= chunk_tokens:
+            continue
+        config = {
+            'backend': 'mmap' if backend.startswith('mmap') else backend,
+            'dtype': 'float16' if backend == 'mmap_float16' else 'float32',
+            'chunk_tokens': chunk_tokens,
+            'overlap_tokens': overlap_tokens,
+            'hybrid': hybrid,
+            'rerank': args.rerank
+        }
+        output = subprocess.run(
+            [sys.executable, __file__, '--worker', json.dumps(config), '--path', args.path,
+             '--queries', args.queries, '-k', str(args.k)],
+            capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        result['label'] = backend
+        results.append(result)
+
+        print(f"{backend:<14}{chunk_tokens:>6}{overlap_tokens:>5}{'on' if hybrid else 'off':>7}{result['chunks']:>7}"
+              f"{result[f'recall_at_{args.k}']:>7.3f}{result['mrr']:>7.3f}{result['latency_p50_ms']:>8.2f}"
+              f"{result['latency_p95_ms']:>8.2f}{result['latency_p99_ms']:>8.2f}"
+              f"{result['ingest_chunks_per_s']:>10.1f}{result['peak_rss_mb']:>9.1f}")
+
+    output_path = Path(args.output) if args.output else \
+        RESULTS_DIR / f"retrieval-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created_at': datetime.now().isoformat(),
+            'embedding_model': os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2'),
+            'embedding_backend': os.getenv('EMBEDDING_BACKEND', 'torch'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': results
+        }, f, indent=2)
+    print(f"\nResults written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
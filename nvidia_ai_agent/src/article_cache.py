@@ -0,0 +1,329 @@
+"""
+Persistent cache of extracted blog article text.
+Maps URL to the readable text of the page together with its ETag/Last-Modified
+validators in a small SQLite file, with an in-memory LRU in front, so repeat hits
+on popular articles cost no download and no HTML parse. Stale entries are
+revalidated with a conditional GET; downloads for several URLs run concurrently.
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from bs4 import BeautifulSoup
+from dotenv import load_dotenv
+
+from blog_index import agent_path
+from http_client import get_http_session, get_timeouts, async_available, fetch_async
+from tracing import span
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARTICLE_CACHE_PATH = './data/article_cache.sqlite'
+
+# Common content selectors for NVIDIA blogs
+CONTENT_SELECTORS = [
+    '.post-content',
+    '.entry-content',
+    '.article-content',
+    '.content',
+    'main article',
+    '.post-body'
+]
+
+# Upper bound on stored text per article; callers trim further for prompts
+MAX_ARTICLE_CHARS = 20000
+
+_fetch_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='article-fetch')
+
+
+def extract_article_text(html: bytes) -> str:
+    """Readable body text of a blog article page."""
+    soup = BeautifulSoup(html, 'html.parser')
+    for element in soup(['script', 'style']):
+        element.extract()
+
+    for selector in CONTENT_SELECTORS:
+        content_elem = soup.select_one(selector)
+        if content_elem:
+            text = content_elem.get_text(separator=' ', strip=True)
+            if text:
+                return text[:MAX_ARTICLE_CHARS]
+
+    # Fallback: get all paragraph text
+    return ' '.join(p.get_text(strip=True) for p in soup.find_all('p'))[:MAX_ARTICLE_CHARS]
+
+
+@dataclass
+class CachedArticle:
+    """Extracted text of one page plus its HTTP validators."""
+    content: str
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class ArticleCache:
+    """URL -> extracted text cache backed by SQLite with an in-memory LRU."""
+
+    def __init__(self, path: str = None, ttl_seconds: float = None, memory_entries: int = None, session=None):
+        """Open (or create) the cache file."""
+        self.path = Path(path) if path else agent_path(os.getenv('ARTICLE_CACHE_PATH', DEFAULT_ARTICLE_CACHE_PATH))
+        self.ttl_seconds = float(ttl_seconds if ttl_seconds is not None else os.getenv('ARTICLE_CACHE_TTL', 604800))
+        self.memory_entries = int(memory_entries or os.getenv('ARTICLE_CACHE_MEMORY', 256))
+        self.session = session or get_http_session()
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, CachedArticle]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_async: Dict[str, asyncio.Task] = {}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS articles ('
+            'url TEXT PRIMARY KEY, content TEXT NOT NULL, fetched_at REAL NOT NULL, '
+            'etag TEXT, last_modified TEXT)'
+        )
+        self._db.commit()
+
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'downloads': 0,
+            'not_modified': 0,
+            'errors': 0
+        }
+
+    def _remember(self, url: str, article: CachedArticle):
+        """Put an entry at the front of the in-memory LRU."""
+        self._memory[url] = article
+        self._memory.move_to_end(url)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, url: str, count: bool = True) -> Optional[CachedArticle]:
+        """Entry from memory, else from disk, regardless of age."""
+        with self._lock:
+            article = self._memory.get(url)
+            if article is not None:
+                self._memory.move_to_end(url)
+                self.stats['memory_hits'] += count
+                return article
+
+            row = self._db.execute(
+                'SELECT content, fetched_at, etag, last_modified FROM articles WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            article = CachedArticle(*row)
+            self._remember(url, article)
+            self.stats['disk_hits'] += count
+            return article
+
+    def _store(self, url: str, article: CachedArticle):
+        with self._lock:
+            self._remember(url, article)
+            self._db.execute(
+                'INSERT OR REPLACE INTO articles (url, content, fetched_at, etag, last_modified) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (url, article.content, article.fetched_at, article.etag, article.last_modified)
+            )
+            self._db.commit()
+
+    def _is_fresh(self, article: CachedArticle) -> bool:
+        return time.time() - article.fetched_at <= self.ttl_seconds
+
+    @staticmethod
+    def _validators(cached: Optional[CachedArticle]) -> Dict[str, str]:
+        """Conditional request headers for revalidating a cached entry."""
+        headers = {}
+        if cached is not None and cached.etag:
+            headers['If-None-Match'] = cached.etag
+        if cached is not None and cached.last_modified:
+            headers['If-Modified-Since'] = cached.last_modified
+        return headers
+
+    def _download(self, url: str) -> Optional[str]:
+        """Fetch and extract a page, revalidating an existing entry by ETag/Last-Modified."""
+        cached = self._lookup(url, count=False)
+        try:
+            response = self.session.get(url, headers=self._validators(cached), timeout=get_timeouts())
+            if response.status_code == 304 and cached is not None:
+                self.stats['not_modified'] += 1
+                cached.fetched_at = time.time()
+                self._store(url, cached)
+                return cached.content
+
+            response.raise_for_status()
+            self.stats['downloads'] += 1
+            content = extract_article_text(response.content)
+            if not content:
+                return cached.content if cached is not None else None
+
+            self._store(url, CachedArticle(
+                content=content,
+                fetched_at=time.time(),
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            ))
+            return content
+
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Error extracting content from {url}: {e}")
+            # A stale copy is better than nothing
+            return cached.content if cached is not None else None
+
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+
+    async def _download_async(self, url: str) -> Optional[str]:
+        """Async variant of _download; parsing and SQLite writes run off the event loop."""
+        cached = self._lookup(url, count=False)
+        try:
+            status, headers, body = await fetch_async(url, self._validators(cached))
+            if status == 304 and cached is not None:
+                self.stats['not_modified'] += 1
+                cached.fetched_at = time.time()
+                await asyncio.to_thread(self._store, url, cached)
+                return cached.content
+
+            self.stats['downloads'] += 1
+            content = await asyncio.to_thread(extract_article_text, body)
+            if not content:
+                return cached.content if cached is not None else None
+
+            article = CachedArticle(
+                content=content,
+                fetched_at=time.time(),
+                etag=headers.get('ETag'),
+                last_modified=headers.get('Last-Modified')
+            )
+            await asyncio.to_thread(self._store, url, article)
+            return content
+
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Error extracting content from {url}: {e}")
+            return cached.content if cached is not None else None
+
+    def _schedule_async(self, url: str) -> asyncio.Task:
+        """Start an async download on the running loop unless one is already running."""
+        loop = asyncio.get_running_loop()
+        task = self._inflight_async.get(url)
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = loop.create_task(self._download_async(url))
+            self._inflight_async[url] = task
+        return task
+
+    def _schedule(self, url: str) -> Future:
+        """Start a download unless one is already running for this URL."""
+        with self._lock:
+            future = self._inflight.get(url)
+            if future is None:
+                future = _fetch_executor.submit(self._download, url)
+                self._inflight[url] = future
+            return future
+
+    def get(self, url: str) -> Optional[str]:
+        """Fresh cached text for a URL, without any network access."""
+        article = self._lookup(url)
+        if article is not None and self._is_fresh(article):
+            return article.content
+        return None
+
+    def fetch(self, url: str, timeout: float = None) -> Optional[str]:
+        """Text of a URL, downloading it only when not cached or stale."""
+        return self.fetch_many([url], timeout).get(url)
+
+    def fetch_many(self, urls: List[str], timeout: float = None) -> Dict[str, str]:
+        """Texts of several URLs; downloads run concurrently and late ones are left out."""
+        with span('content_extraction', articles=len(urls)) as extraction_span:
+            contents, pending = {}, {}
+            for url in urls:
+                content = self.get(url)
+                if content is not None:
+                    contents[url] = content
+                else:
+                    pending[url] = self._schedule(url)
+
+            if pending:
+                done, _ = wait(pending.values(), timeout=timeout or sum(get_timeouts()))
+                for url, future in pending.items():
+                    if future not in done:
+                        logger.warning(f"Timed out extracting content from {url}")
+                    elif future.result():
+                        contents[url] = future.result()
+            self._annotate(extraction_span, urls, contents, pending)
+            return contents
+
+    async def fetch_many_async(self, urls: List[str], timeout: float = None) -> Dict[str, str]:
+        """Async variant of fetch_many on the shared aiohttp session; never blocks the event loop."""
+        with span('content_extraction', articles=len(urls)) as extraction_span:
+            contents, pending = {}, {}
+            for url in urls:
+                content = self.get(url)
+                if content is not None:
+                    contents[url] = content
+                elif async_available():
+                    pending[url] = self._schedule_async(url)
+                else:
+                    # Without aiohttp, wait for the thread pool download without blocking the loop
+                    pending[url] = asyncio.wrap_future(self._schedule(url))
+
+            if pending:
+                done, _ = await asyncio.wait(pending.values(), timeout=timeout or sum(get_timeouts()))
+                for url, task in pending.items():
+                    if task not in done:
+                        logger.warning(f"Timed out extracting content from {url}")
+                    elif task.result():
+                        contents[url] = task.result()
+            self._annotate(extraction_span, urls, contents, pending)
+            return contents
+
+    @staticmethod
+    def _annotate(extraction_span, urls: List[str], contents: Dict[str, str], pending: Dict[str, Any]):
+        """Record cache hits and extracted bytes on a content_extraction span."""
+        extraction_span.set(
+            cache_hit=not pending,
+            cache_hits=len(urls) - len(pending),
+            downloads=sum(url in contents for url in pending),
+            timed_out=sum(not task.done() for task in pending.values()),
+            bytes=sum(len(content.encode('utf-8')) for content in contents.values())
+        )
+
+    def get_stats(self) -> Dict[str, int]:
+        """Hit and download counters plus the number of stored articles."""
+        with self._lock:
+            stored = self._db.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+        return {**self.stats, 'stored': stored, 'in_memory': len(self._memory)}
+
+
+_article_cache: Optional[ArticleCache] = None
+_article_cache_lock = threading.Lock()
+
+
+def get_article_cache() -> ArticleCache:
+    """Article cache shared by the blog tools and the webhook server in this process."""
+    global _article_cache
+    if _article_cache is None:
+        with _article_cache_lock:
+            if _article_cache is None:
+                _article_cache = ArticleCache()
+    return _article_cache
@@ -0,0 +1,412 @@
+"""
+Persistent local index of NVIDIA blog articles.
+Feed entries and the scraped NVIDIA_Blog_Articles archive are stored once per URL
+with a BM25 index over title, summary and body, so blog search is an indexed lookup
+over the whole history instead of a rescan of the latest feed items.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are only serialized within one process
+    fcntl = None
+
+from bs4 import BeautifulSoup
+from dotenv import load_dotenv
+
+from lexical_index import BM25Index
+from partitions import parse_date
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Relative paths are resolved against the nvidia_ai_agent directory, not the working directory,
+# so the agent, the webhook server and the scraper open the same index wherever they are started
+AGENT_DIRECTORY = Path(__file__).resolve().parent.parent
+DEFAULT_BLOG_INDEX_DIR = './data/blog_index'
+DEFAULT_BLOG_ARCHIVE_DIR = '../NVIDIA_Blog_Articles'
+
+# Stored per article for previews and local content extraction; the BM25 index sees the full text
+MAX_STORED_CONTENT = 4000
+
+HEADER_FIELD = re.compile(r"^\**(URL|Author|Published|Categories):\**\s*(.*)$")
+
+
+def agent_path(path: str) -> Path:
+    """Path relative to the nvidia_ai_agent directory unless it is absolute."""
+    return AGENT_DIRECTORY / Path(path).expanduser()
+
+
+def source_for_url(url: str) -> str:
+    """Blog name for an article URL."""
+    return 'NVIDIA Developer Blog' if 'developer.nvidia.com' in url else 'NVIDIA Blog'
+
+
+def clean_html(text: str) -> str:
+    """Plain text of an HTML feed summary."""
+    if not text or '<' not in text:
+        return text or ''
+    return BeautifulSoup(text, 'html.parser').get_text(' ', strip=True)
+
+
+def parse_archive_file(path: Path) -> Optional[Dict[str, Any]]:
+    """Parse an article saved by nvidia_scraper (markdown or text layout)."""
+    try:
+        lines = path.read_text(encoding='utf-8').splitlines()
+    except (OSError, UnicodeDecodeError) as e:
+        logger.error(f"Error reading archived article {path}: {e}")
+        return None
+
+    fields = {}
+    title = ''
+    body_start = None
+    separators = 0
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith('# ') and not title:
+            title = stripped[2:].strip()
+        elif stripped == '---' or (stripped and set(stripped) == {'-'} and len(stripped) >= 20):
+            separators += 1
+            # Markdown has one separator before the body, the text layout frames the header with two
+            if stripped == '---' or separators == 2:
+                body_start = i + 1
+                break
+        elif separators == 1 and not title and stripped and not HEADER_FIELD.match(stripped):
+            title = stripped
+        else:
+            match = HEADER_FIELD.match(stripped)
+            if match:
+                fields[match.group(1).lower()] = match.group(2).strip()
+
+    url = fields.get('url')
+    if not url or not title or body_start is None:
+        return None
+
+    content = '\n'.join(lines[body_start:]).strip()
+    return {
+        'url': url,
+        'title': title,
+        'author': fields.get('author', ''),
+        'published_date': fields.get('published', ''),
+        'categories': [c.strip() for c in fields.get('categories', '').split(',') if c.strip()],
+        'content': content
+    }
+
+
+class BlogIndex:
+    """URL-keyed article store with a persistent BM25 index."""
+
+    def __init__(self, index_directory: str = None, archive_directory: str = None):
+        """Open (or create) the index; archive_directory is re-scanned periodically when given."""
+        self.index_directory = Path(index_directory) if index_directory else \
+            agent_path(os.getenv('BLOG_INDEX_DIR', DEFAULT_BLOG_INDEX_DIR))
+        self.archive_directory = Path(archive_directory) if archive_directory else None
+        self.articles_path = self.index_directory / 'articles.json'
+        self.lexical_index_path = self.index_directory / 'blog_bm25.npz'
+        self.lock_path = self.index_directory / '.lock'
+
+        self._lock = threading.RLock()
+        self.articles: Dict[str, Dict[str, Any]] = {}
+        # Archive file -> mtime when it was last indexed
+        self.archive_files: Dict[str, float] = {}
+        self._dirty = False
+        self._last_archive_sync = 0.0
+        # Feed URL -> feed cache version whose entries are already indexed
+        self._indexed_feeds: Dict[str, int] = {}
+        # URLs changed here since the last save; they win over another process's copy when merging
+        self._changed_urls = set()
+        # (mtime, size) of articles.json when this process last read or wrote it
+        self._stored_stamp = None
+
+        with self._file_lock():
+            if self.articles_path.exists():
+                stored = self._read_stored()
+                self.articles = stored.get('articles', {})
+                self.archive_files = stored.get('archive_files', {})
+            self.lexical_index = BM25Index(self.lexical_index_path)
+
+        if len(self.lexical_index) != len(self.articles):
+            self._rebuild_lexical_index()
+
+    def __len__(self) -> int:
+        return len(self.articles)
+
+    @staticmethod
+    def _index_text(article: Dict[str, Any], content: str) -> str:
+        """Text seen by BM25; the title is repeated so title matches weigh more."""
+        return f"{article['title']} {article['title']} {article.get('summary', '')} {content}"
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock on the index directory, shared with other processes writing the same index."""
+        self.index_directory.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _stat_stored(self):
+        try:
+            stat = self.articles_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_stored(self) -> Dict[str, Any]:
+        """Load articles.json, remembering which version of it this process has seen."""
+        self._stored_stamp = self._stat_stored()
+        with open(self.articles_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _merge_stored(self) -> int:
+        """Merge articles another process saved since we last read the store; call with both locks held."""
+        if self._stat_stored() in (None, self._stored_stamp):
+            return 0
+
+        stored = self._read_stored()
+        merged = 0
+        for url, article in stored.get('articles', {}).items():
+            if url in self._changed_urls:
+                continue
+            if article.get('indexed_at') != self.articles.get(url, {}).get('indexed_at'):
+                self.articles[url] = article
+                self.lexical_index.add([url], [self._index_text(article, article.get('content', ''))])
+                merged += 1
+        for key, mtime in stored.get('archive_files', {}).items():
+            self.archive_files[key] = max(mtime, self.archive_files.get(key, 0.0))
+
+        if merged:
+            logger.info(f"Merged {merged} articles saved by another process into {self.index_directory}")
+        return merged
+
+    def refresh(self) -> int:
+        """Pick up articles saved by another process (e.g. the scraper); returns how many changed."""
+        with self._lock:
+            if self._stat_stored() in (None, self._stored_stamp):
+                return 0
+            with self._file_lock():
+                return self._merge_stored()
+
+    def _rebuild_lexical_index(self):
+        """Re-create the BM25 index from the stored articles, e.g. after a crash between writes."""
+        logger.info(f"Rebuilding blog lexical index for {len(self.articles)} articles")
+        self.lexical_index = BM25Index()
+        self.lexical_index.add(
+            list(self.articles),
+            [self._index_text(article, article.get('content', '')) for article in self.articles.values()]
+        )
+        self._dirty = True
+
+    def add_article(
+        self,
+        url: str,
+        title: str,
+        content: str = '',
+        summary: str = '',
+        published_date: Any = None,
+        source: str = None,
+        categories: List[str] = None
+    ) -> bool:
+        """Add or update an article; returns False when nothing changed."""
+        if not url or not title:
+            return False
+
+        summary = clean_html(summary)
+        published = parse_date(published_date)
+        published_date = f"{published // 10000:04d}-{published // 100 % 100:02d}-{published % 100:02d}" if published else ''
+        fingerprint = hashlib.sha1(
+            '\x00'.join([title, summary, content] + sorted(categories or [])).encode('utf-8')
+        ).hexdigest()
+
+        with self._lock:
+            existing = self.articles.get(url, {})
+            if fingerprint in existing.get('fingerprints', []):
+                return False
+
+            # Merge: a feed entry (summary only) must not erase content from the archive or webhook
+            content = content or existing.get('content', '')
+            article = {
+                'url': url,
+                'title': title or existing.get('title', ''),
+                'summary': summary or existing.get('summary', '') or content[:300],
+                'published_date': published_date or existing.get('published_date', ''),
+                'source': source or existing.get('source') or source_for_url(url),
+                'categories': sorted(set(existing.get('categories', [])) | set(categories or [])),
+                'content': content[:MAX_STORED_CONTENT],
+                'fingerprints': (existing.get('fingerprints', []) + [fingerprint])[-4:],
+                'indexed_at': datetime.now().isoformat()
+            }
+            self.articles[url] = article
+            self.lexical_index.add([url], [self._index_text(article, content)])
+            self._changed_urls.add(url)
+            self._dirty = True
+            return True
+
+    def add_feed_entries(self, entries: List[Any], source: str = None) -> int:
+        """Index parsed feedparser entries; returns how many were new or changed."""
+        added = 0
+        for entry in entries:
+            published = entry.get('published_parsed')
+            content = ''
+            if entry.get('content'):
+                content = clean_html(entry['content'][0].get('value', ''))
+            added += self.add_article(
+                url=entry.get('link', ''),
+                title=entry.get('title', ''),
+                content=content,
+                summary=entry.get('summary', ''),
+                published_date=datetime(*published[:6]) if published else None,
+                source=source
+            )
+        return added
+
+    def index_feed(self, feed_url: str, entries: List[Any], version: int, source: str = None) -> int:
+        """Index a feed's entries once per feed cache version, saving when anything changed."""
+        if self._indexed_feeds.get(feed_url) == version:
+            return 0
+        added = self.add_feed_entries(entries, source)
+        self._indexed_feeds[feed_url] = version
+        if added:
+            logger.info(f"Indexed {added} new or updated articles from {feed_url}")
+            self.save()
+        return added
+
+    def sync_archive(self, directory: str = None) -> int:
+        """Index new or modified files of the scraped article archive."""
+        directory = Path(directory) if directory else self.archive_directory
+        self._last_archive_sync = time.time()
+        self.refresh()
+        if directory is None or not directory.is_dir():
+            return 0
+
+        added = 0
+        for path in sorted(directory.rglob('*')):
+            if path.suffix not in ('.md', '.txt') or path.name == 'scraped_urls.txt':
+                continue
+            key = str(path.resolve())
+            mtime = path.stat().st_mtime
+            if self.archive_files.get(key) == mtime:
+                continue
+
+            article = parse_archive_file(path)
+            if article:
+                added += self.add_article(
+                    url=article['url'],
+                    title=article['title'],
+                    content=article['content'],
+                    published_date=article['published_date'],
+                    categories=article['categories']
+                )
+            with self._lock:
+                self.archive_files[key] = mtime
+                self._dirty = True
+
+        if added:
+            logger.info(f"Indexed {added} articles from {directory}")
+        self.save()
+        return added
+
+    def sync_archive_if_due(self, interval_seconds: float = None):
+        """Re-scan the archive at most every BLOG_ARCHIVE_SYNC_INTERVAL seconds."""
+        if self.archive_directory is None:
+            return
+        interval = float(interval_seconds if interval_seconds is not None
+                         else os.getenv('BLOG_ARCHIVE_SYNC_INTERVAL', 300))
+        if time.time() - self._last_archive_sync >= interval:
+            self.sync_archive()
+
+    def save(self):
+        """Write the article store and BM25 index if anything changed.
+
+        Other processes (the scraper, a second agent) write the same files, so the store is
+        re-read and merged under a cross-process lock before it is replaced.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            with self._file_lock():
+                self._merge_stored()
+                self.lexical_index.save(self.lexical_index_path)
+
+                tmp_path = self.articles_path.with_name(self.articles_path.name + '.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'articles': self.articles, 'archive_files': self.archive_files}, f)
+                tmp_path.replace(self.articles_path)
+                self._stored_stamp = self._stat_stored()
+            self._changed_urls.clear()
+            self._dirty = False
+
+    def search(self, query: str, k: int = 5, source: str = None) -> List[Dict[str, Any]]:
+        """Top-k articles by BM25 relevance, optionally from one blog only."""
+        with self._lock:
+            allowed_ids = None
+            if source:
+                allowed_ids = {url for url, article in self.articles.items() if article['source'] == source}
+            hits = self.lexical_index.search(query, k, allowed_ids=allowed_ids)
+
+            results = []
+            for url, score in hits:
+                article = self.articles[url]
+                results.append({
+                    'title': article['title'],
+                    'url': url,
+                    'summary': article['summary'],
+                    'published_date': article['published_date'],
+                    'source': article['source'],
+                    'relevance_score': score
+                })
+
+        results.sort(key=lambda x: (x['relevance_score'], x['published_date']), reverse=True)
+        return results
+
+    def get_content(self, url: str) -> Optional[str]:
+        """Stored article text, if the index has it."""
+        article = self.articles.get(url)
+        return article.get('content') or None if article else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Article counts per blog and archive coverage."""
+        sources: Dict[str, int] = {}
+        for article in list(self.articles.values()):
+            sources[article['source']] = sources.get(article['source'], 0) + 1
+        return {
+            'articles': len(self.articles),
+            'sources': sources,
+            'archive_files': len(self.archive_files),
+            'index_directory': str(self.index_directory)
+        }
+
+
+_blog_index: Optional[BlogIndex] = None
+_blog_index_lock = threading.Lock()
+
+
+def get_blog_index() -> BlogIndex:
+    """Blog index shared by every tool in the process, synced with the archive on first use."""
+    global _blog_index
+    if _blog_index is None:
+        with _blog_index_lock:
+            if _blog_index is None:
+                index = BlogIndex(archive_directory=agent_path(os.getenv('BLOG_ARCHIVE_DIR', DEFAULT_BLOG_ARCHIVE_DIR)))
+                index.sync_archive()
+                _blog_index = index
+    return _blog_index
@@ -0,0 +1,233 @@
+"""
+Token-aware chunking for NVIDIA course transcripts and articles.
+Splits text on sentence boundaries and packs sentences into chunks sized to the
+embedding model's token window, using the tokenizer's offset mapping.
+"""
+
+import os
+import re
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Any
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# all-MiniLM-L6-v2 truncates inputs at 256 tokens, two of which are [CLS]/[SEP]
+DEFAULT_MAX_SEQ_LENGTH = 256
+SPECIAL_TOKENS_PER_INPUT = 2
+
+# Sentence ends at terminal punctuation followed by whitespace (this also covers the
+# one-sentence-per-line layout written by transcribe.py) or at a blank line.
+# A single newline elsewhere is treated as plain whitespace, since scraped
+# articles wrap lines in the middle of sentences.
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'[.!?]+["\')\]]*(?=\s)|\n[ \t]*\n')
+
+# Approximate tokenizer used when the model tokenizer is unavailable
+FALLBACK_TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+# WordPiece produces roughly 1.3 tokens per regex token on the course transcripts
+FALLBACK_TOKEN_RATIO = 1.3
+
+
+@dataclass
+class Chunk:
+    """A chunk of text with its character span and token count."""
+    text: str
+    start_char: int
+    end_char: int
+    token_count: int
+
+
+class RegexTokenizer:
+    """Offset-only tokenizer used when no model tokenizer can be loaded."""
+
+    def offsets(self, text: str) -> np.ndarray:
+        """Return an (n, 2) array of token character offsets."""
+        spans = [m.span() for m in FALLBACK_TOKEN_PATTERN.finditer(text)]
+        return np.array(spans, dtype=np.int64).reshape(-1, 2)
+
+
+class TokenChunker:
+    """
+    Sentence-aware chunker that packs chunks to a token budget.
+    Each text is tokenized once; sentence boundaries are mapped onto token
+    positions with a vectorised search over the token offsets.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Any = None,
+        max_tokens: int = None,
+        overlap_tokens: int = None
+    ):
+        """Initialize the chunker with an optional Hugging Face fast tokenizer."""
+        self.tokenizer = tokenizer
+        self.uses_model_tokenizer = tokenizer is not None
+
+        max_tokens = max_tokens or int(os.getenv(
+            'CHUNK_MAX_TOKENS',
+            DEFAULT_MAX_SEQ_LENGTH - SPECIAL_TOKENS_PER_INPUT
+        ))
+        overlap_tokens = overlap_tokens if overlap_tokens is not None else int(
+            os.getenv('CHUNK_OVERLAP_TOKENS', 32)
+        )
+
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+
+        # Budget in model tokens, as configured
+        self.max_tokens = max_tokens
+        self.overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+
+        # Budget in tokenizer units actually used for packing
+        self._budget = self.max_tokens
+        self._overlap = self.overlap_tokens
+        self._scale = 1.0
+        if not self.uses_model_tokenizer:
+            # Leave headroom so approximate counts do not overflow the real window
+            self._fallback = RegexTokenizer()
+            self._budget = max(1, int(self.max_tokens / FALLBACK_TOKEN_RATIO))
+            self._overlap = int(self.overlap_tokens / FALLBACK_TOKEN_RATIO)
+            self._scale = FALLBACK_TOKEN_RATIO
+
+    @classmethod
+    def from_sentence_transformer(cls, model: Any, **kwargs) -> "TokenChunker":
+        """Create a chunker sized to a loaded SentenceTransformer model."""
+        tokenizer = getattr(model, 'tokenizer', None)
+        if tokenizer is not None and not getattr(tokenizer, 'is_fast', False):
+            logger.warning("Embedding model tokenizer has no offset mapping, using approximate token counts")
+            tokenizer = None
+
+        if 'max_tokens' not in kwargs and not os.getenv('CHUNK_MAX_TOKENS'):
+            max_seq_length = getattr(model, 'max_seq_length', None) or DEFAULT_MAX_SEQ_LENGTH
+            kwargs['max_tokens'] = max_seq_length - SPECIAL_TOKENS_PER_INPUT
+
+        return cls(tokenizer=tokenizer, **kwargs)
+
+    @classmethod
+    def for_model(cls, model_name: str, **kwargs) -> "TokenChunker":
+        """Create a chunker using only the tokenizer of the named embedding model."""
+        tokenizer = None
+        try:
+            from transformers import AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+            if not tokenizer.is_fast:
+                tokenizer = None
+        except Exception as e:
+            logger.warning(f"Could not load tokenizer for {model_name}, using approximate token counts: {e}")
+
+        return cls(tokenizer=tokenizer, **kwargs)
+
+    def _token_offsets(self, texts: List[str]) -> List[np.ndarray]:
+        """Tokenize a batch of texts and return token character offsets for each."""
+        if not self.uses_model_tokenizer:
+            return [self._fallback.offsets(text) for text in texts]
+
+        encoded = self.tokenizer(
+            texts,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False
+        )
+        return [
+            np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+            for offsets in encoded['offset_mapping']
+        ]
+
+    def _model_tokens(self, n: int) -> int:
+        """Convert a count in tokenizer units to (estimated) model tokens."""
+        return int(round(n * self._scale))
+
+    def _sentence_token_bounds(self, text: str, token_starts: np.ndarray) -> np.ndarray:
+        """Map sentence boundaries onto token indices, splitting over-long sentences."""
+        n_tokens = len(token_starts)
+        char_bounds = np.fromiter(
+            (m.end() for m in SENTENCE_BOUNDARY_PATTERN.finditer(text)),
+            dtype=np.int64
+        )
+        token_bounds = np.searchsorted(token_starts, char_bounds, side='left')
+        bounds = np.unique(np.concatenate(([0], token_bounds, [n_tokens])))
+
+        # Sentences longer than the budget are split at fixed token intervals
+        gaps = np.diff(bounds)
+        long_sentences = np.nonzero(gaps > self._budget)[0]
+        if len(long_sentences):
+            extra = [
+                np.arange(bounds[i] + self._budget, bounds[i + 1], self._budget)
+                for i in long_sentences
+            ]
+            bounds = np.unique(np.concatenate([bounds] + extra))
+
+        return bounds
+
+    def _pack(self, text: str, offsets: np.ndarray) -> List[Chunk]:
+        """Greedily pack whole sentences into chunks of at most max_tokens."""
+        n_tokens = len(offsets)
+        if n_tokens == 0:
+            return []
+
+        if n_tokens <= self._budget:
+            content = ' '.join(text.split())
+            return [Chunk(content, int(offsets[0, 0]), int(offsets[-1, 1]), self._model_tokens(n_tokens))]
+
+        token_starts = offsets[:, 0]
+        bounds = self._sentence_token_bounds(text, token_starts)
+        last = len(bounds) - 1
+
+        chunks = []
+        i = 0
+        while i < last:
+            start_tok = bounds[i]
+            j = int(np.searchsorted(bounds, start_tok + self._budget, side='right')) - 1
+            end_tok = bounds[j]
+
+            start_char = int(offsets[start_tok, 0])
+            end_char = int(offsets[end_tok - 1, 1])
+            content = ' '.join(text[start_char:end_char].split())
+            chunks.append(Chunk(content, start_char, end_char, self._model_tokens(end_tok - start_tok)))
+
+            if j >= last:
+                break
+
+            # Start the next chunk far enough back to share ~overlap_tokens
+            overlap_start = int(np.searchsorted(bounds, end_tok - self._overlap, side='left'))
+            if bounds[j + 1] - bounds[overlap_start] > self._budget:
+                # The next sentence would not fit alongside the overlap
+                overlap_start = j
+            i = max(i + 1, overlap_start)
+
+        return chunks
+
+    def chunk_many(self, texts: List[str]) -> List[List[Chunk]]:
+        """Chunk a batch of texts, tokenizing them in a single call."""
+        if not texts:
+            return []
+        all_offsets = self._token_offsets(texts)
+        return [self._pack(text, offsets) for text, offsets in zip(texts, all_offsets)]
+
+    def chunk(self, text: str) -> List[Chunk]:
+        """Chunk a single text."""
+        return self.chunk_many([text])[0]
+
+    def chunk_text(self, text: str) -> List[str]:
+        """Chunk a single text and return only the chunk strings."""
+        return [chunk.text for chunk in self.chunk(text)]
+
+    def count_tokens(self, text: str) -> int:
+        """Count content tokens in a text (excluding special tokens)."""
+        return self._model_tokens(len(self._token_offsets([text])[0]))
+
+
+def get_default_chunker(model: Optional[Any] = None) -> TokenChunker:
+    """Build a chunker for a loaded embedding model or the configured EMBEDDING_MODEL."""
+    if model is not None:
+        return TokenChunker.from_sentence_transformer(model)
+    return TokenChunker.for_model(
+        os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+    )
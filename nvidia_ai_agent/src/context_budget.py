@@ -0,0 +1,224 @@
+"""
+Token budget for the retrieved context in the agent prompt.
+Counts tokens with the chat model's own tokenizer (tiktoken, optional), drops
+sentences that an earlier snippet already contains, then admits knowledge base
+chunks and blog articles in rank order until the configured budget is spent,
+truncating the last one that only partly fits.
+"""
+
+import os
+import re
+import math
+import logging
+import threading
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
+
+from dotenv import load_dotenv
+
+try:
+    import tiktoken
+except ImportError:  # Token counts fall back to an approximation
+    tiktoken = None
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTEXT_TOKEN_BUDGET = 3000
+
+# OpenAI's rule of thumb for English text when no tokenizer is available
+APPROX_CHARS_PER_TOKEN = 4
+
+# Labels and line breaks the agent adds around each result
+RESULT_OVERHEAD_TOKENS = 12
+
+# A truncated snippet shorter than this is not worth its overhead
+MIN_SNIPPET_TOKENS = 40
+
+# No single result may fill more than this share of the budget
+MAX_RESULT_SHARE = 0.5
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+
+class TokenCounter:
+    """Token counts for a chat model, exact with tiktoken and approximate without it."""
+
+    def __init__(self, model: str = None):
+        """Load the model's encoding, if tiktoken and the encoding are available."""
+        self.model = model or os.getenv('OPENAI_MODEL', 'gpt-4')
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                try:
+                    self.encoding = tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    self.encoding = tiktoken.get_encoding('cl100k_base')
+            except Exception as e:
+                logger.warning(f"Could not load tokenizer for {self.model}, using approximate token counts: {e}")
+
+    @property
+    def name(self) -> str:
+        return f"tiktoken:{self.encoding.name}" if self.encoding is not None else 'approximate'
+
+    def count(self, text: str) -> int:
+        """Number of tokens in a text."""
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / APPROX_CHARS_PER_TOKEN)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of the text within max_tokens, cut back to a word boundary."""
+        if max_tokens <= 0:
+            return ''
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            prefix = self.encoding.decode(tokens[:max_tokens])
+        else:
+            if len(text) <= max_tokens * APPROX_CHARS_PER_TOKEN:
+                return text
+            prefix = text[:max_tokens * APPROX_CHARS_PER_TOKEN]
+        return prefix.rsplit(' ', 1)[0].rstrip() + ' ...'
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(model: str = None) -> TokenCounter:
+    """Token counter for a chat model, shared across the process."""
+    return TokenCounter(model)
+
+
+def _sentence_key(sentence: str) -> str:
+    return ' '.join(sentence.lower().split())
+
+
+class ContextBudgeter:
+    """Deduplicates, ranks and trims retrieved results to a prompt token budget."""
+
+    def __init__(self, max_tokens: int = None, counter: TokenCounter = None):
+        """Initialize with CONTEXT_TOKEN_BUDGET tokens per prompt."""
+        self.max_tokens = int(max_tokens or os.getenv('CONTEXT_TOKEN_BUDGET', DEFAULT_CONTEXT_TOKEN_BUDGET))
+        self.counter = counter or get_token_counter()
+
+        self._lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'context_tokens': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'duplicate_sentences': 0,
+            'truncated_snippets': 0,
+            'dropped_results': 0
+        }
+
+    @staticmethod
+    def _dedupe(text: str, seen: set) -> Tuple[str, int]:
+        """Text without sentences already in the prompt; returns (text, sentences removed)."""
+        kept, keys, removed = [], set(), 0
+        for sentence in SENTENCE_SPLIT.split(text):
+            key = _sentence_key(sentence)
+            if not key:
+                continue
+            if key in seen or key in keys:
+                removed += 1
+                continue
+            keys.add(key)
+            kept.append(sentence)
+        return ' '.join(kept), removed
+
+    @staticmethod
+    def _ranked(
+        knowledge_results: List[Dict[str, Any]],
+        web_results: List[Dict[str, Any]]
+    ) -> List[Tuple[str, int, Dict[str, Any]]]:
+        """(source, position, result) by rank within each source, alternating sources."""
+        # Knowledge base and blog scores are on different scales, so only ranks are compared
+        ranked = [('knowledge_base', i, result) for i, result in enumerate(knowledge_results)]
+        ranked += [('web', i, result) for i, result in enumerate(web_results)]
+        ranked.sort(key=lambda item: (item[1], item[0] != 'knowledge_base'))
+        return ranked
+
+    def fit(
+        self,
+        knowledge_results: List[Dict[str, Any]],
+        web_results: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, Any]]:
+        """Results that fit the budget, with trimmed text; returns (knowledge, web, usage)."""
+        seen: set = set()
+        remaining = self.max_tokens
+        kept: Dict[str, Dict[int, Dict[str, Any]]] = {'knowledge_base': {}, 'web': {}}
+        usage = {'budget': self.max_tokens, 'duplicate_sentences': 0, 'truncated_snippets': 0, 'dropped_results': 0}
+
+        for source, position, result in self._ranked(knowledge_results, web_results):
+            if source == 'knowledge_base':
+                field = 'content'
+                header = f"{result.get('course_name', '')} {result.get('lesson_title', '')}"
+            else:
+                field = 'full_content'
+                header = f"{result.get('title', '')} {result.get('source', '')} {result.get('published_date', '')} " \
+                         f"{result.get('url', '')} {result.get('summary', '')}"
+
+            overhead = self.counter.count(header) + RESULT_OVERHEAD_TOKENS
+            text, removed = self._dedupe(result.get(field) or '', seen)
+            usage['duplicate_sentences'] += removed
+            if source == 'knowledge_base' and not text:
+                # Everything in this chunk is already in the prompt
+                usage['dropped_results'] += 1
+                continue
+
+            tokens = self.counter.count(text)
+            limit = min(remaining, int(self.max_tokens * MAX_RESULT_SHARE))
+            if overhead + tokens > limit:
+                available = limit - overhead
+                if available < 0 or (source == 'knowledge_base' and available < MIN_SNIPPET_TOKENS):
+                    usage['dropped_results'] += 1
+                    continue
+                # A blog article without room for its content still contributes its summary
+                text = self.counter.truncate(text, available - 2) if available >= MIN_SNIPPET_TOKENS else ''
+                tokens = self.counter.count(text)
+                usage['truncated_snippets'] += 1
+
+            seen.update(_sentence_key(sentence) for sentence in SENTENCE_SPLIT.split(text))
+
+            trimmed = dict(result)
+            if text:
+                trimmed[field] = text
+            else:
+                trimmed.pop(field, None)
+            kept[source][position] = trimmed
+            remaining -= overhead + tokens
+
+        usage['context_tokens'] = self.max_tokens - remaining
+        with self._lock:
+            self.stats['requests'] += 1
+            for key in ('context_tokens', 'duplicate_sentences', 'truncated_snippets', 'dropped_results'):
+                self.stats[key] += usage[key]
+
+        return (
+            [kept['knowledge_base'][i] for i in sorted(kept['knowledge_base'])],
+            [kept['web'][i] for i in sorted(kept['web'])],
+            usage
+        )
+
+    def record_generation(self, prompt_tokens: int, completion_tokens: int):
+        """Add the token counts of one LLM call to the running totals."""
+        with self._lock:
+            self.stats['prompt_tokens'] += prompt_tokens
+            self.stats['completion_tokens'] += completion_tokens
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Token totals and per-request averages."""
+        requests = self.stats['requests']
+        return {
+            **self.stats,
+            'budget': self.max_tokens,
+            'tokenizer': self.counter.name,
+            'avg_context_tokens': self.stats['context_tokens'] / requests if requests else 0.0
+        }
@@ -0,0 +1,199 @@
+"""
+Bounded conversation history for agent sessions.
+The most recent exchanges are kept in a fixed-size ring buffer of compact
+records; totals for statistics are running counters, so nothing scans the
+history. Exchanges that fall out of the buffer can optionally be spilled to a
+SQLite file instead of being forgotten.
+"""
+
+import os
+import json
+import uuid
+import sqlite3
+import logging
+import threading
+from collections import Counter, deque
+from datetime import datetime
+from typing import List, Dict, Any, Iterator, Union
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ConversationContext:
+    """Represents one exchange of a conversation."""
+
+    __slots__ = ('user_query', 'response', 'timestamp', 'sources_used', 'relevance_scores', 'token_usage')
+
+    def __init__(
+        self,
+        user_query: str,
+        response: str,
+        timestamp: datetime,
+        sources_used: List[str],
+        relevance_scores: Dict[str, float],
+        token_usage: Dict[str, int] = None
+    ):
+        self.user_query = user_query
+        self.response = response
+        self.timestamp = timestamp
+        self.sources_used = sources_used
+        self.relevance_scores = relevance_scores
+        self.token_usage = token_usage or {}
+
+    def __repr__(self) -> str:
+        return f"ConversationContext(user_query={self.user_query[:40]!r}, timestamp={self.timestamp.isoformat()})"
+
+
+class HistorySpillStore:
+    """SQLite table of exchanges evicted from session histories."""
+
+    def __init__(self, path: str):
+        """Open (or create) the spill file."""
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS exchanges ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, user_query TEXT NOT NULL, '
+            'response TEXT NOT NULL, timestamp TEXT NOT NULL, sources_used TEXT, relevance_scores TEXT, '
+            'token_usage TEXT)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS exchanges_session ON exchanges (session_id, id)')
+        self._db.commit()
+
+    def write(self, session_id: str, ctx: ConversationContext):
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO exchanges (session_id, user_query, response, timestamp, sources_used, '
+                'relevance_scores, token_usage) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (session_id, ctx.user_query, ctx.response, ctx.timestamp.isoformat(), json.dumps(list(ctx.sources_used)),
+                 json.dumps(ctx.relevance_scores), json.dumps(ctx.token_usage))
+            )
+            self._db.commit()
+
+    def read(self, session_id: str) -> List[ConversationContext]:
+        """Spilled exchanges of a session, oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT user_query, response, timestamp, sources_used, relevance_scores, token_usage '
+                'FROM exchanges WHERE session_id = ? ORDER BY id', (session_id,)
+            ).fetchall()
+        return [
+            ConversationContext(query, response, datetime.fromisoformat(timestamp), json.loads(sources),
+                                json.loads(scores), json.loads(usage))
+            for query, response, timestamp, sources, scores, usage in rows
+        ]
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._db.execute('DELETE FROM exchanges WHERE session_id = ?', (session_id,))
+            self._db.commit()
+
+
+_spill_stores: Dict[str, HistorySpillStore] = {}
+_spill_stores_lock = threading.Lock()
+
+
+def get_spill_store(path: str) -> HistorySpillStore:
+    """Spill store shared by every session history writing to the same file."""
+    store = _spill_stores.get(path)
+    if store is None:
+        with _spill_stores_lock:
+            store = _spill_stores.get(path)
+            if store is None:
+                store = HistorySpillStore(path)
+                _spill_stores[path] = store
+    return store
+
+
+class ConversationHistory:
+    """Ring buffer of recent exchanges with running totals; supports len, indexing, slicing and iteration."""
+
+    def __init__(self, max_entries: int = None, spill_path: str = None, session_id: str = None):
+        """
+        Create an empty history; with a spill path, evicted exchanges are written to SQLite.
+        The spill file may be shared by several processes, so the session id must be unique to
+        this conversation; a random one is used when none is given.
+        """
+        self.max_entries = int(max_entries or os.getenv('HISTORY_MAX_ENTRIES', 100))
+        self.session_id = session_id or uuid.uuid4().hex
+        spill_path = spill_path or os.getenv('HISTORY_SPILL_PATH')
+        self._spill = get_spill_store(spill_path) if spill_path else None
+        self._recent: deque = deque(maxlen=self.max_entries)
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.total_exchanges = 0
+        self.spilled = 0
+        self.source_counts: Counter = Counter()
+        self.token_totals: Counter = Counter()
+
+    def append(self, ctx: ConversationContext):
+        """Add an exchange, evicting (or spilling) the oldest one when full."""
+        if len(self._recent) == self.max_entries:
+            evicted = self._recent[0]
+            if self._spill is not None:
+                try:
+                    self._spill.write(self.session_id, evicted)
+                    self.spilled += 1
+                except sqlite3.Error as e:
+                    logger.error(f"Error spilling conversation history: {e}")
+        self._recent.append(ctx)
+
+        self.total_exchanges += 1
+        self.source_counts.update(ctx.sources_used)
+        self.token_totals.update(ctx.token_usage)
+
+    def clear(self):
+        """Forget every exchange, including spilled ones."""
+        self._recent.clear()
+        if self._spill is not None:
+            try:
+                self._spill.delete(self.session_id)
+            except sqlite3.Error as e:
+                logger.error(f"Error deleting spilled conversation history: {e}")
+        self._reset_counters()
+
+    def iter_all(self) -> Iterator[ConversationContext]:
+        """Every exchange of the session, spilled ones first."""
+        if self._spill is not None:
+            yield from self._spill.read(self.session_id)
+        yield from self._recent
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Totals over the whole session, including evicted exchanges."""
+        return {
+            'total_exchanges': self.total_exchanges,
+            'in_memory': len(self._recent),
+            'spilled': self.spilled,
+            'sources_used': dict(self.source_counts),
+            'token_usage': dict(self.token_totals)
+        }
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def __bool__(self) -> bool:
+        return bool(self._recent)
+
+    def __iter__(self) -> Iterator[ConversationContext]:
+        return iter(self._recent)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[ConversationContext, List[ConversationContext]]:
+        if isinstance(index, slice):
+            return list(self._recent)[index]
+        return self._recent[index]
+
+    def __repr__(self) -> str:
+        return f"ConversationHistory({len(self._recent)} of {self.total_exchanges} exchanges in memory)"
@@ -0,0 +1,98 @@
+"""
+CPU embedding backends for SentenceTransformer models.
+Loads the configured EMBEDDING_MODEL with PyTorch, ONNX Runtime, or int8 dynamic
+quantization, with a tunable thread count and encode batch size.
+"""
+
+import os
+import logging
+from typing import Any, Dict
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ('torch', 'onnx', 'int8')
+DEFAULT_EMBEDDING_BATCH_SIZE = 32
+
+
+def get_embedding_backend() -> str:
+    """Configured embedding backend (EMBEDDING_BACKEND, default torch)."""
+    backend = os.getenv('EMBEDDING_BACKEND', 'torch').lower()
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}. Choose one of {', '.join(EMBEDDING_BACKENDS)}")
+    return backend
+
+
+def get_embedding_threads() -> int:
+    """Configured inference thread count (EMBEDDING_THREADS, 0 = library default)."""
+    return int(os.getenv('EMBEDDING_THREADS', 0))
+
+
+def get_embedding_batch_size() -> int:
+    """Configured encode batch size (EMBEDDING_BATCH_SIZE)."""
+    return int(os.getenv('EMBEDDING_BATCH_SIZE', DEFAULT_EMBEDDING_BATCH_SIZE))
+
+
+def _onnx_model_kwargs(threads: int) -> Dict[str, Any]:
+    """ONNX Runtime session settings for CPU inference."""
+    import onnxruntime as ort
+
+    session_options = ort.SessionOptions()
+    session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads:
+        session_options.intra_op_num_threads = threads
+        session_options.inter_op_num_threads = 1
+
+    model_kwargs = {'provider': 'CPUExecutionProvider', 'session_options': session_options}
+
+    # e.g. onnx/model_qint8_avx512_vnni.onnx for a pre-quantized ONNX export
+    onnx_file = os.getenv('EMBEDDING_ONNX_FILE')
+    if onnx_file:
+        model_kwargs['file_name'] = onnx_file
+    return model_kwargs
+
+
+def load_embedding_model(model_name: str, backend: str = None, threads: int = None) -> Any:
+    """
+    Load a SentenceTransformer on the requested backend.
+    Falls back to the PyTorch backend if the optional runtime is not installed.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    backend = backend or get_embedding_backend()
+    threads = get_embedding_threads() if threads is None else threads
+
+    if threads:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+
+    logger.info(f"Loading embedding model: {model_name} (backend: {backend}, threads: {threads or 'default'})")
+
+    if backend == 'onnx':
+        try:
+            return SentenceTransformer(model_name, backend='onnx', model_kwargs=_onnx_model_kwargs(threads))
+        except Exception as e:
+            logger.error(f"Could not load ONNX backend for {model_name}, falling back to torch: {e}")
+            return SentenceTransformer(model_name)
+
+    model = SentenceTransformer(model_name)
+
+    if backend == 'int8':
+        try:
+            import torch
+
+            # Dynamic quantization: int8 weights for every Linear layer, activations quantized per batch
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        except Exception as e:
+            logger.error(f"Could not quantize {model_name}, using float32 weights: {e}")
+
+    return model
@@ -0,0 +1,257 @@
+"""
+Process-wide cache of parsed RSS feeds.
+Entries are served from memory while fresh; once past their TTL they are still
+served (stale-while-revalidate) while a background thread re-downloads the feed
+with a conditional GET. Only a cold or very stale feed makes a caller wait.
+"""
+
+import os
+import time
+import itertools
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+
+import feedparser
+from dotenv import load_dotenv
+
+from http_client import get_http_session, get_timeouts
+from tracing import span
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Feed downloads are I/O bound; one small pool serves every cache user
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='feed-refresh')
+
+# Process-wide so versions from different caches never collide
+_versions = itertools.count(1)
+
+
+@dataclass
+class CachedFeed:
+    """Parsed entries of one feed plus the validators for conditional requests."""
+    entries: List[Any]
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    retry_after: float = 0.0
+    version: int = 0
+    size: int = 0
+
+
+class FeedCache:
+    """TTL cache of parsed feeds with stale-while-revalidate background refresh."""
+
+    def __init__(self, ttl_seconds: float = None, max_stale_seconds: float = None, session=None):
+        """Initialize an empty cache."""
+        self.ttl_seconds = float(ttl_seconds if ttl_seconds is not None else os.getenv('FEED_CACHE_TTL', 900))
+        self.max_stale_seconds = float(
+            max_stale_seconds if max_stale_seconds is not None else os.getenv('FEED_CACHE_MAX_STALE', 86400)
+        )
+        self.retry_seconds = 60.0
+        self.session = session or get_http_session()
+
+        self._lock = threading.Lock()
+        self._feeds: Dict[str, CachedFeed] = {}
+        self._inflight: Dict[str, Future] = {}
+        # Feeds that could not be downloaded at all, and when to try them again
+        self._failed_until: Dict[str, float] = {}
+
+        self.stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'not_modified': 0,
+            'refresh_errors': 0
+        }
+
+    def _refresh(self, url: str) -> List[Any]:
+        """Download and parse a feed, reusing the cached entries on 304 Not Modified."""
+        cached = self._feeds.get(url)
+        try:
+            headers = {}
+            if cached is not None and cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached is not None and cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+
+            response = self.session.get(url, headers=headers, timeout=get_timeouts())
+            if response.status_code == 304 and cached is not None:
+                cached.fetched_at = time.time()
+                self.stats['not_modified'] += 1
+                return cached.entries
+
+            response.raise_for_status()
+            entries = feedparser.parse(response.content).entries
+            self._feeds[url] = CachedFeed(
+                entries=entries,
+                fetched_at=time.time(),
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+                version=next(_versions),
+                size=len(response.content)
+            )
+            self._failed_until.pop(url, None)
+            self.stats['refreshes'] += 1
+            logger.info(f"Refreshed feed {url} ({len(entries)} entries)")
+            return entries
+
+        except Exception as e:
+            self.stats['refresh_errors'] += 1
+            logger.error(f"Error refreshing feed {url}: {e}")
+            if cached is None:
+                self._failed_until[url] = time.time() + self.retry_seconds
+                raise
+            # Keep serving the old entries, but do not retry on every query
+            cached.retry_after = time.time() + self.retry_seconds
+            return cached.entries
+
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+
+    def _schedule(self, url: str) -> Future:
+        """Start a refresh unless one is already running for this feed."""
+        with self._lock:
+            future = self._inflight.get(url)
+            if future is None:
+                future = _refresh_executor.submit(self._refresh, url)
+                self._inflight[url] = future
+            return future
+
+    def get_cached(self, url: str) -> Optional[List[Any]]:
+        """Entries servable without waiting, scheduling a refresh if stale; None on a miss."""
+        cached = self._feeds.get(url)
+        if cached is None:
+            return None
+
+        now = time.time()
+        age = now - cached.fetched_at
+        if age <= self.ttl_seconds:
+            self.stats['hits'] += 1
+            return cached.entries
+        if age <= self.max_stale_seconds:
+            self.stats['stale_hits'] += 1
+            if now >= cached.retry_after:
+                self._schedule(url)
+            return cached.entries
+        return None
+
+    def _start_miss(self, url: str) -> Optional[Future]:
+        """Download a feed that is not servable from memory, unless it recently failed."""
+        self.stats['misses'] += 1
+        if self._failed_until.get(url, 0.0) > time.time():
+            return None
+        return self._schedule(url)
+
+    def get(self, url: str, timeout: float = None) -> List[Any]:
+        """Entries of one feed, downloading it first only on a miss."""
+        return self.get_many([url], timeout).get(url, [])
+
+    def get_many(self, urls: List[str], timeout: float = None) -> Dict[str, List[Any]]:
+        """Entries of several feeds; misses are downloaded concurrently within the timeout."""
+        with span('feed_fetch', feeds=len(urls)) as fetch_span:
+            feeds, pending = {}, {}
+            for url in urls:
+                entries = self.get_cached(url)
+                if entries is not None:
+                    feeds[url] = entries
+                else:
+                    future = self._start_miss(url)
+                    if future is not None:
+                        pending[url] = future
+
+            if pending:
+                done, _ = wait(pending.values(), timeout=timeout or sum(get_timeouts()))
+                feeds.update(self._collect(pending, done))
+            self._annotate(fetch_span, urls, feeds, pending)
+            return feeds
+
+    async def get_many_async(self, urls: List[str], timeout: float = None) -> Dict[str, List[Any]]:
+        """Async variant of get_many that never blocks the event loop."""
+        with span('feed_fetch', feeds=len(urls)) as fetch_span:
+            feeds, pending = {}, {}
+            for url in urls:
+                entries = self.get_cached(url)
+                if entries is not None:
+                    feeds[url] = entries
+                else:
+                    future = self._start_miss(url)
+                    if future is not None:
+                        pending[url] = asyncio.wrap_future(future)
+
+            if pending:
+                done, _ = await asyncio.wait(pending.values(), timeout=timeout or sum(get_timeouts()))
+                feeds.update(self._collect(pending, done))
+            self._annotate(fetch_span, urls, feeds, pending)
+            return feeds
+
+    def _annotate(self, fetch_span, urls: List[str], feeds: Dict[str, List[Any]], pending: Dict[str, Any]):
+        """Record cache hits and downloaded bytes on a feed_fetch span."""
+        downloaded = [url for url in pending if url in feeds]
+        fetch_span.set(
+            cache_hit=not pending,
+            cache_hits=len(urls) - len(pending),
+            downloads=len(downloaded),
+            bytes=sum(self._feeds[url].size for url in downloaded if url in self._feeds),
+            entries=sum(len(entries) for entries in feeds.values())
+        )
+
+    @staticmethod
+    def _collect(pending: Dict[str, Any], done) -> Dict[str, List[Any]]:
+        """Results of finished refreshes; failures and timeouts are logged and left out."""
+        feeds = {}
+        for url, future in pending.items():
+            if future not in done:
+                logger.warning(f"Timed out waiting for feed {url}")
+            elif future.exception() is None:
+                feeds[url] = future.result()
+        return feeds
+
+    def get_version(self, url: str) -> int:
+        """Changes whenever new entries are downloaded for the feed; 0 if not cached."""
+        cached = self._feeds.get(url)
+        return cached.version if cached is not None else 0
+
+    def prefetch(self, urls: List[str]):
+        """Start background downloads so the first query finds the feeds in memory."""
+        for url in urls:
+            if url not in self._feeds:
+                self._schedule(url)
+
+    def clear(self):
+        """Drop all cached feeds."""
+        with self._lock:
+            self._feeds.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit counters and per-feed ages."""
+        now = time.time()
+        return {
+            **self.stats,
+            'feeds': {url: {'entries': len(cached.entries), 'age_seconds': round(now - cached.fetched_at, 1)}
+                      for url, cached in list(self._feeds.items())}
+        }
+
+
+_feed_cache: Optional[FeedCache] = None
+_feed_cache_lock = threading.Lock()
+
+
+def get_feed_cache() -> FeedCache:
+    """Feed cache shared by every blog search tool in the process."""
+    global _feed_cache
+    if _feed_cache is None:
+        with _feed_cache_lock:
+            if _feed_cache is None:
+                _feed_cache = FeedCache()
+    return _feed_cache
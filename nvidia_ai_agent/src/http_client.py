@@ -0,0 +1,120 @@
+"""
+Shared, pooled HTTP clients for blog feeds and article pages.
+One requests.Session with a bounded connection pool and retries serves every
+synchronous caller in the process; asyncio callers get one aiohttp session per
+event loop. Both apply the same connect and read timeouts.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Dict, Tuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127 Safari/537.36'
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_async_sessions: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_timeouts() -> Tuple[float, float]:
+    """(connect, read) timeouts in seconds from HTTP_CONNECT_TIMEOUT and SEARCH_TIMEOUT."""
+    return float(os.getenv('HTTP_CONNECT_TIMEOUT', 5)), float(os.getenv('SEARCH_TIMEOUT', 30))
+
+
+def get_pool_size() -> int:
+    """Maximum pooled connections per host (HTTP_POOL_SIZE)."""
+    return int(os.getenv('HTTP_POOL_SIZE', 10))
+
+
+def get_max_concurrency() -> int:
+    """Maximum simultaneous requests per event loop (HTTP_MAX_CONCURRENCY)."""
+    return int(os.getenv('HTTP_MAX_CONCURRENCY', 8))
+
+
+def async_available() -> bool:
+    """Whether aiohttp is installed for the async code paths."""
+    return aiohttp is not None
+
+
+def get_http_session() -> requests.Session:
+    """Process-wide requests session with keep-alive pooling and retries on transient errors."""
+    global _session
+    if _session is not None:
+        return _session
+
+    with _lock:
+        if _session is None:
+            retry = Retry(
+                total=2,
+                backoff_factor=0.3,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(['GET', 'HEAD'])
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=get_pool_size(), max_retries=retry)
+
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update({'User-Agent': USER_AGENT})
+            _session = session
+    return _session
+
+
+def get_async_session():
+    """aiohttp session shared by all coroutines on the running event loop, or None without aiohttp."""
+    if aiohttp is None:
+        return None
+
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        connect, read = get_timeouts()
+        # The connector caps concurrent requests; excess requests wait for a pooled connection
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=get_max_concurrency(), limit_per_host=get_pool_size()),
+            timeout=aiohttp.ClientTimeout(connect=connect, sock_read=read, total=connect + read),
+            headers={'User-Agent': USER_AGENT}
+        )
+        _async_sessions[loop] = session
+    return session
+
+
+async def fetch_async(url: str, headers: Dict[str, str] = None) -> Tuple[int, Dict[str, str], bytes]:
+    """GET a URL on the loop's shared aiohttp session; returns (status, headers, body)."""
+    session = get_async_session()
+    if session is None:
+        raise RuntimeError("aiohttp is not installed")
+
+    async with session.get(url, headers=headers) as response:
+        if response.status == 304:
+            return response.status, dict(response.headers), b''
+        response.raise_for_status()
+        return response.status, dict(response.headers), await response.read()
+
+
+async def close_async_session():
+    """Close the running loop's aiohttp session, e.g. on application shutdown."""
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
@@ -7,15 +7,31 @@ import os
 import re
 import logging
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable
 from dataclasses import dataclass
 
-import chromadb
-from chromadb.config import Settings
+import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer
 from dotenv import load_dotenv
 
+from chunking import TokenChunker
+from lexical_index import BM25Index, reciprocal_rank_fusion, RRF_K
+from reranker import CrossEncoderReranker
+from semantic_cache import SemanticCache
+from tracing import annotate
+from partitions import PartitionIndex, SearchFilters, parse_date, SOURCE_TRANSCRIPT, SOURCE_WEB_ARTICLE
+from embeddings import get_embedding_batch_size
+from vector_index import normalize_rows
+from model_registry import (
+    get_embedding_model, get_chroma_client, get_vector_index, is_loaded,
+    DEFAULT_EMBEDDING_MODEL
+)
+
+try:
+    import chromadb
+except ImportError:  # Only needed for the default 'chroma' vector backend
+    chromadb = None
+
 # Load environment variables
 load_dotenv()
 
@@ -23,6 +39,12 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Hybrid search fuses this many candidates per requested result from each retriever
+HYBRID_CANDIDATE_MULTIPLIER = 4
+
+# Chunks per ChromaDB add call
+STORE_BATCH_SIZE = 1000
+
 
 @dataclass
 class TranscriptDocument:
@@ -38,33 +60,131 @@ class TranscriptDocument:
 class KnowledgeBaseProcessor:
     """Processes NVIDIA course transcripts and creates a searchable knowledge base."""
     
-    def __init__(self, persist_directory: str = None):
-        """Initialize the knowledge base processor."""
+    def __init__(
+        self,
+        persist_directory: str = None,
+        vector_backend: str = None,
+        chunker: TokenChunker = None
+    ):
+        """Initialize the knowledge base processor, optionally with a custom chunker."""
+        self.vector_backend = (vector_backend or os.getenv('VECTOR_BACKEND', 'chroma')).lower()
+        default_directory = './data/vector_index' if self.vector_backend == 'mmap' else './data/chromadb'
         self.persist_directory = persist_directory or os.getenv(
-            'CHROMADB_PERSIST_DIRECTORY', 
-            './data/chromadb'
+            'VECTOR_INDEX_DIRECTORY' if self.vector_backend == 'mmap' else 'CHROMADB_PERSIST_DIRECTORY',
+            default_directory
         )
-        self.embedding_model_name = os.getenv(
-            'EMBEDDING_MODEL', 
-            'sentence-transformers/all-MiniLM-L6-v2'
+        self.embedding_model_name = os.getenv('EMBEDDING_MODEL', DEFAULT_EMBEDDING_MODEL)
+        self.embedding_batch_size = get_embedding_batch_size()
+        
+        # Embedding model, vector store and lexical index are opened on first use;
+        # the model and clients come from the process-wide registry and are shared
+        self._chunker = chunker
+        self._collection = None
+        self._lexical_index = None
+        self._partitions = None
+        self.lexical_index_path = os.getenv(
+            'LEXICAL_INDEX_PATH',
+            os.path.join(self.persist_directory, 'lexical_index.npz')
         )
         
-        # Initialize embedding model
-        logger.info(f"Loading embedding model: {self.embedding_model_name}")
-        self.embedding_model = SentenceTransformer(self.embedding_model_name)
+        # BM25 index over the same chunks, fused with vector results for hybrid search
+        self.hybrid_search = os.getenv('HYBRID_SEARCH', 'true').lower() == 'true'
         
-        # Initialize ChromaDB
-        self.chroma_client = chromadb.PersistentClient(
-            path=self.persist_directory,
-            settings=Settings(anonymized_telemetry=False)
+        # Optional cross-encoder rerank of the top RERANK_CANDIDATES results
+        self.rerank = os.getenv('RERANK_ENABLED', 'false').lower() == 'true'
+        self.rerank_candidates = int(os.getenv('RERANK_CANDIDATES', 20))
+        self._reranker = None
+        
+        # Paraphrased queries reuse recent results until the collection changes
+        self._generation = 0
+        self.semantic_cache = (
+            SemanticCache() if os.getenv('SEMANTIC_CACHE_ENABLED', 'true').lower() == 'true' else None
         )
         
-        # Create or get collection
-        self.collection = self.chroma_client.get_or_create_collection(
+        # Called after every ingest, e.g. to drop answers cached by the agent
+        self._ingest_listeners: List[Callable[[], None]] = []
+    
+    @property
+    def embedding_model(self):
+        """Shared embedding model, loaded on first access."""
+        return get_embedding_model(self.embedding_model_name)
+    
+    @property
+    def chunker(self) -> TokenChunker:
+        """Chunker sized to the embedding model's own token window."""
+        if self._chunker is None:
+            self._chunker = TokenChunker.from_sentence_transformer(self.embedding_model)
+        return self._chunker
+    
+    @property
+    def collection(self):
+        """Vector store for the configured backend, opened on first access."""
+        if self._collection is None:
+            self._collection = self._create_collection()
+        return self._collection
+    
+    @property
+    def lexical_index(self) -> BM25Index:
+        """BM25 index, loaded and reconciled with the vector store on first access."""
+        if self._lexical_index is None:
+            self._lexical_index = BM25Index(self.lexical_index_path)
+            self._sync_lexical_index()
+        return self._lexical_index
+    
+    @property
+    def reranker(self) -> CrossEncoderReranker:
+        """Cross-encoder reranker, created on first use."""
+        if self._reranker is None:
+            self._reranker = CrossEncoderReranker()
+        return self._reranker
+    
+    @property
+    def partitions(self) -> PartitionIndex:
+        """Course, lesson, source type and date partitions over all stored chunks."""
+        if self.vector_backend == 'mmap':
+            # The memory-mapped index keeps row-level partitions itself
+            return self.collection.partitions
+        
+        if self._partitions is None:
+            stored = self.collection.get(include=["metadatas"])
+            self._partitions = PartitionIndex()
+            self._partitions.add(stored['ids'], stored['metadatas'])
+        return self._partitions
+    
+    def _create_collection(self):
+        """Create the vector store for the configured backend."""
+        if self.vector_backend == 'mmap':
+            # Flat memory-mapped matrix; same add/query/count interface as a Chroma collection
+            return get_vector_index(self.persist_directory, name="nvidia_transcripts")
+        
+        if self.vector_backend != 'chroma':
+            raise ValueError(f"Unknown vector backend: {self.vector_backend}")
+        
+        if chromadb is None:
+            raise ImportError("chromadb is required for the 'chroma' vector backend. "
+                              "Install it or set VECTOR_BACKEND=mmap.")
+        
+        # Create or get collection on the shared client; cosine distances match the mmap backend
+        return get_chroma_client(self.persist_directory).get_or_create_collection(
             name="nvidia_transcripts",
-            metadata={"description": "NVIDIA course transcripts for RAG"}
+            metadata={"description": "NVIDIA course transcripts for RAG", "hnsw:space": "cosine"}
         )
     
+    def _sync_lexical_index(self):
+        """Rebuild the lexical index from the vector store if they have drifted apart."""
+        try:
+            count = self.collection.count()
+            if count == len(self._lexical_index):
+                return
+            
+            logger.info(f"Rebuilding lexical index from {count} stored chunks")
+            stored = self.collection.get(include=["documents"])
+            self._lexical_index = BM25Index()
+            self._lexical_index.add(stored['ids'], stored['documents'])
+            self._lexical_index.save(self.lexical_index_path)
+        except Exception as e:
+            logger.error(f"Error rebuilding lexical index: {e}")
+    
     def parse_transcript_file(self, file_path: str) -> TranscriptDocument:
         """Parse a single transcript file."""
         try:
@@ -106,31 +226,17 @@ class KnowledgeBaseProcessor:
             logger.error(f"Error parsing {file_path}: {e}")
             return None
     
-    def chunk_content(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
-        """Split text into overlapping chunks for better retrieval."""
-        if len(text) <= chunk_size:
-            return [text]
+    def chunk_content(self, text: str, chunk_size: int = None, overlap: int = None) -> List[str]:
+        """Split text into overlapping, sentence-aligned chunks sized in model tokens."""
+        if chunk_size is None and overlap is None:
+            return self.chunker.chunk_text(text)
         
-        chunks = []
-        start = 0
-        
-        while start < len(text):
-            end = start + chunk_size
-            
-            # Try to end at a sentence boundary
-            if end < len(text):
-                # Look for sentence endings within the last 100 characters
-                sentence_end = text.rfind('.', start + chunk_size - 100, end)
-                if sentence_end != -1:
-                    end = sentence_end + 1
-            
-            chunks.append(text[start:end].strip())
-            start = end - overlap
-            
-            if start >= len(text):
-                break
-        
-        return chunks
+        chunker = TokenChunker(
+            tokenizer=self.chunker.tokenizer,
+            max_tokens=chunk_size or self.chunker.max_tokens,
+            overlap_tokens=overlap
+        )
+        return chunker.chunk_text(text)
     
     def process_all_transcripts(self, base_path: str = ".") -> List[TranscriptDocument]:
         """Process all transcript files in the repository."""
@@ -160,14 +266,14 @@ class KnowledgeBaseProcessor:
         all_metadatas = []
         all_ids = []
         
-        for doc in documents:
-            # Split content into chunks
-            chunks = self.chunk_content(doc.content)
-            
+        # Tokenize all documents in one batch and split into chunks
+        chunked_documents = self.chunker.chunk_many([doc.content for doc in documents])
+        
+        for doc, chunks in zip(documents, chunked_documents):
             for i, chunk in enumerate(chunks):
                 chunk_id = f"{doc.course_name}_{doc.lesson_title}_{i}".replace(" ", "_").replace("/", "_")
                 
-                all_chunks.append(chunk)
+                all_chunks.append(chunk.text)
                 all_ids.append(chunk_id)
                 all_metadatas.append({
                     "course_name": doc.course_name,
@@ -175,53 +281,260 @@ class KnowledgeBaseProcessor:
                     "video_url": doc.video_url,
                     "file_path": doc.file_path,
                     "chunk_index": i,
-                    "total_chunks": len(chunks)
+                    "total_chunks": len(chunks),
+                    "token_count": chunk.token_count,
+                    "source_type": SOURCE_TRANSCRIPT,
+                    "published_date": 0
                 })
         
         logger.info(f"Adding {len(all_chunks)} chunks to knowledge base...")
+        self._add_chunks(all_ids, all_chunks, all_metadatas)
+        logger.info("Knowledge base creation complete!")
+    
+    def add_web_content(self, title: str, content: str, source_url: str, metadata: Dict[str, Any] = None):
+        """Add a web article (e.g. a blog post) to the knowledge base."""
+        metadata = metadata or {}
+        source = metadata.get('source', 'NVIDIA Blog')
+        chunks = self.chunker.chunk(content)
+        doc_id = re.sub(r'[^A-Za-z0-9]+', '_', source_url).strip('_')
         
-        # Add to ChromaDB in batches
-        batch_size = 100
-        for i in range(0, len(all_chunks), batch_size):
-            batch_chunks = all_chunks[i:i + batch_size]
-            batch_ids = all_ids[i:i + batch_size]
-            batch_metadatas = all_metadatas[i:i + batch_size]
-            
-            # Generate embeddings
-            embeddings = self.embedding_model.encode(batch_chunks).tolist()
-            
-            # Add to collection
+        ids = [f"web_{doc_id}_{i}" for i in range(len(chunks))]
+        metadatas = [{
+            "course_name": source,
+            "lesson_title": title,
+            "video_url": source_url,
+            "file_path": "",
+            "chunk_index": i,
+            "total_chunks": len(chunks),
+            "token_count": chunk.token_count,
+            "source_type": SOURCE_WEB_ARTICLE,
+            "published_date": parse_date(metadata.get('published_date'))
+        } for i, chunk in enumerate(chunks)]
+        
+        self._add_chunks(ids, [chunk.text for chunk in chunks], metadatas)
+        
+        # A re-ingested article that now has fewer chunks leaves its old tail behind otherwise
+        prefix = f"web_{doc_id}_"
+        stale = [
+            chunk_id for chunk_id in self.partitions.ids
+            if chunk_id.startswith(prefix) and chunk_id[len(prefix):].isdigit()
+            and int(chunk_id[len(prefix):]) >= len(chunks)
+        ]
+        self.delete_chunks(stale)
+        logger.info(f"Added web content: {title} ({len(chunks)} chunks)")
+    
+    def _add_chunks(self, all_ids: List[str], all_chunks: List[str], all_metadatas: List[Dict[str, Any]]):
+        """Embed chunks and store them."""
+        if not all_ids:
+            return
+        embeddings = self.embedding_model.encode(all_chunks, batch_size=self.embedding_batch_size)
+        self.add_embedded_chunks(all_ids, all_chunks, all_metadatas, embeddings)
+    
+    def add_embedded_chunks(
+        self,
+        all_ids: List[str],
+        all_chunks: List[str],
+        all_metadatas: List[Dict[str, Any]],
+        embeddings: Any
+    ):
+        """Store chunks with precomputed embeddings, then update the lexical index and partitions."""
+        if not all_ids:
+            return
+        
+        # Load (and reconcile) the lexical index before the store changes underneath it
+        lexical_index = self.lexical_index
+        
+        self._generation += 1
+        if self.semantic_cache is not None:
+            self.semantic_cache.invalidate()
+        
+        for i in range(0, len(all_ids), STORE_BATCH_SIZE):
             self.collection.add(
-                documents=batch_chunks,
-                embeddings=embeddings,
-                metadatas=batch_metadatas,
-                ids=batch_ids
+                documents=all_chunks[i:i + STORE_BATCH_SIZE],
+                embeddings=np.asarray(embeddings[i:i + STORE_BATCH_SIZE], dtype=np.float32).tolist(),
+                metadatas=all_metadatas[i:i + STORE_BATCH_SIZE],
+                ids=all_ids[i:i + STORE_BATCH_SIZE]
             )
         
-        logger.info("Knowledge base creation complete!")
+        # Update the lexical index incrementally with the new chunks
+        lexical_index.add(all_ids, all_chunks)
+        lexical_index.save(self.lexical_index_path)
+        
+        if self._partitions is not None:
+            self._partitions.add(all_ids, all_metadatas)
+        
+        for listener in self._ingest_listeners:
+            listener()
+    
+    def delete_chunks(self, chunk_ids: List[str]):
+        """Remove chunks from the vector store, the lexical index and the partitions."""
+        if not chunk_ids:
+            return
+        
+        lexical_index = self.lexical_index
+        
+        self._generation += 1
+        if self.semantic_cache is not None:
+            self.semantic_cache.invalidate()
+        
+        self.collection.delete(ids=chunk_ids)
+        lexical_index.delete(chunk_ids)
+        lexical_index.save(self.lexical_index_path)
+        # Rebuilt from the store on next use
+        self._partitions = None
+        
+        for listener in self._ingest_listeners:
+            listener()
+        logger.info(f"Deleted {len(chunk_ids)} chunks")
     
-    def search_knowledge_base(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
-        """Search the knowledge base for relevant information."""
+    def add_ingest_listener(self, listener: Callable[[], None]):
+        """Register a callback to run whenever new chunks are stored."""
+        self._ingest_listeners.append(listener)
+    
+    def search_knowledge_base(
+        self,
+        query: str,
+        n_results: int = 5,
+        hybrid: bool = None,
+        course: str = None,
+        lesson: str = None,
+        source_type: str = None,
+        published_after: Any = None,
+        published_before: Any = None,
+        rerank: bool = None,
+        query_embedding: Any = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search the knowledge base, fusing vector and BM25 rankings when hybrid is on.
+        Optional filters scope the search to a course, lesson, source type
+        ('transcript' or 'web_article') and inclusive publication date range.
+        With rerank, the top candidates are rescored by a cross-encoder within its time budget.
+        A query embedding from embed_query can be passed to avoid encoding the query again.
+        """
+        rerank = self.rerank if rerank is None else rerank
+        hybrid = self.hybrid_search if hybrid is None else hybrid
+        filters = SearchFilters(course, lesson, source_type, published_after, published_before)
+        
+        # Serve paraphrases of recent queries from the semantic cache
+        cache_params = (n_results, hybrid, rerank, repr(filters))
+        version = None
+        if self.semantic_cache is not None:
+            try:
+                version = self._collection_version()
+                cached = self.semantic_cache.get_exact(query, cache_params, version)
+                if cached is not None:
+                    annotate(cache_hit=True)
+                    return cached
+                
+                if query_embedding is None:
+                    query_embedding = self.embed_query(query)
+                cached = self.semantic_cache.get(query_embedding, cache_params, version)
+                if cached is not None:
+                    annotate(cache_hit=True)
+                    return cached
+            except Exception as e:
+                logger.error(f"Error reading semantic cache: {e}")
+                version = None
+        
+        if rerank:
+            candidates = self._search(query, max(n_results, self.rerank_candidates), hybrid, filters, query_embedding)
+            results = self.reranker.rerank(query, candidates, n_results)
+        else:
+            results = self._search(query, n_results, hybrid, filters, query_embedding)
+        
+        if version is not None and results:
+            self.semantic_cache.put(query, query_embedding, cache_params, results, version)
+        return results
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embedding of a search query with the model used at ingest time."""
+        return self.embedding_model.encode([query])[0]
+    
+    def _collection_version(self) -> tuple:
+        """Changes whenever chunks are added, here or by another process sharing the store."""
+        return self._generation, self.collection.count()
+    
+    def _search(
+        self,
+        query: str,
+        n_results: int,
+        hybrid: bool,
+        filters: SearchFilters,
+        query_embedding: Any = None
+    ) -> List[Dict[str, Any]]:
+        """Retrieve and fuse results for one query."""
         try:
+            n_candidates = n_results * HYBRID_CANDIDATE_MULTIPLIER if hybrid else n_results
+            
+            allowed_ids = None
+            filter_kwargs = {}
+            if not filters.is_empty():
+                allowed_ids = self.partitions.ids_for(filters)
+                if not allowed_ids:
+                    return []
+                n_candidates = min(n_candidates, len(allowed_ids))
+                # Scoped inside the store: partition rows for mmap, a where clause for Chroma
+                if self.vector_backend == 'mmap':
+                    filter_kwargs['filters'] = filters
+                else:
+                    filter_kwargs['where'] = filters.to_where()
+            
+            # Embed with the same model used at ingest time, whichever backend is active
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
+            
+            # Collections created before cosine became the default measure squared L2 distances,
+            # which are not similarities; score those from the stored embeddings instead
+            cosine_distances = self.vector_backend == 'mmap' or \
+                (self.collection.metadata or {}).get('hnsw:space') == 'cosine'
             results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results,
-                include=["documents", "metadatas", "distances"]
+                query_embeddings=[np.asarray(query_embedding, dtype=np.float32).tolist()],
+                n_results=n_candidates,
+                include=["documents", "metadatas", "distances"] + ([] if cosine_distances else ["embeddings"]),
+                **filter_kwargs
             )
+            if cosine_distances:
+                similarities = [1 - distance for distance in results['distances'][0]]
+            else:
+                query_vector = normalize_rows(query_embedding)[0]
+                similarities = (normalize_rows(results['embeddings'][0]) @ query_vector).tolist()
+            
+            # chunk id -> (document, metadata, vector similarity)
+            hits = {}
+            for i, chunk_id in enumerate(results['ids'][0]):
+                hits[chunk_id] = (results['documents'][0][i], results['metadatas'][0][i], similarities[i])
+            
+            if not hybrid:
+                return [
+                    self._format_search_result(chunk_id, *hits[chunk_id], relevance_score=hits[chunk_id][2])
+                    for chunk_id in results['ids'][0]
+                ]
+            
+            lexical_hits = self.lexical_index.search(query, n_candidates, allowed_ids=allowed_ids)
+            bm25_scores = dict(lexical_hits)
+            fused = reciprocal_rank_fusion([
+                results['ids'][0],
+                [chunk_id for chunk_id, _ in lexical_hits]
+            ])[:n_results]
             
+            # Fetch chunks that only the lexical retriever found
+            missing = [chunk_id for chunk_id, _ in fused if chunk_id not in hits]
+            if missing:
+                fetched = self.collection.get(ids=missing, include=["documents", "metadatas"])
+                for i, chunk_id in enumerate(fetched['ids']):
+                    hits[chunk_id] = (fetched['documents'][i], fetched['metadatas'][i], None)
+            
+            # Scale so a chunk ranked first by both retrievers scores 1.0
+            max_fused_score = 2.0 / (RRF_K + 1)
             formatted_results = []
-            for i, doc in enumerate(results['documents'][0]):
-                metadata = results['metadatas'][0][i]
-                distance = results['distances'][0][i]
-                
-                formatted_results.append({
-                    'content': doc,
-                    'course_name': metadata['course_name'],
-                    'lesson_title': metadata['lesson_title'],
-                    'video_url': metadata.get('video_url', ''),
-                    'relevance_score': 1 - distance,  # Convert distance to similarity
-                    'metadata': metadata
-                })
+            for chunk_id, fused_score in fused:
+                if chunk_id not in hits:
+                    continue
+                result = self._format_search_result(
+                    chunk_id, *hits[chunk_id], relevance_score=fused_score / max_fused_score
+                )
+                result['bm25_score'] = bm25_scores.get(chunk_id, 0.0)
+                formatted_results.append(result)
             
             return formatted_results
             
@@ -229,13 +542,41 @@ class KnowledgeBaseProcessor:
             logger.error(f"Error searching knowledge base: {e}")
             return []
     
+    def _format_search_result(
+        self,
+        chunk_id: str,
+        doc: str,
+        metadata: Dict[str, Any],
+        vector_score: float,
+        relevance_score: float
+    ) -> Dict[str, Any]:
+        """Format a stored chunk as a search result."""
+        return {
+            'chunk_id': chunk_id,
+            'content': doc,
+            'course_name': metadata['course_name'],
+            'lesson_title': metadata['lesson_title'],
+            'video_url': metadata.get('video_url', ''),
+            'source_type': metadata.get('source_type', SOURCE_TRANSCRIPT),
+            'relevance_score': relevance_score,
+            'vector_score': vector_score,
+            'metadata': metadata
+        }
+    
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the knowledge base collection."""
         try:
             count = self.collection.count()
             return {
                 'total_documents': count,
-                'collection_name': self.collection.name
+                'collection_name': self.collection.name,
+                'vector_backend': self.vector_backend,
+                'hybrid_search': self.hybrid_search,
+                'lexical_index_documents': len(self.lexical_index),
+                'embedding_model_loaded': is_loaded('embedding_model', self.embedding_model_name),
+                'rerank': self.rerank,
+                'reranker': self._reranker.get_stats() if self._reranker else {},
+                'semantic_cache': self.semantic_cache.get_stats() if self.semantic_cache else {}
             }
         except Exception as e:
             logger.error(f"Error getting collection stats: {e}")
@@ -0,0 +1,375 @@
+"""
+BM25 lexical index for the knowledge base and blog search.
+Keeps a compact CSR inverted index (term -> rows, term frequencies) saved as one
+.npz file, plus a delta segment for documents added or deleted since the last
+compaction. The delta is saved to a small file next to it, so an ingest writes only
+what changed; the two are merged once the delta outgrows LEXICAL_COMPACT_RATIO of
+the index.
+"""
+
+import os
+import re
+import json
+import uuid
+import logging
+from array import array
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional, Iterable
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LEXICAL_INDEX_FORMAT_VERSION = 1
+
+# Keep product names such as "TensorRT-LLM", "GenAI-Perf" or "3.0.0" as one token;
+# their parts are indexed too, so "tensorrt" alone still matches.
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.+/][a-z0-9]+)*")
+COMPOUND_SEPARATORS = re.compile(r"[-_.+/]")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in into is it its
+me my of on or our so that the their them then there these they this to was we were
+what when where which who why will with you your
+""".split())
+
+# Standard Okapi BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Constant used by reciprocal rank fusion (Cormack et al., 2009)
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case tokens, keeping compound terms and their parts, minus stopwords."""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if COMPOUND_SEPARATORS.search(token):
+            tokens.extend(part for part in COMPOUND_SEPARATORS.split(token) if part and part not in STOPWORDS)
+    return tokens
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Fuse several ranked id lists; returns (id, score) sorted by fused score."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def bm25_scores(query: str, texts: List[str]) -> np.ndarray:
+    """Score a small, transient list of texts against a query."""
+    index = BM25Index()
+    index.add([str(i) for i in range(len(texts))], texts)
+    scores = np.zeros(len(texts), dtype=np.float32)
+    for doc_id, score in index.search(query, len(texts)):
+        scores[int(doc_id)] = score
+    return scores
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index with incremental adds."""
+
+    def __init__(self, path: str = None):
+        """Create an empty index, loading it from path when the file exists."""
+        self.path = Path(path) if path else None
+        self.compact_ratio = float(os.getenv('LEXICAL_COMPACT_RATIO', 0.1))
+
+        self.doc_ids: List[str] = []
+        self._row: Dict[str, int] = {}
+        self._doc_lengths = array('I')
+        self._deleted = array('b')
+        self._total_length = 0
+
+        # Frozen postings in CSR layout
+        self._vocab: Dict[str, int] = {}
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._post_rows = np.zeros(0, dtype=np.uint32)
+        self._post_tfs = np.zeros(0, dtype=np.uint16)
+
+        # Postings for documents added since the last compaction
+        self._delta: Dict[str, Tuple[array, array]] = {}
+        self._base_rows = 0
+
+        # Identity of the saved CSR file the frozen postings match; deltas are only saved against it
+        self._base_id: Optional[str] = None
+        self._saved_base: Optional[tuple] = None
+
+        if self.path and self.path.exists():
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._row)
+
+    def add(self, doc_ids: List[str], texts: List[str]):
+        """Index documents; re-adding an id replaces the previous version."""
+        for doc_id, text in zip(doc_ids, texts):
+            old_row = self._row.get(doc_id)
+            if old_row is not None:
+                self._deleted[old_row] = 1
+                self._total_length -= self._doc_lengths[old_row]
+
+            row = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+            self._row[doc_id] = row
+
+            tokens = tokenize(text)
+            self._doc_lengths.append(len(tokens))
+            self._deleted.append(0)
+            self._total_length += len(tokens)
+
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for term, tf in counts.items():
+                rows, tfs = self._delta.setdefault(term, (array('I'), array('H')))
+                rows.append(row)
+                tfs.append(min(tf, 65535))
+
+    def delete(self, doc_ids: List[str]):
+        """Remove documents; their postings are dropped at the next compaction."""
+        for doc_id in doc_ids:
+            row = self._row.pop(doc_id, None)
+            if row is not None:
+                self._deleted[row] = 1
+                self._total_length -= self._doc_lengths[row]
+
+    def _postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """All (rows, tfs) for a term, frozen and delta combined."""
+        parts_rows = []
+        parts_tfs = []
+
+        term_id = self._vocab.get(term)
+        if term_id is not None:
+            start, end = self._indptr[term_id], self._indptr[term_id + 1]
+            parts_rows.append(self._post_rows[start:end])
+            parts_tfs.append(self._post_tfs[start:end])
+
+        delta = self._delta.get(term)
+        if delta is not None:
+            parts_rows.append(np.frombuffer(delta[0], dtype=np.uint32))
+            parts_tfs.append(np.frombuffer(delta[1], dtype=np.uint16))
+
+        if not parts_rows:
+            return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.uint16)
+        if len(parts_rows) == 1:
+            return parts_rows[0], parts_tfs[0]
+        return np.concatenate(parts_rows), np.concatenate(parts_tfs)
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        allowed_ids: Optional[set] = None
+    ) -> List[Tuple[str, float]]:
+        """Return up to k (doc_id, score) pairs with a positive BM25 score."""
+        n_docs = len(self._row)
+        if n_docs == 0 or k <= 0:
+            return []
+
+        doc_lengths = np.frombuffer(self._doc_lengths, dtype=np.uint32).astype(np.float32)
+        avg_length = max(self._total_length / n_docs, 1.0)
+        deleted = np.frombuffer(self._deleted, dtype=np.int8).astype(bool)
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+
+        for term in set(tokenize(query)):
+            rows, tfs = self._postings(term)
+            if len(rows) == 0:
+                continue
+            live = ~deleted[rows]
+            rows, tfs = rows[live], tfs[live].astype(np.float32)
+            df = len(rows)
+            if df == 0:
+                continue
+
+            idf = np.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc_lengths[rows] / avg_length)
+            scores[rows] += idf * tfs * (BM25_K1 + 1.0) / (tfs + norm)
+
+        if allowed_ids is not None:
+            mask = np.zeros(len(self.doc_ids), dtype=bool)
+            mask[[self._row[doc_id] for doc_id in allowed_ids if doc_id in self._row]] = True
+            scores[~mask] = 0.0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+        return [(self.doc_ids[row], float(scores[row])) for row in order]
+
+    def compact(self):
+        """Merge delta postings into the CSR arrays and drop deleted documents."""
+        deleted = np.frombuffer(self._deleted, dtype=np.int8).astype(bool)
+        new_row = np.cumsum(~deleted) - 1
+
+        terms = sorted(set(self._vocab) | set(self._delta))
+        vocab, indptr, all_rows, all_tfs = {}, [0], [], []
+        for term in terms:
+            rows, tfs = self._postings(term)
+            live = ~deleted[rows]
+            if not live.any():
+                continue
+            vocab[term] = len(vocab)
+            all_rows.append(new_row[rows[live]].astype(np.uint32))
+            all_tfs.append(tfs[live])
+            indptr.append(indptr[-1] + int(live.sum()))
+
+        keep = np.flatnonzero(~deleted)
+        self.doc_ids = [self.doc_ids[row] for row in keep]
+        self._row = {doc_id: row for row, doc_id in enumerate(self.doc_ids)}
+        self._doc_lengths = array('I', np.frombuffer(self._doc_lengths, dtype=np.uint32)[keep].tolist())
+        self._deleted = array('b', bytes(len(self.doc_ids)))
+
+        self._vocab = vocab
+        self._indptr = np.asarray(indptr, dtype=np.int64)
+        self._post_rows = np.concatenate(all_rows) if all_rows else np.zeros(0, dtype=np.uint32)
+        self._post_tfs = np.concatenate(all_tfs) if all_tfs else np.zeros(0, dtype=np.uint16)
+        self._delta = {}
+        self._base_rows = len(self.doc_ids)
+        self._saved_base = None
+
+    @staticmethod
+    def _delta_path(path: Path) -> Path:
+        return path.with_name(path.stem + '.delta' + path.suffix)
+
+    @staticmethod
+    def _stamp(path: Path) -> Optional[tuple]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return str(path), stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _needs_compaction(self) -> bool:
+        """Whether added and deleted rows have outgrown the configured share of the index."""
+        changed = len(self.doc_ids) - self._base_rows + self._deleted.count(1)
+        return changed > self.compact_ratio * max(len(self.doc_ids), 1)
+
+    def save(self, path: str = None):
+        """Write the index; while the delta stays small only the delta file is rewritten."""
+        path = Path(path) if path else self.path
+        if path is None:
+            raise ValueError("No path given for saving the lexical index")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        stamp = self._stamp(path)
+        if stamp is None or stamp != self._saved_base or self._needs_compaction():
+            self._save_compacted(path)
+        else:
+            self._save_delta(path)
+
+    @staticmethod
+    def _write_npz(path: Path, header: dict, **arrays):
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                header=np.frombuffer(json.dumps(header).encode('utf-8'), dtype=np.uint8),
+                **arrays
+            )
+        tmp_path.replace(path)
+
+    def _save_compacted(self, path: Path):
+        """Compact and write the whole index, dropping the delta file it supersedes."""
+        self.compact()
+        self._base_id = uuid.uuid4().hex
+        self._write_npz(
+            path,
+            {
+                'format_version': LEXICAL_INDEX_FORMAT_VERSION,
+                'base_id': self._base_id,
+                'terms': list(self._vocab),
+                'doc_ids': self.doc_ids
+            },
+            indptr=self._indptr,
+            rows=self._post_rows,
+            tfs=self._post_tfs,
+            doc_lengths=np.frombuffer(self._doc_lengths, dtype=np.uint32)
+        )
+        # A delta left behind by a crash here names the old base_id and is ignored on load
+        self._delta_path(path).unlink(missing_ok=True)
+        self._saved_base = self._stamp(path)
+
+    def _save_delta(self, path: Path):
+        """Write the documents added or deleted since the last compaction."""
+        terms = list(self._delta)
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(self._delta[term][0]) for term in terms])
+        self._write_npz(
+            self._delta_path(path),
+            {
+                'format_version': LEXICAL_INDEX_FORMAT_VERSION,
+                'base_id': self._base_id,
+                'base_rows': self._base_rows,
+                'terms': terms,
+                'doc_ids': self.doc_ids[self._base_rows:]
+            },
+            indptr=indptr,
+            rows=np.frombuffer(b''.join(self._delta[term][0].tobytes() for term in terms), dtype=np.uint32),
+            tfs=np.frombuffer(b''.join(self._delta[term][1].tobytes() for term in terms), dtype=np.uint16),
+            doc_lengths=np.frombuffer(self._doc_lengths, dtype=np.uint32)[self._base_rows:],
+            deleted=np.flatnonzero(np.frombuffer(self._deleted, dtype=np.int8)).astype(np.uint32)
+        )
+
+    def load(self, path: str = None):
+        """Load a previously saved index."""
+        path = Path(path) if path else self.path
+        with np.load(path) as data:
+            header = json.loads(data['header'].tobytes().decode('utf-8'))
+            if header.get('format_version') != LEXICAL_INDEX_FORMAT_VERSION:
+                raise ValueError(f"Unsupported lexical index format {header.get('format_version')} in {path}")
+
+            self._indptr = data['indptr']
+            self._post_rows = data['rows']
+            self._post_tfs = data['tfs']
+            self._doc_lengths = array('I', data['doc_lengths'].tolist())
+
+        self._vocab = {term: i for i, term in enumerate(header['terms'])}
+        self.doc_ids = header['doc_ids']
+        self._deleted = array('b', bytes(len(self.doc_ids)))
+        self._delta = {}
+        self._base_rows = len(self.doc_ids)
+        self._base_id = header.get('base_id')
+        self._saved_base = self._stamp(path)
+
+        delta_path = self._delta_path(path)
+        if delta_path.exists():
+            self._load_delta(delta_path)
+
+        self._row = {doc_id: row for row, doc_id in enumerate(self.doc_ids) if not self._deleted[row]}
+        self._total_length = sum(length for length, deleted in zip(self._doc_lengths, self._deleted) if not deleted)
+
+        logger.info(f"Loaded lexical index with {len(self._row)} documents and {len(self._vocab)} terms")
+
+    def _load_delta(self, path: Path):
+        """Apply a saved delta segment on top of the CSR file it was written against."""
+        with np.load(path) as data:
+            header = json.loads(data['header'].tobytes().decode('utf-8'))
+            if header.get('format_version') != LEXICAL_INDEX_FORMAT_VERSION or \
+                    header.get('base_id') is None or header.get('base_id') != self._base_id or \
+                    header.get('base_rows') != self._base_rows:
+                logger.warning(f"Ignoring lexical index delta {path} written against another base")
+                return
+
+            indptr = data['indptr']
+            rows = data['rows']
+            tfs = data['tfs']
+            self._doc_lengths.extend(data['doc_lengths'].tolist())
+            deleted = data['deleted']
+
+        self.doc_ids = self.doc_ids + header['doc_ids']
+        self._deleted.extend(bytes(len(header['doc_ids'])))
+        for row in deleted.tolist():
+            self._deleted[row] = 1
+        for i, term in enumerate(header['terms']):
+            start, end = indptr[i], indptr[i + 1]
+            self._delta[term] = (array('I', rows[start:end].tolist()), array('H', tfs[start:end].tolist()))
@@ -0,0 +1,349 @@
+"""
+Single-flight coalescing of LLM calls.
+Concurrent requests with an identical prompt (same question over the same
+retrieved context) share one in-flight call: the first caller makes it and the
+others wait for its result, or read the same token stream as it arrives. With a
+batching window, distinct prompts arriving within a few milliseconds of each
+other are sent together through the chat model's batch interface, for providers
+that serve batched requests efficiently.
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Iterator, AsyncIterator
+
+from dotenv import load_dotenv
+
+from tracing import annotate
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Shared streams are read from the model here, so a reader that stops early does not stall the others
+_stream_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='llm-stream')
+
+
+def prompt_key(messages: List[Any]) -> str:
+    """Digest identifying a prompt by the role and content of each message."""
+    payload = json.dumps([[getattr(message, 'type', type(message).__name__), message.content] for message in messages])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class _SharedStream:
+    """Chunks of one streamed response, readable by any number of callers while it is generated."""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: BaseException = None
+        # Callers currently reading; when the last one leaves, the upstream stream is closed
+        self.readers = 0
+        self.abandoned = False
+        self._condition = threading.Condition()
+
+    def feed(self, open_stream: Callable[[], Iterator[Any]]):
+        stream = None
+        try:
+            stream = open_stream()
+            for chunk in stream:
+                with self._condition:
+                    self.chunks.append(chunk)
+                    self._condition.notify_all()
+                if self.abandoned:
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            if hasattr(stream, 'close'):
+                stream.close()
+            with self._condition:
+                self.done = True
+                self._condition.notify_all()
+
+    def __iter__(self) -> Iterator[Any]:
+        position = 0
+        while True:
+            with self._condition:
+                while position >= len(self.chunks) and not self.done:
+                    self._condition.wait()
+                if position >= len(self.chunks):
+                    if self.error is not None:
+                        raise self.error
+                    return
+                chunk = self.chunks[position]
+            position += 1
+            yield chunk
+
+
+class _AsyncSharedStream:
+    """Async variant of _SharedStream for callers on one event loop."""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: BaseException = None
+        self.readers = 0
+        self.task: asyncio.Task = None
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def feed(self, open_stream: Callable[[], AsyncIterator[Any]]):
+        stream = None
+        try:
+            stream = open_stream()
+            async for chunk in stream:
+                self.chunks.append(chunk)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            # Also reached when the task is cancelled because every reader left
+            if hasattr(stream, 'aclose'):
+                await stream.aclose()
+            self.done = True
+            self._notify()
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        position = 0
+        while True:
+            while position >= len(self.chunks) and not self.done:
+                await self._changed.wait()
+            if position >= len(self.chunks):
+                if self.error is not None:
+                    raise self.error
+                return
+            yield self.chunks[position]
+            position += 1
+
+
+class _Batch:
+    """Prompts collected during one batching window."""
+
+    def __init__(self):
+        self.items: List[tuple] = []
+        self.full = threading.Event()
+
+
+class LLMCoalescer:
+    """Deduplicates concurrent identical LLM calls and optionally batches distinct ones."""
+
+    def __init__(self, get_llm: Callable[[], Any], batch_window_ms: float = None, max_batch_size: int = None):
+        """
+        Initialize with a callable returning the chat model. A batch_window_ms above zero
+        (LLM_BATCH_WINDOW_MS, off by default) holds non-streaming calls for up to that long
+        and sends them together, up to max_batch_size prompts per batch.
+        """
+        self.get_llm = get_llm
+        self.enabled = os.getenv('LLM_COALESCING_ENABLED', 'true').lower() == 'true'
+        self.batch_window = float(
+            batch_window_ms if batch_window_ms is not None else os.getenv('LLM_BATCH_WINDOW_MS', 0)
+        ) / 1000
+        self.max_batch_size = int(max_batch_size or os.getenv('LLM_MAX_BATCH_SIZE', 8))
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._streams: Dict[str, _SharedStream] = {}
+        self._async_inflight: Dict[tuple, asyncio.Future] = {}
+        self._async_streams: Dict[tuple, _AsyncSharedStream] = {}
+        self._open_batch: _Batch = None
+        self._background_tasks = set()
+
+        self.stats = {
+            'calls': 0,
+            'coalesced': 0,
+            'batches': 0,
+            'batched_calls': 0
+        }
+
+    def _count(self, coalesced: bool):
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['coalesced'] += coalesced
+        annotate(coalesced=coalesced)
+
+    def invoke(self, messages: List[Any]) -> Any:
+        """Response to a prompt, shared with any identical call already in flight."""
+        if not self.enabled:
+            self._count(False)
+            return self._call(messages)
+
+        key = prompt_key(messages)
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        self._count(not leader)
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._call(messages)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _call(self, messages: List[Any]) -> Any:
+        if self.batch_window <= 0:
+            return self.get_llm()(messages)
+
+        future = Future()
+        with self._lock:
+            batch = self._open_batch
+            leader = batch is None
+            if leader:
+                batch = self._open_batch = _Batch()
+            batch.items.append((messages, future))
+            if len(batch.items) >= self.max_batch_size:
+                self._open_batch = None
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.batch_window)
+            with self._lock:
+                if self._open_batch is batch:
+                    self._open_batch = None
+            self._run_batch(batch.items)
+        return future.result()
+
+    def _run_batch(self, items: List[tuple]):
+        with self._lock:
+            self.stats['batches'] += 1
+            self.stats['batched_calls'] += len(items)
+        try:
+            if len(items) == 1:
+                results = [self.get_llm()(items[0][0])]
+            else:
+                # One failing prompt must not fail the unrelated callers batched with it
+                results = self.get_llm().batch([messages for messages, _ in items], return_exceptions=True)
+            for (_, future), result in zip(items, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+
+    def stream(self, messages: List[Any]) -> Iterator[Any]:
+        """Response chunks for a prompt, read from the identical stream in flight if there is one."""
+        if not self.enabled:
+            self._count(False)
+            yield from self.get_llm().stream(messages)
+            return
+
+        key = prompt_key(messages)
+        with self._lock:
+            shared = self._streams.get(key)
+            leader = shared is None
+            if leader:
+                shared = self._streams[key] = _SharedStream()
+            shared.readers += 1
+        self._count(not leader)
+        if leader:
+            _stream_executor.submit(self._feed, key, shared, messages)
+        try:
+            yield from shared
+        finally:
+            self._leave(key, shared)
+
+    def _leave(self, key: str, shared: _SharedStream):
+        """Drop a reader; the last one to leave an unfinished stream stops its generation."""
+        with self._lock:
+            shared.readers -= 1
+            if shared.readers or shared.done:
+                return
+            if self._streams.get(key) is shared:
+                del self._streams[key]
+            shared.abandoned = True
+
+    def _feed(self, key: str, shared: _SharedStream, messages: List[Any]):
+        try:
+            shared.feed(lambda: self.get_llm().stream(messages))
+        finally:
+            with self._lock:
+                if self._streams.get(key) is shared:
+                    del self._streams[key]
+
+    async def ainvoke(self, messages: List[Any]) -> Any:
+        """Async variant of invoke."""
+        if not self.enabled:
+            self._count(False)
+            return await self._acall(messages)
+
+        key = (id(asyncio.get_running_loop()), prompt_key(messages))
+        task = self._async_inflight.get(key)
+        leader = task is None
+        if leader:
+            task = self._async_inflight[key] = asyncio.ensure_future(self._acall(messages))
+            task.add_done_callback(lambda _: self._async_inflight.pop(key, None))
+        self._count(not leader)
+        # Shielded so one caller giving up does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def _acall(self, messages: List[Any]) -> Any:
+        if self.batch_window <= 0:
+            return await self.get_llm().ainvoke(messages)
+        # Batch collection blocks on a window, so it runs in a worker thread
+        return await asyncio.get_running_loop().run_in_executor(None, self._call, messages)
+
+    async def astream(self, messages: List[Any]) -> AsyncIterator[Any]:
+        """Async variant of stream."""
+        if not self.enabled:
+            self._count(False)
+            async for chunk in self.get_llm().astream(messages):
+                yield chunk
+            return
+
+        key = (id(asyncio.get_running_loop()), prompt_key(messages))
+        shared = self._async_streams.get(key)
+        leader = shared is None
+        if leader:
+            shared = self._async_streams[key] = _AsyncSharedStream()
+            shared.task = asyncio.ensure_future(shared.feed(lambda: self.get_llm().astream(messages)))
+            self._background_tasks.add(shared.task)
+            shared.task.add_done_callback(self._background_tasks.discard)
+            shared.task.add_done_callback(lambda _: self._drop_async_stream(key, shared))
+        shared.readers += 1
+        self._count(not leader)
+        try:
+            async for chunk in shared:
+                yield chunk
+        finally:
+            shared.readers -= 1
+            if not shared.readers and not shared.done:
+                # Nobody is reading any more: stop generating instead of paying for the rest
+                self._drop_async_stream(key, shared)
+                shared.task.cancel()
+
+    def _drop_async_stream(self, key: tuple, shared: _AsyncSharedStream):
+        if self._async_streams.get(key) is shared:
+            del self._async_streams[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Call counts and the share of calls served by another caller's request."""
+        calls, batches = self.stats['calls'], self.stats['batches']
+        return {
+            **self.stats,
+            'coalesced_rate': self.stats['coalesced'] / calls if calls else 0.0,
+            'avg_batch_size': self.stats['batched_calls'] / batches if batches else 0.0,
+            'batch_window_ms': self.batch_window * 1000
+        }
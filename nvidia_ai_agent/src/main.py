@@ -13,6 +13,7 @@ from typing import Optional
 import click
 from rich.console import Console
 from rich.panel import Panel
+from rich.live import Live
 from rich.text import Text
 from rich.prompt import Prompt
 from dotenv import load_dotenv
@@ -22,6 +23,7 @@ sys.path.append(str(Path(__file__).parent))
 
 from nvidia_agent import NVIDIAConversationalAgent
 from knowledge_base import KnowledgeBaseProcessor
+from snapshot import export_snapshot, import_snapshot, restore_if_empty, get_snapshot_path
 
 # Load environment variables
 load_dotenv()
@@ -47,6 +49,7 @@ class NVIDIAAgentCLI:
     def __init__(self):
         """Initialize the CLI."""
         self.agent: Optional[NVIDIAConversationalAgent] = None
+        self.knowledge_base: Optional[KnowledgeBaseProcessor] = None
         self.console = Console()
     
     def display_welcome(self):
@@ -83,8 +86,9 @@ class NVIDIAAgentCLI:
                 )
                 return False
             
-            # Initialize the agent
-            self.agent = NVIDIAConversationalAgent()
+            # Initialize the agent, sharing the knowledge base opened during setup
+            self.agent = NVIDIAConversationalAgent(knowledge_base=self.knowledge_base)
+            self.agent.warm_up()
             
             # Get agent stats to verify initialization
             stats = self.agent.get_agent_stats()
@@ -102,7 +106,13 @@ class NVIDIAAgentCLI:
     def setup_knowledge_base(self) -> bool:
         """Set up the knowledge base if it doesn't exist."""
         try:
-            kb_processor = KnowledgeBaseProcessor()
+            self.knowledge_base = self.knowledge_base or KnowledgeBaseProcessor()
+            kb_processor = self.knowledge_base
+            
+            # Restore a prebuilt snapshot into an empty store before falling back to re-embedding
+            restored = restore_if_empty(kb_processor)
+            if restored:
+                self.console.print(f"✅ Knowledge base restored from snapshot ({restored} chunks)", style="green")
             
             # Check if knowledge base exists
             stats = kb_processor.get_collection_stats()
@@ -138,24 +148,13 @@ class NVIDIAAgentCLI:
             return True
         
         try:
-            # Show thinking indicator
-            with self.console.status("[bold green]Thinking..."):
-                # Check for special commands
-                special_response = self.agent.handle_special_commands(user_input)
-                
-                if special_response:
-                    response = special_response
-                else:
-                    response = self.agent.process_query(user_input)
+            # Check for special commands
+            special_response = self.agent.handle_special_commands(user_input)
             
-            # Display response in a nice panel
-            response_panel = Panel(
-                response,
-                title="🤖 NVIDIA AI Assistant",
-                title_align="left",
-                border_style="green"
-            )
-            self.console.print(response_panel)
+            if special_response:
+                self.console.print(self._response_panel(special_response))
+            else:
+                self.stream_response(user_input)
             
         except Exception as e:
             self.console.print(f"❌ Error processing query: {e}", style="red")
@@ -163,6 +162,29 @@ class NVIDIAAgentCLI:
         
         return True
     
+    def _response_panel(self, response: str) -> Panel:
+        """Display a response in a nice panel."""
+        return Panel(
+            response,
+            title="🤖 NVIDIA AI Assistant",
+            title_align="left",
+            border_style="green"
+        )
+    
+    def stream_response(self, query: str) -> str:
+        """Render the agent's answer in a live panel as tokens arrive; returns the full text."""
+        chunks = self.agent.stream_query(query)
+        
+        # Retrieval and the wait for the first token happen behind the thinking indicator
+        with self.console.status("[bold green]Thinking..."):
+            response = next(chunks, "")
+        
+        with Live(self._response_panel(response), console=self.console, vertical_overflow="visible") as live:
+            for chunk in chunks:
+                response += chunk
+                live.update(self._response_panel(response))
+        return response
+    
     def run_interactive_mode(self):
         """Run the interactive chat interface."""
         self.display_welcome()
@@ -223,16 +245,15 @@ def ask(query: str, verbose: bool):
         # Initialize agent
         agent = NVIDIAConversationalAgent()
         
-        # Get response
-        response = agent.process_query(query)
-        
-        # Display response
         if verbose:
             stats = agent.get_agent_stats()
             console.print(f"📊 Knowledge Base: {stats['knowledge_base_documents']} documents", style="dim")
         
+        # Stream the response as it is generated
         console.print("\\n" + "="*60)
-        console.print(response)
+        for chunk in agent.stream_query(query):
+            console.out(chunk, end="", highlight=False)
+        console.print()
         console.print("="*60)
         
     except Exception as e:
@@ -240,13 +261,21 @@ def ask(query: str, verbose: bool):
 
 
 @cli.command()
-def setup():
-    """Set up the knowledge base from course transcripts."""
+@click.option('--snapshot', 'snapshot_path', default=None, help='Snapshot file to load instead of re-embedding')
+@click.option('--rebuild', is_flag=True, help='Re-embed the transcripts even if a snapshot exists')
+def setup(snapshot_path: str, rebuild: bool):
+    """Set up the knowledge base from a snapshot or the course transcripts."""
     try:
         console.print("🔧 Setting up NVIDIA AI Agent knowledge base...", style="yellow")
+        kb_processor = KnowledgeBaseProcessor()
+        
+        snapshot_path = snapshot_path or get_snapshot_path()
+        if not rebuild and os.path.exists(snapshot_path):
+            count = import_snapshot(kb_processor, snapshot_path)
+            console.print(f"✅ Knowledge base loaded from snapshot {snapshot_path} ({count} chunks)", style="green")
+            return
         
         # Process transcripts
-        kb_processor = KnowledgeBaseProcessor()
         documents = kb_processor.process_all_transcripts("../")
         
         if documents:
@@ -259,6 +288,23 @@ def setup():
         console.print(f"❌ Setup failed: {e}", style="red")
 
 
+@cli.command(name='export-snapshot')
+@click.option('--output', '-o', default=None, help='Snapshot file to write (default: KB_SNAPSHOT_PATH)')
+@click.option('--float16', is_flag=True, help='Store embeddings as float16 to halve the file size')
+def export_snapshot_command(output: str, float16: bool):
+    """Export the knowledge base to a snapshot file for fast cold starts."""
+    try:
+        kb_processor = KnowledgeBaseProcessor()
+        manifest = export_snapshot(kb_processor, output, dtype='float16' if float16 else 'float32')
+        console.print(
+            f"✅ Snapshot written to {output or get_snapshot_path()} "
+            f"({manifest['count']} chunks, {manifest['model_id']}, {manifest['dimension']} dims)",
+            style="green"
+        )
+    except Exception as e:
+        console.print(f"❌ Snapshot export failed: {e}", style="red")
+
+
 @cli.command()
 def stats():
     """Show agent statistics and capabilities."""
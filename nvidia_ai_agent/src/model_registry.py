@@ -0,0 +1,112 @@
+"""
+Process-wide registry for heavyweight retrieval resources.
+Embedding models, cross-encoders, ChromaDB clients and memory-mapped indexes are
+created lazily on first use and shared by every KnowledgeBaseProcessor, agent and
+server in the process.
+"""
+
+import os
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Callable
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+
+_lock = threading.RLock()
+_resources: Dict[tuple, Any] = {}
+
+
+def _get_or_create(key: tuple, factory: Callable[[], Any]) -> Any:
+    """Return the shared resource for key, creating it once under the lock."""
+    resource = _resources.get(key)
+    if resource is not None:
+        return resource
+
+    with _lock:
+        resource = _resources.get(key)
+        if resource is None:
+            resource = factory()
+            _resources[key] = resource
+    return resource
+
+
+def get_embedding_model(model_name: str = None, backend: str = None) -> Any:
+    """Shared SentenceTransformer for the given (or configured) model name and backend."""
+    from embeddings import load_embedding_model, get_embedding_backend
+
+    model_name = model_name or os.getenv('EMBEDDING_MODEL', DEFAULT_EMBEDDING_MODEL)
+    backend = backend or get_embedding_backend()
+
+    return _get_or_create(
+        ('embedding_model', model_name, backend),
+        lambda: load_embedding_model(model_name, backend)
+    )
+
+
+def get_cross_encoder(model_name: str, max_length: int = 512) -> Any:
+    """Shared CrossEncoder used for reranking."""
+    def load():
+        from sentence_transformers import CrossEncoder
+
+        logger.info(f"Loading cross-encoder: {model_name}")
+        return CrossEncoder(model_name, max_length=max_length)
+
+    return _get_or_create(('cross_encoder', model_name), load)
+
+
+def get_chroma_client(persist_directory: str) -> Any:
+    """Shared ChromaDB persistent client for a directory."""
+    path = str(Path(persist_directory).resolve())
+
+    def connect():
+        import chromadb
+        from chromadb.config import Settings
+
+        logger.info(f"Opening ChromaDB at {path}")
+        return chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False))
+
+    return _get_or_create(('chroma_client', path), connect)
+
+
+def get_vector_index(index_directory: str, name: str = "nvidia_transcripts") -> Any:
+    """Shared memory-mapped vector index for a directory."""
+    path = str(Path(index_directory).resolve())
+
+    def open_index():
+        from vector_index import MmapVectorIndex
+
+        return MmapVectorIndex(path, name=name)
+
+    return _get_or_create(('vector_index', path, name), open_index)
+
+
+def is_loaded(kind: str, name: str = None) -> bool:
+    """Whether a resource of this kind (optionally with this name) has been created."""
+    return any(
+        key[0] == kind and (name is None or name in key[1:])
+        for key in list(_resources)
+    )
+
+
+def loaded_resources() -> Dict[str, int]:
+    """Count of loaded resources by kind, for diagnostics."""
+    counts: Dict[str, int] = {}
+    for key in list(_resources):
+        counts[key[0]] = counts.get(key[0], 0) + 1
+    return counts
+
+
+def clear_registry():
+    """Drop all shared resources (mainly for tests)."""
+    with _lock:
+        _resources.clear()
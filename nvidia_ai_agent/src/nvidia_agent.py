@@ -4,10 +4,15 @@ This is the core agent that combines knowledge base retrieval with live web sear
 """
 
 import os
+import time
+import uuid
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterator, AsyncIterator
 from datetime import datetime
-from dataclasses import dataclass
 
 from langchain.chat_models import ChatOpenAI
 from langchain.schema import HumanMessage, AIMessage, SystemMessage
@@ -18,6 +23,12 @@ from langchain.agents import initialize_agent, AgentType
 from dotenv import load_dotenv
 from knowledge_base import KnowledgeBaseProcessor
 from web_search_tool import NVIDIABlogSearchTool
+from response_cache import ResponseCache, context_fingerprint
+from context_budget import ContextBudgeter
+from conversation_history import ConversationContext, ConversationHistory
+from query_router import QueryRouter
+from tracing import get_tracer, span, annotate_trace, propagate, own_context
+from llm_coalescer import LLMCoalescer
 
 # Load environment variables
 load_dotenv()
@@ -26,15 +37,34 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Knowledge base and web retrieval run side by side; a leg that misses its deadline keeps running here
+_retrieval_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='agent-retrieval')
 
-@dataclass
-class ConversationContext:
-    """Represents the context of a conversation."""
-    user_query: str
-    response: str
-    timestamp: datetime
-    sources_used: List[str]
-    relevance_scores: Dict[str, float]
+ERROR_RESPONSE = "I apologize, but I encountered an error while processing your query. Please try again."
+
+
+def _content_bytes(results: List[Dict[str, Any]], *fields: str) -> int:
+    """UTF-8 size of the given text fields over a list of results, for tracing."""
+    return sum(len((result.get(field) or '').encode('utf-8')) for result in results for field in fields)
+
+
+class ConversationSession:
+    """Conversation state of one user; models, indexes and HTTP clients live on the shared agent."""
+    
+    def __init__(self, session_id: str = None):
+        """Start an empty conversation."""
+        self.session_id = session_id or uuid.uuid4().hex
+        self.memory = ConversationBufferWindowMemory(
+            k=int(os.getenv('MAX_CONVERSATION_HISTORY', 10)),
+            return_messages=True
+        )
+        self.conversation_history = ConversationHistory(session_id=self.session_id)
+        self.last_active = time.time()
+    
+    def clear(self):
+        """Forget the conversation so far."""
+        self.conversation_history.clear()
+        self.memory.clear()
 
 
 class NVIDIAConversationalAgent:
@@ -43,8 +73,13 @@ class NVIDIAConversationalAgent:
     both local knowledge base (course transcripts) and live web search.
     """
     
-    def __init__(self, openai_api_key: str = None):
-        """Initialize the NVIDIA conversational agent."""
+    def __init__(
+        self,
+        openai_api_key: str = None,
+        knowledge_base: KnowledgeBaseProcessor = None,
+        web_search_tool: NVIDIABlogSearchTool = None
+    ):
+        """Initialize the NVIDIA conversational agent, optionally reusing existing tools."""
         
         # Setup API keys
         self.openai_api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
@@ -54,23 +89,49 @@ class NVIDIAConversationalAgent:
         # Initialize components
         self.llm = ChatOpenAI(
             openai_api_key=self.openai_api_key,
+            # OPENAI_API_BASE points at an OpenAI-compatible server, e.g. src/stub_llm_server.py for load tests
+            openai_api_base=os.getenv('OPENAI_API_BASE') or None,
             model=os.getenv('OPENAI_MODEL', 'gpt-4'),
             temperature=0.7,
             max_tokens=1500
         )
+        # Concurrent identical prompts share one LLM call
+        self.llm_calls = LLMCoalescer(lambda: self.llm)
         
-        # Initialize knowledge base and web search
-        self.knowledge_base = KnowledgeBaseProcessor()
-        self.web_search_tool = NVIDIABlogSearchTool()
+        # Initialize knowledge base and web search; the embedding model loads on first search
+        self.knowledge_base = knowledge_base or KnowledgeBaseProcessor()
+        self.web_search_tool = web_search_tool or NVIDIABlogSearchTool()
         
-        # Initialize conversation memory
-        self.memory = ConversationBufferWindowMemory(
-            k=int(os.getenv('MAX_CONVERSATION_HISTORY', 10)),
-            return_messages=True
+        # Per-source retrieval deadlines in seconds, measured from the start of the query
+        self.knowledge_base_deadline = float(os.getenv('KNOWLEDGE_BASE_DEADLINE', 10))
+        self.web_search_deadline = float(os.getenv('WEB_SEARCH_DEADLINE', 5))
+        
+        # Repeated questions over unchanged context are answered without an LLM call
+        self.response_cache = (
+            ResponseCache() if os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true' else None
         )
+        if self.response_cache is not None:
+            self.knowledge_base.add_ingest_listener(self.response_cache.invalidate)
+        
+        # Web search and content extraction only for queries the transcripts do not already answer
+        self.router = QueryRouter(encode=lambda texts: self.knowledge_base.embedding_model.encode(texts))
         
-        # Conversation context
-        self.conversation_history: List[ConversationContext] = []
+        # Retrieved context is deduplicated and trimmed to CONTEXT_TOKEN_BUDGET model tokens
+        self.context_budgeter = ContextBudgeter()
+        
+        # Per-request stage timings, kept for the analytics tab and optionally exported
+        self.tracer = get_tracer()
+        
+        # Per-user conversation state; callers that do not pass a session share the default one,
+        # whose id is unique to this agent so a spill file shared between processes stays separate
+        self.default_session = ConversationSession(f"default-{uuid.uuid4().hex}")
+        self.sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self.max_sessions = int(os.getenv('MAX_SESSIONS', 1000))
+        self.session_idle_timeout = float(os.getenv('SESSION_IDLE_TIMEOUT', 3600))
+        self._sessions_lock = threading.Lock()
+        self._warm_up_future: Optional[Future] = None
+        # Retrieval legs that outlived their deadline; referenced until they finish
+        self._background_tasks = set()
         
         # Agent configuration
         self.agent_name = os.getenv('AGENT_NAME', 'NVIDIA AI Assistant')
@@ -80,9 +141,79 @@ class NVIDIAConversationalAgent:
         
         logger.info(f"Initialized {self.agent_name}")
     
+    def warm_up(self) -> Future:
+        """
+        Prefetch the blog feeds and load the embedding model, router examples and blog index in the
+        background. Long-running front ends call this at startup so the first query neither misses
+        its deadlines nor stalls an event loop; one-off commands skip it and load only what they use.
+        Repeated calls share the first call's future.
+        """
+        with self._sessions_lock:
+            if self._warm_up_future is None:
+                self.web_search_tool.prefetch_feeds()
+                self._warm_up_future = _retrieval_executor.submit(self._warm_up)
+            return self._warm_up_future
+    
+    def _warm_up(self):
+        """Do the one-off loading work that would otherwise fall on the first query."""
+        steps = [
+            ('embedding model', lambda: self.knowledge_base.embedding_model),
+            ('query router', self.router.warm_up),
+            ('blog index', lambda: self.web_search_tool.blog_index)
+        ]
+        for name, step in steps:
+            try:
+                step()
+            except Exception as e:
+                logger.error(f"Error preloading the {name}: {e}")
+    
+    @property
+    def memory(self) -> ConversationBufferWindowMemory:
+        return self.default_session.memory
+    
+    @property
+    def conversation_history(self) -> ConversationHistory:
+        return self.default_session.conversation_history
+    
+    def get_session(self, session_id: str = None) -> ConversationSession:
+        """Conversation state for a session id, started on first use; idle sessions are dropped."""
+        now = time.time()
+        evicted = []
+        with self._sessions_lock:
+            for stale_id, stale in list(self.sessions.items()):
+                if now - stale.last_active <= self.session_idle_timeout and len(self.sessions) < self.max_sessions:
+                    break
+                evicted.append(self.sessions.pop(stale_id))
+            
+            session = self.sessions.get(session_id) if session_id else None
+            if session is None:
+                session = ConversationSession(session_id)
+                self.sessions[session.session_id] = session
+            session.last_active = now
+            self.sessions.move_to_end(session.session_id)
+        
+        # Spilled exchanges of dropped sessions would otherwise stay on disk forever
+        for stale in evicted:
+            stale.clear()
+        return session
+    
+    def _touch_session(self, session: ConversationSession):
+        """Mark a session as in use so idle eviction passes over it."""
+        with self._sessions_lock:
+            session.last_active = time.time()
+            if session.session_id in self.sessions:
+                self.sessions.move_to_end(session.session_id)
+    
+    def end_session(self, session_id: str):
+        """Drop a session's conversation state, including exchanges spilled to disk."""
+        with self._sessions_lock:
+            session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session.clear()
+    
     def _create_system_message(self) -> str:
         """Create the system message that defines the agent's behavior."""
-        return f\"\"\"You are the {self.agent_name}, a knowledgeable AI assistant specializing in NVIDIA technologies, products, and services.
+        return f"""You are the {self.agent_name}, a knowledgeable AI assistant specializing in NVIDIA technologies, products, and services.
 
 Your primary expertise includes:
 - NVIDIA NIM (NVIDIA Inference Microservices)
@@ -105,17 +236,31 @@ Guidelines for responses:
 - Focus specifically on NVIDIA-related topics
 - If asked about non-NVIDIA topics, politely redirect to NVIDIA-relevant aspects
 
-Remember: You are representing NVIDIA's knowledge and expertise, so maintain high standards of accuracy and professionalism.\"\"\"
+Remember: You are representing NVIDIA's knowledge and expertise, so maintain high standards of accuracy and professionalism."""
     
-    def search_knowledge_base(self, query: str, n_results: int = 3) -> List[Dict[str, Any]]:
+    def search_knowledge_base(self, query: str, n_results: int = 3, query_embedding: Any = None) -> List[Dict[str, Any]]:
         """Search the local knowledge base for relevant information."""
         logger.info(f"Searching knowledge base for: {query}")
-        return self.knowledge_base.search_knowledge_base(query, n_results)
+        with span('knowledge_base_search', n_results=n_results, cache_hit=False) as search_span:
+            results = self.knowledge_base.search_knowledge_base(query, n_results, query_embedding=query_embedding)
+            search_span.set(results=len(results), bytes=_content_bytes(results, 'content'))
+            return results
     
-    def search_web(self, query: str, extract_content: bool = False) -> List[Dict[str, Any]]:
+    def search_web(self, query: str, extract_content: bool = False, timeout: float = None) -> List[Dict[str, Any]]:
         """Search NVIDIA blogs for current information."""
         logger.info(f"Searching NVIDIA blogs for: {query}")
-        return self.web_search_tool.search_with_content_extraction(query, extract_content)
+        with span('web_search', extract_content=extract_content) as search_span:
+            results = self.web_search_tool.search_with_content_extraction(query, extract_content, timeout)
+            search_span.set(results=len(results), bytes=_content_bytes(results, 'summary', 'full_content'))
+            return results
+    
+    async def asearch_web(self, query: str, extract_content: bool = False, timeout: float = None) -> List[Dict[str, Any]]:
+        """Async variant of search_web."""
+        logger.info(f"Searching NVIDIA blogs for: {query}")
+        with span('web_search', extract_content=extract_content) as search_span:
+            results = await self.web_search_tool.asearch_with_content_extraction(query, extract_content, timeout)
+            search_span.set(results=len(results), bytes=_content_bytes(results, 'summary', 'full_content'))
+            return results
     
     def get_recent_nvidia_news(self, days: int = 7) -> List[Dict[str, Any]]:
         """Get recent NVIDIA news and announcements."""
@@ -127,12 +272,12 @@ Remember: You are representing NVIDIA's knowledge and expertise, so maintain hig
         if not results:
             return "No relevant information found in the knowledge base."
         
-        formatted = "Knowledge Base Results:\\n\\n"
+        formatted = "Knowledge Base Results:\n\n"
         for i, result in enumerate(results, 1):
-            formatted += f"{i}. Course: {result['course_name']}\\n"
-            formatted += f"   Lesson: {result['lesson_title']}\\n"
-            formatted += f"   Relevance: {result['relevance_score']:.3f}\\n"
-            formatted += f"   Content: {result['content']}\\n\\n"
+            formatted += f"{i}. Course: {result['course_name']}\n"
+            formatted += f"   Lesson: {result['lesson_title']}\n"
+            formatted += f"   Relevance: {result['relevance_score']:.3f}\n"
+            formatted += f"   Content: {result['content']}\n\n"
         
         return formatted
     
@@ -141,132 +286,452 @@ Remember: You are representing NVIDIA's knowledge and expertise, so maintain hig
         if not results:
             return "No relevant articles found in NVIDIA blogs."
         
-        formatted = "Recent NVIDIA Blog Articles:\\n\\n"
+        formatted = "Recent NVIDIA Blog Articles:\n\n"
         for i, result in enumerate(results, 1):
-            formatted += f"{i}. {result['title']}\\n"
-            formatted += f"   Source: {result['source']}\\n"
-            formatted += f"   Published: {result['published_date']}\\n"
-            formatted += f"   URL: {result['url']}\\n"
-            formatted += f"   Summary: {result['summary']}\\n"
+            formatted += f"{i}. {result['title']}\n"
+            formatted += f"   Source: {result['source']}\n"
+            formatted += f"   Published: {result['published_date']}\n"
+            formatted += f"   URL: {result['url']}\n"
+            formatted += f"   Summary: {result['summary']}\n"
             if 'full_content' in result:
-                formatted += f"   Content: {result['full_content']}\\n"
-            formatted += "\\n"
+                formatted += f"   Content: {result['full_content']}\n"
+            formatted += "\n"
         
         return formatted
     
-    def _determine_search_strategy(self, query: str) -> Dict[str, bool]:
-        """Determine whether to use knowledge base, web search, or both based on the query."""
-        query_lower = query.lower()
-        
-        # Keywords that suggest current/recent information needed
-        current_keywords = ['latest', 'recent', 'new', 'current', 'today', 'now', '2024', '2025', 'announcement']
-        
-        # Keywords that suggest foundational knowledge
-        foundational_keywords = ['what is', 'how does', 'explain', 'basics', 'fundamentals', 'course', 'learn']
+    def _determine_search_strategy(self, query: str, query_embedding: Any = None) -> Dict[str, Any]:
+        """Decide which sources to search; see QueryRouter for how the web leg is chosen."""
+        return self.router.route(query, query_embedding)
+    
+    def _embed_query(self, query: str) -> Any:
+        """Query embedding for routing and vector search, or None if it misses the knowledge base deadline."""
+        future = _retrieval_executor.submit(self.knowledge_base.embed_query, query)
+        try:
+            return future.result(timeout=self.knowledge_base_deadline)
+        except FutureTimeoutError:
+            logger.warning(f"Query embedding missed the {self.knowledge_base_deadline:.1f}s knowledge base deadline")
+        except Exception as e:
+            logger.error(f"Error embedding query: {e}")
+        return None
+    
+    async def aclose(self):
+        """Release the HTTP connections of the running event loop; call before a loop that served queries ends."""
+        await self.web_search_tool.aclose()
+    
+    async def _in_worker(self, fn: Callable, *args) -> Any:
+        """Run blocking work (routing, SQLite history spill) in a worker thread, inside the current trace."""
+        return await asyncio.get_running_loop().run_in_executor(_retrieval_executor, propagate(fn), *args)
+    
+    async def _aembed_query(self, query: str) -> Any:
+        """Async variant of _embed_query."""
+        task = asyncio.get_running_loop().run_in_executor(_retrieval_executor, self.knowledge_base.embed_query, query)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=self.knowledge_base_deadline)
+        except asyncio.TimeoutError:
+            logger.warning(f"Query embedding missed the {self.knowledge_base_deadline:.1f}s knowledge base deadline")
+        except Exception as e:
+            logger.error(f"Error embedding query: {e}")
+        return None
+    
+    def _wait_for_legs(self, legs: Dict[str, Tuple[Any, float]], started: float) -> Dict[str, List[Dict[str, Any]]]:
+        """Results of the retrieval legs that finish within their deadlines."""
+        results = {}
+        for name, (future, deadline) in legs.items():
+            try:
+                results[name] = future.result(timeout=max(deadline - (time.monotonic() - started), 0))
+            except FutureTimeoutError:
+                # The search finishes in the background and still warms the caches for later queries
+                logger.warning(f"{name.capitalize()} missed its {deadline:.1f}s deadline, answering without it")
+            except Exception as e:
+                logger.error(f"Error during {name}: {e}")
+        return results
+    
+    async def _await_legs(
+        self,
+        legs: Dict[str, Tuple[Any, float]],
+        started: float
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Async variant of _wait_for_legs."""
+        loop = asyncio.get_running_loop()
+        results = {}
+        for name, (task, deadline) in legs.items():
+            try:
+                results[name] = await asyncio.wait_for(
+                    asyncio.shield(task), timeout=max(deadline - (loop.time() - started), 0)
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"{name.capitalize()} missed its {deadline:.1f}s deadline, answering without it")
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+            except Exception as e:
+                logger.error(f"Error during {name}: {e}")
+        return results
+    
+    def _deferred_web_budget(self, elapsed: float) -> float:
+        """Seconds a web leg started after the knowledge base search may take."""
+        overall_deadline = max(self.knowledge_base_deadline, self.web_search_deadline)
+        remaining = min(self.web_search_deadline, overall_deadline - elapsed)
+        if remaining <= 0:
+            logger.warning("No time left for the web search after the knowledge base search, answering without it")
+        return remaining
+    
+    def _gather_context(
+        self,
+        query: str,
+        strategy: Dict[str, Any],
+        query_embedding: Any = None
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Run the knowledge base and web searches concurrently, each bounded by its own deadline.
+        When the strategy defers the web decision, the web leg starts only if the knowledge
+        base results turn out too weak, and gets whatever is left of the later of the two
+        deadlines, so deferring never makes a query wait longer than running both legs at once.
+        """
+        started = time.monotonic()
+        legs = {}
+        if strategy['use_knowledge_base']:
+            legs['knowledge base'] = (
+                _retrieval_executor.submit(propagate(self.search_knowledge_base), query, 3, query_embedding),
+                self.knowledge_base_deadline
+            )
+        if strategy['use_web_search']:
+            legs['web search'] = (
+                _retrieval_executor.submit(
+                    propagate(self.search_web), query, strategy.get('extract_content', True), self.web_search_deadline
+                ),
+                self.web_search_deadline
+            )
+        results = self._wait_for_legs(legs, started)
+        
+        if strategy['use_web_search'] is None:
+            strategy = self.router.check_coverage(query, strategy, results.get('knowledge base', []))
+            remaining = self._deferred_web_budget(time.monotonic() - started) if strategy['use_web_search'] else 0
+            if remaining > 0:
+                web_leg = _retrieval_executor.submit(
+                    propagate(self.search_web), query, strategy['extract_content'], remaining
+                )
+                results.update(self._wait_for_legs({'web search': (web_leg, remaining)}, time.monotonic()))
+        
+        return results.get('knowledge base', []), results.get('web search', [])
+    
+    async def _agather_context(
+        self,
+        query: str,
+        strategy: Dict[str, Any],
+        query_embedding: Any = None
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Async variant of _gather_context; the embedding search runs in a worker thread."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        legs = {}
+        if strategy['use_knowledge_base']:
+            legs['knowledge base'] = (
+                loop.run_in_executor(
+                    _retrieval_executor, propagate(self.search_knowledge_base), query, 3, query_embedding
+                ),
+                self.knowledge_base_deadline
+            )
+        if strategy['use_web_search']:
+            legs['web search'] = (
+                asyncio.ensure_future(
+                    self.asearch_web(query, strategy.get('extract_content', True), self.web_search_deadline)
+                ),
+                self.web_search_deadline
+            )
+        results = await self._await_legs(legs, started)
         
-        needs_current = any(keyword in query_lower for keyword in current_keywords)
-        needs_foundational = any(keyword in query_lower for keyword in foundational_keywords)
+        if strategy['use_web_search'] is None:
+            strategy = self.router.check_coverage(query, strategy, results.get('knowledge base', []))
+            remaining = self._deferred_web_budget(loop.time() - started) if strategy['use_web_search'] else 0
+            if remaining > 0:
+                web_leg = asyncio.ensure_future(self.asearch_web(query, strategy['extract_content'], remaining))
+                results.update(await self._await_legs({'web search': (web_leg, remaining)}, loop.time()))
         
-        return {
-            'use_knowledge_base': True,  # Always search knowledge base first
-            'use_web_search': needs_current or not needs_foundational,  # Use web search for current info
-            'prioritize_web': needs_current  # Prioritize web results if current info is needed
-        }
+        return results.get('knowledge base', []), results.get('web search', [])
     
-    def process_query(self, query: str) -> str:
-        """Process a user query and generate a comprehensive response."""
+    def _retrieve(self, query: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Retrieve knowledge base and web results for a query."""
         logger.info(f"Processing query: {query}")
         
-        # Determine search strategy
-        strategy = self._determine_search_strategy(query)
+        # The same embedding routes the query and searches the knowledge base
+        with span('strategy'):
+            query_embedding = self._embed_query(query)
+            strategy = self._determine_search_strategy(query, query_embedding)
         
-        # Collect information from sources
-        knowledge_results = []
-        web_results = []
-        sources_used = []
-        
-        # Search knowledge base
-        if strategy['use_knowledge_base']:
-            knowledge_results = self.search_knowledge_base(query)
+        # Collect information from sources concurrently; whatever arrives within the deadlines is used
+        return self._gather_context(query, strategy, query_embedding)
+    
+    async def _aretrieve(self, query: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Async variant of _retrieve."""
+        logger.info(f"Processing query: {query}")
+        with span('strategy'):
+            query_embedding = await self._aembed_query(query)
+            strategy = await self._in_worker(self._determine_search_strategy, query, query_embedding)
+        return await self._agather_context(query, strategy, query_embedding)
+    
+    def _build_messages(
+        self,
+        query: str,
+        knowledge_results: List[Dict[str, Any]],
+        web_results: List[Dict[str, Any]]
+    ) -> Tuple[List[Any], List[str], Dict[str, Any]]:
+        """Assemble the LLM prompt from retrieved results; returns (messages, sources used, token usage)."""
+        with span('prompt_build') as build_span:
+            knowledge_results, web_results, usage = self.context_budgeter.fit(knowledge_results, web_results)
+            sources_used = []
             if knowledge_results:
                 sources_used.append("Knowledge Base")
-        
-        # Search web if needed
-        if strategy['use_web_search']:
-            web_results = self.search_web(query, extract_content=True)
             if web_results:
                 sources_used.append("NVIDIA Blogs")
         
-        # Format context for the LLM
-        context_parts = []
+            # Format context for the LLM
+            context_parts = []
         
-        if knowledge_results:
-            context_parts.append(self._format_knowledge_base_results(knowledge_results))
+            if knowledge_results:
+                context_parts.append(self._format_knowledge_base_results(knowledge_results))
         
-        if web_results:
-            context_parts.append(self._format_web_results(web_results))
+            if web_results:
+                context_parts.append(self._format_web_results(web_results))
         
-        context = "\\n".join(context_parts) if context_parts else "No relevant information found."
+            context = "\n".join(context_parts) if context_parts else "No relevant information found."
         
-        # Create the prompt
-        messages = [
-            SystemMessage(content=self.system_message),
-            HumanMessage(content=f\"\"\"User Query: {query}
+            # Create the prompt
+            messages = [
+                SystemMessage(content=self.system_message),
+                HumanMessage(content=f"""User Query: {query}
 
 Available Information:
 {context}
 
-Please provide a comprehensive and accurate response based on the available information. If you use specific sources, please cite them appropriately.\"\"\")
-        ]
+Please provide a comprehensive and accurate response based on the available information. If you use specific sources, please cite them appropriately.""")
+            ]
         
-        # Get response from LLM
-        try:
-            response = self.llm(messages)
-            response_text = response.content
-            
-            # Store conversation context
-            conversation_ctx = ConversationContext(
-                user_query=query,
-                response=response_text,
-                timestamp=datetime.now(),
-                sources_used=sources_used,
-                relevance_scores={}  # Could be enhanced with actual scores
+            usage['prompt_tokens'] = sum(
+                self.context_budgeter.counter.count(message.content) for message in messages
+            )
+            logger.info(f"Prompt uses {usage['prompt_tokens']} tokens ({usage['context_tokens']} of context)")
+            build_span.set(
+                prompt_tokens=usage['prompt_tokens'],
+                context_tokens=usage['context_tokens'],
+                bytes=sum(len(message.content.encode('utf-8')) for message in messages),
+                truncated_snippets=usage['truncated_snippets'],
+                dropped_results=usage['dropped_results']
             )
-            self.conversation_history.append(conversation_ctx)
+        return messages, sources_used, usage
+    
+    def _record_exchange(
+        self,
+        session: ConversationSession,
+        query: str,
+        response_text: str,
+        sources_used: List[str],
+        usage: Dict[str, Any] = None
+    ) -> Dict[str, int]:
+        """Store a completed exchange in the conversation history and memory; returns its token usage."""
+        token_usage = {}
+        if usage is not None:
+            # Cached answers spend no tokens and are recorded without usage
+            token_usage = {
+                'prompt_tokens': usage['prompt_tokens'],
+                'context_tokens': usage['context_tokens'],
+                'completion_tokens': self.context_budgeter.counter.count(response_text)
+            }
+            self.context_budgeter.record_generation(token_usage['prompt_tokens'], token_usage['completion_tokens'])
+        
+        conversation_ctx = ConversationContext(
+            user_query=query,
+            response=response_text,
+            timestamp=datetime.now(),
+            sources_used=sources_used,
+            relevance_scores={},  # Could be enhanced with actual scores
+            token_usage=token_usage
+        )
+        session.conversation_history.append(conversation_ctx)
+        
+        # Update memory
+        session.memory.chat_memory.add_user_message(query)
+        session.memory.chat_memory.add_ai_message(response_text)
+        # The window memory only limits what it loads, so its message list is trimmed here
+        del session.memory.chat_memory.messages[:-2 * session.memory.k]
+        
+        logger.info(f"Generated response using sources: {sources_used}")
+        return token_usage
+    
+    def _cached_response(self, session: ConversationSession, query: str, fingerprint: str) -> Optional[str]:
+        """Answer from the response cache, recorded in the history like a generated one."""
+        if self.response_cache is None:
+            return None
+        cached = self.response_cache.get(query, fingerprint)
+        annotate_trace(response_cache_hit=cached is not None)
+        if cached is None:
+            return None
+        
+        logger.info("Answered from the response cache")
+        self._record_exchange(session, query, cached.response, cached.sources_used)
+        return cached.response
+    
+    def _cache_response(self, query: str, fingerprint: str, response_text: str, sources_used: List[str]):
+        if self.response_cache is not None:
+            self.response_cache.put(query, fingerprint, response_text, sources_used)
+    
+    def process_query(self, query: str, session: ConversationSession = None) -> str:
+        """Process a user query and generate a comprehensive response."""
+        session = session or self.default_session
+        self._touch_session(session)
+        with self.tracer.trace('process_query', session_id=session.session_id, query=query[:200]):
+            knowledge_results, web_results = self._retrieve(query)
+            fingerprint = context_fingerprint(knowledge_results, web_results)
+            cached = self._cached_response(session, query, fingerprint)
+            if cached is not None:
+                return cached
             
-            # Update memory
-            self.memory.chat_memory.add_user_message(query)
-            self.memory.chat_memory.add_ai_message(response_text)
+            messages, sources_used, usage = self._build_messages(query, knowledge_results, web_results)
             
-            logger.info(f"Generated response using sources: {sources_used}")
-            return response_text
+            # Get response from LLM
+            try:
+                with span('llm_call', streamed=False) as llm_span:
+                    response = self.llm_calls.invoke(messages)
+                response_text = response.content
+                token_usage = self._record_exchange(session, query, response_text, sources_used, usage)
+                llm_span.set(bytes=len(response_text.encode('utf-8')), **token_usage)
+                self._cache_response(query, fingerprint, response_text, sources_used)
+                return response_text
+                
+            except Exception as e:
+                logger.error(f"Error generating response: {e}")
+                return ERROR_RESPONSE
+    
+    @own_context
+    def stream_query(self, query: str, session: ConversationSession = None) -> Iterator[str]:
+        """Process a user query, yielding the response text as the LLM generates it."""
+        session = session or self.default_session
+        self._touch_session(session)
+        with self.tracer.trace('stream_query', session_id=session.session_id, query=query[:200]):
+            knowledge_results, web_results = self._retrieve(query)
+            fingerprint = context_fingerprint(knowledge_results, web_results)
+            cached = self._cached_response(session, query, fingerprint)
+            if cached is not None:
+                yield cached
+                return
             
-        except Exception as e:
-            logger.error(f"Error generating response: {e}")
-            return "I apologize, but I encountered an error while processing your query. Please try again."
+            messages, sources_used, usage = self._build_messages(query, knowledge_results, web_results)
+            
+            chunks = []
+            try:
+                with span('llm_call', streamed=True) as llm_span:
+                    for chunk in self.llm_calls.stream(messages):
+                        if chunk.content:
+                            if not chunks:
+                                llm_span.set(time_to_first_token_ms=llm_span.elapsed_ms())
+                            chunks.append(chunk.content)
+                            yield chunk.content
+                        
+            except Exception as e:
+                logger.error(f"Error generating response: {e}")
+                yield ("\n\n" if chunks else "") + ERROR_RESPONSE
+                return
+            
+            # Only complete responses go into the history, memory and response cache
+            response_text = "".join(chunks)
+            token_usage = self._record_exchange(session, query, response_text, sources_used, usage)
+            llm_span.set(bytes=len(response_text.encode('utf-8')), **token_usage)
+            self._cache_response(query, fingerprint, response_text, sources_used)
     
-    def get_conversation_summary(self) -> str:
+    async def aprocess_query(self, query: str, session: ConversationSession = None) -> str:
+        """Async variant of process_query; many sessions can be served concurrently on one event loop."""
+        session = session or self.default_session
+        self._touch_session(session)
+        with self.tracer.trace('aprocess_query', session_id=session.session_id, query=query[:200]):
+            knowledge_results, web_results = await self._aretrieve(query)
+            fingerprint = context_fingerprint(knowledge_results, web_results)
+            cached = await self._in_worker(self._cached_response, session, query, fingerprint)
+            if cached is not None:
+                return cached
+            
+            messages, sources_used, usage = self._build_messages(query, knowledge_results, web_results)
+            
+            try:
+                with span('llm_call', streamed=False) as llm_span:
+                    response = await self.llm_calls.ainvoke(messages)
+                response_text = response.content
+                token_usage = await self._in_worker(
+                    self._record_exchange, session, query, response_text, sources_used, usage
+                )
+                llm_span.set(bytes=len(response_text.encode('utf-8')), **token_usage)
+                self._cache_response(query, fingerprint, response_text, sources_used)
+                return response_text
+                
+            except Exception as e:
+                logger.error(f"Error generating response: {e}")
+                return ERROR_RESPONSE
+    
+    @own_context
+    async def astream_query(self, query: str, session: ConversationSession = None) -> AsyncIterator[str]:
+        """Async variant of stream_query."""
+        session = session or self.default_session
+        self._touch_session(session)
+        with self.tracer.trace('astream_query', session_id=session.session_id, query=query[:200]):
+            knowledge_results, web_results = await self._aretrieve(query)
+            fingerprint = context_fingerprint(knowledge_results, web_results)
+            cached = await self._in_worker(self._cached_response, session, query, fingerprint)
+            if cached is not None:
+                yield cached
+                return
+            
+            messages, sources_used, usage = self._build_messages(query, knowledge_results, web_results)
+            
+            chunks = []
+            try:
+                with span('llm_call', streamed=True) as llm_span:
+                    async for chunk in self.llm_calls.astream(messages):
+                        if chunk.content:
+                            if not chunks:
+                                llm_span.set(time_to_first_token_ms=llm_span.elapsed_ms())
+                            chunks.append(chunk.content)
+                            yield chunk.content
+                        
+            except Exception as e:
+                logger.error(f"Error generating response: {e}")
+                yield ("\n\n" if chunks else "") + ERROR_RESPONSE
+                return
+            
+            response_text = "".join(chunks)
+            token_usage = await self._in_worker(
+                self._record_exchange, session, query, response_text, sources_used, usage
+            )
+            llm_span.set(bytes=len(response_text.encode('utf-8')), **token_usage)
+            self._cache_response(query, fingerprint, response_text, sources_used)
+    
+    def get_conversation_summary(self, session: ConversationSession = None) -> str:
         """Get a summary of the conversation history."""
-        if not self.conversation_history:
+        history = (session or self.default_session).conversation_history
+        if not history:
             return "No conversation history available."
         
-        summary = f"Conversation Summary ({len(self.conversation_history)} exchanges):\\n\\n"
+        summary = f"Conversation Summary ({history.total_exchanges} exchanges):\n\n"
         
-        for i, ctx in enumerate(self.conversation_history[-5:], 1):  # Show last 5
-            summary += f"{i}. Query: {ctx.user_query[:100]}...\\n"
-            summary += f"   Sources: {', '.join(ctx.sources_used)}\\n"
-            summary += f"   Time: {ctx.timestamp.strftime('%Y-%m-%d %H:%M:%S')}\\n\\n"
+        for i, ctx in enumerate(history[-5:], 1):  # Show last 5
+            summary += f"{i}. Query: {ctx.user_query[:100]}...\n"
+            summary += f"   Sources: {', '.join(ctx.sources_used)}\n"
+            summary += f"   Time: {ctx.timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
         
         return summary
     
-    def get_agent_stats(self) -> Dict[str, Any]:
+    def get_agent_stats(self, session: ConversationSession = None) -> Dict[str, Any]:
         """Get statistics about the agent's knowledge base and performance."""
         kb_stats = self.knowledge_base.get_collection_stats()
+        history_stats = (session or self.default_session).conversation_history.get_stats()
         
         return {
             'agent_name': self.agent_name,
             'knowledge_base_documents': kb_stats.get('total_documents', 0),
-            'conversation_exchanges': len(self.conversation_history),
+            'conversation_exchanges': history_stats['total_exchanges'],
+            'conversation_history': history_stats,
+            'active_sessions': len(self.sessions),
+            'response_cache': self.response_cache.get_stats() if self.response_cache else {},
+            'token_usage': self.context_budgeter.get_stats(),
+            'routing': self.router.get_stats(),
+            'llm_calls': self.llm_calls.get_stats(),
             'sources_available': ['Knowledge Base (Course Transcripts)', 'NVIDIA Developer Blog', 'NVIDIA Blog'],
             'capabilities': [
                 'Course transcript search',
@@ -276,12 +741,13 @@ Please provide a comprehensive and accurate response based on the available info
             ]
         }
     
-    def handle_special_commands(self, query: str) -> Optional[str]:
+    def handle_special_commands(self, query: str, session: ConversationSession = None) -> Optional[str]:
         """Handle special commands like /help, /stats, etc."""
+        session = session or self.default_session
         query = query.strip().lower()
         
         if query == '/help':
-            return \"\"\"NVIDIA AI Assistant - Available Commands:
+            return """NVIDIA AI Assistant - Available Commands:
             
 /help - Show this help message
 /stats - Show agent statistics and capabilities  
@@ -297,32 +763,45 @@ You can ask me about:
 - GPU computing and acceleration
 - NVIDIA enterprise solutions
 
-Just ask your question naturally!\"\"\"
+Just ask your question naturally!"""
         
         elif query == '/stats':
-            stats = self.get_agent_stats()
-            return f\"\"\"Agent Statistics:
+            stats = self.get_agent_stats(session)
+            return f"""Agent Statistics:
 - Name: {stats['agent_name']}
 - Knowledge Base: {stats['knowledge_base_documents']} documents
 - Conversation Exchanges: {stats['conversation_exchanges']}
 - Available Sources: {', '.join(stats['sources_available'])}
-- Capabilities: {', '.join(stats['capabilities'])}\"\"\"
+- Capabilities: {', '.join(stats['capabilities'])}"""
         
         elif query == '/recent':
             recent_news = self.get_recent_nvidia_news()
             return self.web_search_tool.format_search_results(recent_news)
         
         elif query == '/history':
-            return self.get_conversation_summary()
+            return self.get_conversation_summary(session)
         
         elif query == '/clear':
-            self.conversation_history.clear()
-            self.memory.clear()
+            session.clear()
             return "Conversation history cleared."
         
         return None
 
 
+_agent: Optional[NVIDIAConversationalAgent] = None
+_agent_lock = threading.Lock()
+
+
+def get_agent() -> NVIDIAConversationalAgent:
+    """Agent shared by every session in the process; pair it with get_session() per user."""
+    global _agent
+    if _agent is None:
+        with _agent_lock:
+            if _agent is None:
+                _agent = NVIDIAConversationalAgent()
+    return _agent
+
+
 def main():
     """Test the NVIDIA conversational agent."""
     try:
@@ -337,12 +816,12 @@ def main():
             "/stats"
         ]
         
-        print(f"\\n{'='*60}")
+        print(f"\n{'='*60}")
         print(f"Testing {agent.agent_name}")
         print('='*60)
         
         for query in test_queries:
-            print(f"\\nUser: {query}")
+            print(f"\nUser: {query}")
             print("-" * 40)
             
             # Handle special commands
@@ -353,7 +832,7 @@ def main():
                 response = agent.process_query(query)
             
             print(f"Assistant: {response}")
-            print("\\n" + "="*60)
+            print("\n" + "="*60)
             
     except Exception as e:
         logger.error(f"Error testing agent: {e}")
@@ -0,0 +1,196 @@
+"""
+Metadata partitions for filtered knowledge base search.
+Precomputes, per course, lesson and source type, the sorted rows that belong to
+each value, plus a per-row publication date, so a scoped query only scores the
+rows inside its partition instead of over-fetching and filtering afterwards.
+"""
+
+import logging
+from datetime import date, datetime
+from email.utils import parsedate_to_datetime
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Set
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# SearchFilters attribute -> metadata field
+PARTITION_FIELDS = {
+    'course': 'course_name',
+    'lesson': 'lesson_title',
+    'source_type': 'source_type',
+}
+
+SOURCE_TRANSCRIPT = 'transcript'
+SOURCE_WEB_ARTICLE = 'web_article'
+
+
+def parse_date(value: Any) -> int:
+    """Convert a date, datetime, ISO string or RFC 822 string to YYYYMMDD (0 if unknown)."""
+    if value is None or value == '' or value == 0:
+        return 0
+    if isinstance(value, int):
+        return value
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.year * 10000 + value.month * 100 + value.day
+
+    text = str(value).strip()
+    for parse in (
+        lambda s: datetime.fromisoformat(s.replace('Z', '+00:00')),
+        parsedate_to_datetime,
+        lambda s: datetime.strptime(s[:10], '%Y-%m-%d'),
+    ):
+        try:
+            return parse_date(parse(text))
+        except (TypeError, ValueError, IndexError):
+            continue
+
+    logger.warning(f"Could not parse date: {value}")
+    return 0
+
+
+@dataclass
+class SearchFilters:
+    """Scope for a knowledge base search; unset fields do not filter."""
+    course: Optional[str] = None
+    lesson: Optional[str] = None
+    source_type: Optional[str] = None
+    published_after: Optional[Any] = None
+    published_before: Optional[Any] = None
+
+    def is_empty(self) -> bool:
+        return not any(self._terms().values()) and self.date_range() == (0, 0)
+
+    def _terms(self) -> Dict[str, Optional[str]]:
+        """Metadata field -> required value."""
+        return {field: getattr(self, attr) for attr, field in PARTITION_FIELDS.items()}
+
+    def date_range(self) -> tuple:
+        """Inclusive (after, before) bounds as YYYYMMDD; 0 means unbounded."""
+        return parse_date(self.published_after), parse_date(self.published_before)
+
+    def matches(self, metadata: Dict[str, Any]) -> bool:
+        """Whether a chunk's metadata falls inside this scope."""
+        for field, value in self._terms().items():
+            if value and metadata.get(field, SOURCE_TRANSCRIPT if field == 'source_type' else None) != value:
+                return False
+
+        after, before = self.date_range()
+        published = int(metadata.get('published_date', 0) or 0)
+        if after and published < after:
+            return False
+        if before and (published == 0 or published > before):
+            return False
+        return True
+
+    def to_where(self) -> Optional[Dict[str, Any]]:
+        """Equivalent ChromaDB `where` clause, or None when nothing is filtered."""
+        clauses = [{field: {'$eq': value}} for field, value in self._terms().items() if value]
+
+        after, before = self.date_range()
+        if after:
+            clauses.append({'published_date': {'$gte': after}})
+        if before:
+            clauses.append({'published_date': {'$gte': 1}})
+            clauses.append({'published_date': {'$lte': before}})
+
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
+class PartitionIndex:
+    """Row partitions by course, lesson and source type, plus publication dates."""
+
+    def __init__(self):
+        """Create an empty partition index."""
+        self.ids: List[str] = []
+        self._row: Dict[str, int] = {}
+        self._values: Dict[str, List[Optional[str]]] = {field: [] for field in PARTITION_FIELDS.values()}
+        self._published: List[int] = []
+
+        # Built lazily from the per-row values after each change
+        self._partitions: Optional[Dict[str, Dict[str, np.ndarray]]] = None
+        self._published_array: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        """Add or update rows; ids keep their original row on update."""
+        for doc_id, metadata in zip(ids, metadatas):
+            metadata = metadata or {}
+            row = self._row.get(doc_id)
+            if row is None:
+                row = len(self.ids)
+                self._row[doc_id] = row
+                self.ids.append(doc_id)
+                for values in self._values.values():
+                    values.append(None)
+                self._published.append(0)
+
+            for field, values in self._values.items():
+                default = SOURCE_TRANSCRIPT if field == 'source_type' else None
+                values[row] = metadata.get(field, default)
+            self._published[row] = int(metadata.get('published_date', 0) or 0)
+
+        self._partitions = None
+        self._published_array = None
+
+    def _build(self):
+        """Group rows by value for every partition field."""
+        partitions = {}
+        for field, values in self._values.items():
+            groups: Dict[str, List[int]] = {}
+            for row, value in enumerate(values):
+                if value is not None:
+                    groups.setdefault(value, []).append(row)
+            partitions[field] = {value: np.asarray(rows, dtype=np.int64) for value, rows in groups.items()}
+
+        self._partitions = partitions
+        self._published_array = np.asarray(self._published, dtype=np.int64)
+
+    def values(self, field: str) -> List[str]:
+        """Distinct values of a partition field, e.g. all course names."""
+        if self._partitions is None:
+            self._build()
+        return sorted(self._partitions.get(field, {}))
+
+    def rows(self, filters: SearchFilters) -> Optional[np.ndarray]:
+        """Sorted rows inside the filter scope, or None when nothing is filtered."""
+        if filters is None or filters.is_empty():
+            return None
+        if self._partitions is None:
+            self._build()
+
+        rows = None
+        for field, value in filters._terms().items():
+            if not value:
+                continue
+            partition = self._partitions[field].get(value)
+            if partition is None:
+                return np.zeros(0, dtype=np.int64)
+            rows = partition if rows is None else np.intersect1d(rows, partition, assume_unique=True)
+
+        after, before = filters.date_range()
+        if after or before:
+            published = self._published_array if rows is None else self._published_array[rows]
+            in_range = published >= max(after, 1) if after else published > 0
+            if before:
+                in_range &= published <= before
+            candidates = np.arange(len(self.ids)) if rows is None else rows
+            rows = candidates[in_range]
+
+        return rows
+
+    def ids_for(self, filters: SearchFilters) -> Optional[Set[str]]:
+        """Chunk ids inside the filter scope, or None when nothing is filtered."""
+        rows = self.rows(filters)
+        if rows is None:
+            return None
+        return {self.ids[row] for row in rows}
@@ -0,0 +1,227 @@
+"""
+Query router deciding which retrieval legs a question needs.
+The query embedding computed for knowledge base search is compared with
+embedded example questions about current NVIDIA news and about foundational
+course material. Questions that are clearly about current events go to the live
+blog search straight away, with full-content extraction. The rest are first
+answered from the knowledge base and only go to the web when the best transcript
+match is too weak to answer them. Without an embedding, the router falls back to
+keyword rules.
+"""
+
+import os
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Callable
+
+import numpy as np
+from dotenv import load_dotenv
+
+from tracing import annotate_trace
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Questions that need information newer than the course transcripts
+CURRENT_EXAMPLES = [
+    "What are the latest NVIDIA announcements?",
+    "What did NVIDIA announce this week?",
+    "Recent news about NVIDIA GPUs",
+    "What's new in the latest NIM release?",
+    "When was the new GPU architecture launched?",
+    "What did Jensen Huang present at GTC this year?",
+    "Current NVIDIA partnerships and customer stories",
+    "Which models were recently added to NVIDIA NIM?",
+    "NVIDIA earnings and product roadmap update",
+    "Today's NVIDIA developer blog posts"
+]
+
+# Questions the course material is meant to answer
+FOUNDATIONAL_EXAMPLES = [
+    "What is NVIDIA NIM?",
+    "Explain retrieval augmented generation",
+    "How does a large language model generate text?",
+    "What are embeddings and how are they used for search?",
+    "How do I deploy a model as a microservice?",
+    "Explain the basics of prompt engineering",
+    "What is the difference between fine-tuning and RAG?",
+    "How does GPU acceleration speed up inference?",
+    "What does the course say about vector databases?",
+    "Fundamentals of generative AI agents"
+]
+
+# Substring rules used when no query embedding is available
+CURRENT_KEYWORDS = ['latest', 'recent', 'new', 'current', 'today', 'now', '2024', '2025', 'announcement']
+FOUNDATIONAL_KEYWORDS = ['what is', 'how does', 'explain', 'basics', 'fundamentals', 'course', 'learn']
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class QueryRouter:
+    """Embedding-similarity routing between the knowledge base and live web search."""
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], Any] = None,
+        web_margin: float = None,
+        kb_coverage: float = None,
+        extract_below: float = None,
+        current_examples: List[str] = None,
+        foundational_examples: List[str] = None
+    ):
+        """
+        Initialize with an encoder for the example questions (the retrieval embedding model).
+        A query whose similarity to the current-news examples exceeds its similarity to the
+        foundational ones by web_margin is sent to the web immediately; otherwise the web is
+        searched only when the best knowledge base match scores below kb_coverage, with full
+        content extracted when it also scores below extract_below.
+        """
+        self.encode = encode
+        self.enabled = os.getenv('ROUTER_ENABLED', 'true').lower() == 'true'
+        self.web_margin = float(web_margin if web_margin is not None else os.getenv('ROUTER_WEB_MARGIN', 0.05))
+        self.kb_coverage = float(kb_coverage if kb_coverage is not None else os.getenv('ROUTER_KB_COVERAGE', 0.55))
+        self.extract_below = float(
+            extract_below if extract_below is not None else os.getenv('ROUTER_EXTRACT_BELOW', 0.35)
+        )
+        self.current_examples = current_examples or CURRENT_EXAMPLES
+        self.foundational_examples = foundational_examples or FOUNDATIONAL_EXAMPLES
+
+        self._lock = threading.Lock()
+        self._current_vectors: Optional[np.ndarray] = None
+        self._foundational_vectors: Optional[np.ndarray] = None
+
+        self.stats = {
+            'queries': 0,
+            'web_searches': 0,
+            'web_skipped': 0,
+            'content_extractions': 0,
+            'decided_by_intent': 0,
+            'decided_by_coverage': 0,
+            'decided_by_keywords': 0
+        }
+
+    def _example_vectors(self) -> tuple:
+        """Embedded example questions, computed on first use."""
+        if self._current_vectors is None:
+            with self._lock:
+                if self._current_vectors is None:
+                    embeddings = _normalize(self.encode(self.current_examples + self.foundational_examples))
+                    self._foundational_vectors = embeddings[len(self.current_examples):]
+                    self._current_vectors = embeddings[:len(self.current_examples)]
+        return self._current_vectors, self._foundational_vectors
+
+    def warm_up(self):
+        """Embed the example questions now rather than during the first query."""
+        if self.encode is not None and self.enabled:
+            self._example_vectors()
+
+    def web_score(self, query_embedding: Any) -> float:
+        """Similarity to current-news questions minus similarity to foundational ones."""
+        current, foundational = self._example_vectors()
+        query = _normalize(query_embedding)[0]
+        return float(np.max(current @ query) - np.max(foundational @ query))
+
+    def _keyword_route(self, query: str) -> Dict[str, Any]:
+        query_lower = query.lower()
+        needs_current = any(keyword in query_lower for keyword in CURRENT_KEYWORDS)
+        needs_foundational = any(keyword in query_lower for keyword in FOUNDATIONAL_KEYWORDS)
+        use_web = needs_current or not needs_foundational
+        return {
+            'use_knowledge_base': True,
+            'use_web_search': use_web,
+            'extract_content': use_web,
+            'prioritize_web': needs_current,
+            'reason': 'keywords',
+            'web_score': None,
+            'kb_score': None
+        }
+
+    def route(self, query: str, query_embedding: Any = None) -> Dict[str, Any]:
+        """
+        Retrieval strategy for a query. use_web_search is None when the decision waits
+        for the knowledge base results; pass those to check_coverage to complete it.
+        """
+        if query_embedding is None or self.encode is None or not self.enabled:
+            return self.record(query, self._keyword_route(query))
+
+        try:
+            score = self.web_score(query_embedding)
+        except Exception as e:
+            logger.error(f"Error routing query, using keyword rules: {e}")
+            return self.record(query, self._keyword_route(query))
+
+        strategy = {
+            'use_knowledge_base': True,
+            'use_web_search': None,
+            'extract_content': False,
+            'prioritize_web': False,
+            'reason': 'coverage',
+            'web_score': score,
+            'kb_score': None
+        }
+        if score >= self.web_margin:
+            strategy.update(use_web_search=True, extract_content=True, prioritize_web=True, reason='intent')
+            return self.record(query, strategy)
+        return strategy
+
+    def check_coverage(
+        self,
+        query: str,
+        strategy: Dict[str, Any],
+        knowledge_results: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Complete a deferred strategy from how well the knowledge base matched the query."""
+        scores = [
+            result['vector_score'] if result.get('vector_score') is not None else result.get('relevance_score', 0.0)
+            for result in knowledge_results
+        ]
+        kb_score = float(max(scores)) if scores else 0.0
+        strategy = dict(strategy, kb_score=kb_score)
+        strategy['use_web_search'] = kb_score < self.kb_coverage
+        strategy['extract_content'] = kb_score < self.extract_below
+        return self.record(query, strategy)
+
+    def record(self, query: str, strategy: Dict[str, Any]) -> Dict[str, Any]:
+        """Log a final routing decision and count it."""
+        with self._lock:
+            self.stats['queries'] += 1
+            self.stats[f"decided_by_{strategy['reason']}"] += 1
+            if strategy['use_web_search']:
+                self.stats['web_searches'] += 1
+                if strategy['extract_content']:
+                    self.stats['content_extractions'] += 1
+            else:
+                self.stats['web_skipped'] += 1
+
+        annotate_trace(
+            route_reason=strategy['reason'],
+            web_search=strategy['use_web_search'],
+            extract_content=strategy['extract_content'],
+            web_score=strategy['web_score'],
+            kb_score=strategy['kb_score']
+        )
+
+        web_score = f"{strategy['web_score']:.3f}" if strategy['web_score'] is not None else '-'
+        kb_score = f"{strategy['kb_score']:.3f}" if strategy['kb_score'] is not None else '-'
+        logger.info(
+            f"Route for {query[:60]!r}: web={strategy['use_web_search']} extract={strategy['extract_content']} "
+            f"by {strategy['reason']} (web score {web_score}, kb score {kb_score})"
+        )
+        return strategy
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Decision counts and the share of queries that skipped the web leg."""
+        queries = self.stats['queries']
+        return {
+            **self.stats,
+            'web_skip_rate': self.stats['web_skipped'] / queries if queries else 0.0,
+            'extraction_rate': self.stats['content_extractions'] / queries if queries else 0.0
+        }
@@ -0,0 +1,159 @@
+"""
+Cross-encoder reranking for knowledge base results.
+Rescores over-fetched candidates with a small CPU cross-encoder in batches, stops
+when the per-query time budget would be exceeded, and caches (query, chunk) scores.
+"""
+
+import os
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Tuple
+
+from dotenv import load_dotenv
+
+from model_registry import get_cross_encoder
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_RERANK_MODEL = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+
+
+class CrossEncoderReranker:
+    """Budgeted, cached cross-encoder reranking of search results."""
+
+    def __init__(
+        self,
+        model_name: str = None,
+        budget_ms: float = None,
+        batch_size: int = None,
+        cache_size: int = None
+    ):
+        """Initialize the reranker; the model itself loads on first use."""
+        self.model_name = model_name or os.getenv('RERANK_MODEL', DEFAULT_RERANK_MODEL)
+        self.budget_ms = float(budget_ms if budget_ms is not None else os.getenv('RERANK_BUDGET_MS', 150))
+        self.batch_size = int(batch_size or os.getenv('RERANK_BATCH_SIZE', 8))
+        self.cache_size = int(cache_size if cache_size is not None else os.getenv('RERANK_CACHE_SIZE', 4096))
+
+        self._cache: "OrderedDict[Tuple[str, str, int], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Running estimate of scoring cost, used to decide whether the next batch fits the budget
+        self._ms_per_pair = None
+
+        self.stats = {
+            'queries': 0,
+            'pairs_scored': 0,
+            'cache_hits': 0,
+            'budget_exhausted': 0
+        }
+
+    @property
+    def model(self):
+        """Shared cross-encoder, loaded on first access."""
+        return get_cross_encoder(self.model_name)
+
+    @staticmethod
+    def _cache_key(query: str, result: Dict[str, Any]) -> Tuple[str, str, int]:
+        """Cache key; the content hash keeps re-ingested chunks from reusing stale scores."""
+        return query, result['chunk_id'], hash(result['content'])
+
+    def _cache_get(self, key: Tuple[str, str, int]):
+        with self._lock:
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key)
+            return score
+
+    def _cache_put(self, key: Tuple[str, str, int], score: float):
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _score_batch(self, query: str, contents: List[str]) -> List[float]:
+        """Score one batch and update the per-pair cost estimate."""
+        start = time.perf_counter()
+        scores = self.model.predict([(query, content) for content in contents], batch_size=len(contents))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        per_pair = elapsed_ms / len(contents)
+        self._ms_per_pair = per_pair if self._ms_per_pair is None else 0.8 * self._ms_per_pair + 0.2 * per_pair
+        return [float(score) for score in scores]
+
+    def rerank(self, query: str, results: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        """
+        Return the top_k results after cross-encoder rescoring.
+        Candidates are scored in first-stage order; any left unscored when the budget
+        runs out keep their original order after the rescored ones.
+        """
+        if not results:
+            return []
+
+        self.stats['queries'] += 1
+        start = time.perf_counter()
+
+        scores: Dict[int, float] = {}
+        pending = []
+        for position, result in enumerate(results):
+            cached = self._cache_get(self._cache_key(query, result))
+            if cached is not None:
+                scores[position] = cached
+                self.stats['cache_hits'] += 1
+            else:
+                pending.append(position)
+
+        for batch_start in range(0, len(pending), self.batch_size):
+            batch = pending[batch_start:batch_start + self.batch_size]
+
+            # Skip the batch if its estimated cost would overrun the budget
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            estimated_ms = (self._ms_per_pair or 0.0) * len(batch)
+            if self.budget_ms and elapsed_ms + estimated_ms > self.budget_ms:
+                self.stats['budget_exhausted'] += 1
+                logger.info(f"Rerank budget reached after {len(scores)}/{len(results)} candidates")
+                break
+
+            try:
+                batch_scores = self._score_batch(query, [results[position]['content'] for position in batch])
+            except Exception as e:
+                logger.error(f"Error reranking results: {e}")
+                break
+
+            for position, score in zip(batch, batch_scores):
+                scores[position] = score
+                self._cache_put(self._cache_key(query, results[position]), score)
+            self.stats['pairs_scored'] += len(batch)
+
+        rescored = sorted(scores, key=lambda position: scores[position], reverse=True)
+        unscored = [position for position in range(len(results)) if position not in scores]
+
+        reranked = []
+        for position in (rescored + unscored)[:top_k]:
+            result = dict(results[position])
+            if position in scores:
+                result['retrieval_score'] = result['relevance_score']
+                result['rerank_score'] = scores[position]
+                # Cross-encoder logits mapped to 0-1 for display alongside other scores
+                result['relevance_score'] = 1.0 / (1.0 + math.exp(-max(min(scores[position], 50.0), -50.0)))
+            reranked.append(result)
+
+        return reranked
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Rerank counters plus cache occupancy."""
+        return {
+            **self.stats,
+            'cache_entries': len(self._cache),
+            'ms_per_pair': self._ms_per_pair
+        }
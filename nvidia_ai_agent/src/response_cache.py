@@ -0,0 +1,119 @@
+"""
+Response cache for the conversational agent.
+Answers are stored under the normalised query text plus a fingerprint of the
+retrieved context, so a repeated question is answered without an LLM call for as
+long as retrieval returns the same material. Entries expire after a TTL, the
+least recently used ones are evicted beyond a size limit, and the whole cache is
+dropped when the knowledge base ingests new content.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from semantic_cache import normalize_query
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(query: str) -> str:
+    """Query text with case, whitespace and trailing punctuation ignored."""
+    return normalize_query(query).rstrip(' ?!.')
+
+
+def context_fingerprint(knowledge_results: List[Dict[str, Any]], web_results: List[Dict[str, Any]]) -> str:
+    """Digest of the retrieved material; relevance scores and result order are ignored."""
+    parts = sorted(
+        f"kb\x00{result.get('course_name', '')}\x00{result.get('lesson_title', '')}\x00{result.get('content', '')}"
+        for result in knowledge_results
+    )
+    parts += sorted(
+        f"web\x00{result.get('url', '')}\x00{result.get('summary', '')}\x00{result.get('full_content', '')}"
+        for result in web_results
+    )
+    return hashlib.sha1('\x01'.join(parts).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class CachedResponse:
+    """A generated answer and the sources it was based on."""
+    response: str
+    sources_used: List[str]
+    created_at: float = field(default_factory=time.time)
+
+
+class ResponseCache:
+    """TTL and LRU bounded cache of agent responses."""
+
+    def __init__(self, ttl_seconds: float = None, max_entries: int = None):
+        """Initialize an empty cache."""
+        self.ttl_seconds = float(ttl_seconds if ttl_seconds is not None else os.getenv('RESPONSE_CACHE_TTL', 3600))
+        self.max_entries = int(max_entries or os.getenv('RESPONSE_CACHE_SIZE', 512))
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], CachedResponse]" = OrderedDict()
+
+        self.stats = {
+            'lookups': 0,
+            'hits': 0,
+            'evictions': 0,
+            'invalidations': 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, query: str, fingerprint: str) -> Optional[CachedResponse]:
+        """Cached answer to the same question over the same context, if still fresh."""
+        key = (normalize_question(query), fingerprint)
+        with self._lock:
+            self.stats['lookups'] += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry.created_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry
+
+    def put(self, query: str, fingerprint: str, response: str, sources_used: List[str]):
+        """Store an answer, evicting the least recently used entries beyond the size limit."""
+        key = (normalize_question(query), fingerprint)
+        with self._lock:
+            self._entries[key] = CachedResponse(response=response, sources_used=list(sources_used))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def invalidate(self):
+        """Drop all entries, e.g. after the knowledge base ingested new content."""
+        with self._lock:
+            if self._entries:
+                self.stats['invalidations'] += 1
+                logger.info(f"Invalidated {len(self._entries)} cached responses")
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit-rate and occupancy statistics."""
+        lookups = self.stats['lookups']
+        return {
+            **self.stats,
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+            'entries': len(self)
+        }
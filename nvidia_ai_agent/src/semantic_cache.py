@@ -0,0 +1,170 @@
+"""
+Semantic result cache for knowledge base search.
+Returns the cached results of a previous query whose embedding is within a cosine
+similarity threshold of the new one, with TTL and size-based eviction, and drops
+everything when the underlying collection changes.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Hashable
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query for exact-match lookups."""
+    return ' '.join(query.lower().split())
+
+
+class SemanticCache:
+    """Similarity-threshold cache of search results keyed by query embeddings."""
+
+    def __init__(self, threshold: float = None, ttl_seconds: float = None, max_entries: int = None):
+        """Initialize an empty cache."""
+        self.threshold = float(threshold if threshold is not None else os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.92))
+        self.ttl_seconds = float(ttl_seconds if ttl_seconds is not None else os.getenv('SEMANTIC_CACHE_TTL', 3600))
+        self.max_entries = int(max_entries or os.getenv('SEMANTIC_CACHE_SIZE', 256))
+
+        self._lock = threading.Lock()
+        self._version: Optional[Hashable] = None
+
+        # Parallel per-entry arrays; rows of _vectors are L2-normalised query embeddings
+        self._vectors: Optional[np.ndarray] = None
+        self._created = np.zeros(self.max_entries, dtype=np.float64)
+        self._last_used = np.zeros(self.max_entries, dtype=np.float64)
+        self._params: List[Optional[Hashable]] = [None] * self.max_entries
+        self._results: List[Optional[List[Dict[str, Any]]]] = [None] * self.max_entries
+        self._texts: Dict[tuple, int] = {}
+        self._row_text: List[Optional[tuple]] = [None] * self.max_entries
+
+        self.stats = {
+            'lookups': 0,
+            'hits': 0,
+            'exact_hits': 0,
+            'evictions': 0,
+            'invalidations': 0
+        }
+
+    def __len__(self) -> int:
+        return sum(result is not None for result in self._results)
+
+    def _check_version(self, version: Hashable):
+        """Drop every entry if the collection changed since they were stored."""
+        if version != self._version:
+            if self._version is not None and len(self):
+                self.stats['invalidations'] += 1
+            self._clear()
+            self._version = version
+
+    def _clear(self):
+        self._vectors = None
+        self._params = [None] * self.max_entries
+        self._results = [None] * self.max_entries
+        self._row_text = [None] * self.max_entries
+        self._texts = {}
+
+    def _live(self, row: int, now: float) -> bool:
+        return self._results[row] is not None and now - self._created[row] <= self.ttl_seconds
+
+    def _hit(self, row: int, now: float) -> List[Dict[str, Any]]:
+        self._last_used[row] = now
+        self.stats['hits'] += 1
+        return [dict(result) for result in self._results[row]]
+
+    def get_exact(self, query: str, params: Hashable, version: Hashable) -> Optional[List[Dict[str, Any]]]:
+        """Results for the same query text, without needing its embedding."""
+        with self._lock:
+            self._check_version(version)
+            row = self._texts.get((normalize_query(query), params))
+            now = time.time()
+            if row is None or not self._live(row, now):
+                return None
+            self.stats['lookups'] += 1
+            self.stats['exact_hits'] += 1
+            return self._hit(row, now)
+
+    def get(self, embedding: np.ndarray, params: Hashable, version: Hashable) -> Optional[List[Dict[str, Any]]]:
+        """Results of the most similar cached query above the threshold, if any."""
+        with self._lock:
+            self._check_version(version)
+            self.stats['lookups'] += 1
+            if self._vectors is None:
+                return None
+
+            now = time.time()
+            query = np.asarray(embedding, dtype=np.float32)
+            query = query / (np.linalg.norm(query) or 1.0)
+            similarities = self._vectors @ query
+
+            for row in np.argsort(-similarities):
+                if similarities[row] < self.threshold:
+                    break
+                if self._params[row] == params and self._live(row, now):
+                    return self._hit(row, now)
+            return None
+
+    def put(
+        self,
+        query: str,
+        embedding: np.ndarray,
+        params: Hashable,
+        results: List[Dict[str, Any]],
+        version: Hashable
+    ):
+        """Store results for a query, evicting expired or least recently used entries."""
+        with self._lock:
+            self._check_version(version)
+            now = time.time()
+
+            vector = np.asarray(embedding, dtype=np.float32)
+            vector = vector / (np.linalg.norm(vector) or 1.0)
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+
+            free = [row for row in range(self.max_entries) if not self._live(row, now)]
+            if free:
+                row = free[0]
+            else:
+                row = int(np.argmin(self._last_used))
+                self.stats['evictions'] += 1
+
+            old_text = self._row_text[row]
+            if old_text is not None and self._texts.get(old_text) == row:
+                del self._texts[old_text]
+
+            text_key = (normalize_query(query), params)
+            self._vectors[row] = vector
+            self._created[row] = now
+            self._last_used[row] = now
+            self._params[row] = params
+            self._results[row] = [dict(result) for result in results]
+            self._row_text[row] = text_key
+            self._texts[text_key] = row
+
+    def invalidate(self):
+        """Drop all entries, e.g. after new documents were added."""
+        with self._lock:
+            if len(self):
+                self.stats['invalidations'] += 1
+            self._clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit-rate and occupancy statistics."""
+        lookups = self.stats['lookups']
+        return {
+            **self.stats,
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+            'entries': len(self),
+            'threshold': self.threshold
+        }
@@ -0,0 +1,138 @@
+"""
+Knowledge base snapshots for fast cold starts.
+Exports every stored chunk with its metadata, embedding and the embedding model ID
+into one compressed .npz file, and restores it into an empty store by bulk insert,
+so a fresh container never has to re-embed the transcripts.
+"""
+
+import os
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from dataclasses import dataclass
+from typing import List, Dict, Any
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+DEFAULT_SNAPSHOT_PATH = './data/kb_snapshot.npz'
+
+
+def get_snapshot_path() -> str:
+    """Configured snapshot location (KB_SNAPSHOT_PATH)."""
+    return os.getenv('KB_SNAPSHOT_PATH', DEFAULT_SNAPSHOT_PATH)
+
+
+def _json_array(value: Any) -> np.ndarray:
+    """Encode a JSON-serialisable value as a uint8 array for np.savez."""
+    return np.frombuffer(json.dumps(value).encode('utf-8'), dtype=np.uint8)
+
+
+def _from_json_array(array: np.ndarray) -> Any:
+    return json.loads(array.tobytes().decode('utf-8'))
+
+
+@dataclass
+class KnowledgeBaseSnapshot:
+    """Contents of a snapshot file."""
+    manifest: Dict[str, Any]
+    ids: List[str]
+    documents: List[str]
+    metadatas: List[Dict[str, Any]]
+    embeddings: np.ndarray
+
+
+def export_snapshot(knowledge_base, path: str = None, dtype: str = 'float32') -> Dict[str, Any]:
+    """Write all chunks of a knowledge base to a snapshot file; returns the manifest."""
+    path = Path(path or get_snapshot_path())
+    stored = knowledge_base.collection.get(include=["documents", "metadatas", "embeddings"])
+    embeddings = np.asarray(stored['embeddings'], dtype=dtype)
+    if embeddings.ndim != 2 or len(embeddings) != len(stored['ids']):
+        raise ValueError("Knowledge base is empty or returned inconsistent embeddings")
+
+    manifest = {
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'model_id': knowledge_base.embedding_model_name,
+        'dimension': int(embeddings.shape[1]),
+        'count': len(stored['ids']),
+        'dtype': embeddings.dtype.name,
+        'created_at': datetime.now().isoformat()
+    }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(
+            f,
+            manifest=_json_array(manifest),
+            ids=_json_array(stored['ids']),
+            documents=_json_array(stored['documents']),
+            metadatas=_json_array(stored['metadatas']),
+            embeddings=embeddings
+        )
+    tmp_path.replace(path)
+
+    logger.info(f"Exported {manifest['count']} chunks to snapshot {path}")
+    return manifest
+
+
+def read_snapshot(path: str = None) -> KnowledgeBaseSnapshot:
+    """Read and validate a snapshot file."""
+    path = Path(path or get_snapshot_path())
+    with np.load(path) as data:
+        manifest = _from_json_array(data['manifest'])
+        if manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {manifest.get('format_version')} in {path}")
+
+        snapshot = KnowledgeBaseSnapshot(
+            manifest=manifest,
+            ids=_from_json_array(data['ids']),
+            documents=_from_json_array(data['documents']),
+            metadatas=_from_json_array(data['metadatas']),
+            embeddings=data['embeddings']
+        )
+
+    counts = {len(snapshot.ids), len(snapshot.documents), len(snapshot.metadatas), manifest['count']}
+    if snapshot.embeddings.shape != (manifest['count'], manifest['dimension']) or len(counts) != 1:
+        raise ValueError(f"Snapshot {path} is inconsistent with its manifest")
+    return snapshot
+
+
+def import_snapshot(knowledge_base, path: str = None) -> int:
+    """Bulk-insert a snapshot into a knowledge base without loading the embedding model."""
+    snapshot = read_snapshot(path)
+
+    model_id = snapshot.manifest['model_id']
+    if model_id != knowledge_base.embedding_model_name:
+        raise ValueError(f"Snapshot was built with {model_id}, but the knowledge base is configured "
+                         f"for {knowledge_base.embedding_model_name}")
+
+    knowledge_base.add_embedded_chunks(snapshot.ids, snapshot.documents, snapshot.metadatas, snapshot.embeddings)
+
+    logger.info(f"Imported {len(snapshot.ids)} chunks from snapshot ({model_id}, "
+                f"created {snapshot.manifest.get('created_at')})")
+    return len(snapshot.ids)
+
+
+def restore_if_empty(knowledge_base, path: str = None) -> int:
+    """Load the snapshot into an empty knowledge base; returns the number of chunks restored."""
+    path = path or get_snapshot_path()
+    if not Path(path).exists():
+        return 0
+
+    try:
+        if knowledge_base.collection.count() > 0:
+            return 0
+        return import_snapshot(knowledge_base, path)
+    except Exception as e:
+        logger.error(f"Error restoring snapshot {path}: {e}")
+        return 0
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+OpenAI-compatible stand-in LLM server for offline load testing.
+Serves /v1/chat/completions (plain and streamed) with deterministic answers
+derived from the prompt, simulated time to first token and generation speed, and
+optional error injection, so the agent, the Agno workflow and the Streamlit app
+can be benchmarked without API spend or provider latency noise. Point the app at
+it with OPENAI_API_BASE=http://localhost:8001/v1.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Iterator
+
+from flask import Flask, Response, request, jsonify
+from waitress import serve
+from dotenv import load_dotenv
+
+# Add src directory to path for imports
+sys.path.append(str(Path(__file__).parent))
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Words the deterministic answers are drawn from
+VOCABULARY = (
+    "NVIDIA NIM microservices accelerate inference on GPUs with optimized engines . Retrieval augmented "
+    "generation grounds answers in course transcripts and blog articles , while TensorRT-LLM , Triton and "
+    "CUDA deliver low latency and high throughput for large language models . Developers deploy models "
+    "as containers , scale them with Kubernetes and evaluate responses against enterprise data ."
+).split()
+
+APPROX_CHARS_PER_TOKEN = 4
+
+
+def stub_tokens(messages: List[Dict[str, Any]], n_tokens: int) -> List[str]:
+    """Deterministic answer for a conversation, as a list of token strings."""
+    digest = hashlib.sha1(json.dumps(messages, sort_keys=True).encode('utf-8')).hexdigest()
+    rng = random.Random(int(digest[:16], 16))
+    tokens = [f"[stub {digest[:8]}]"]
+    while len(tokens) < n_tokens:
+        word = rng.choice(VOCABULARY)
+        tokens.append(word if word in ',.' else f" {word}")
+    return tokens[:n_tokens]
+
+
+class StubLLMServer:
+    """Flask server answering OpenAI chat completion requests with simulated latency."""
+
+    def __init__(self):
+        """Initialize from STUB_LLM_* environment variables."""
+        self.app = Flask(__name__)
+        self.port = int(os.getenv('STUB_LLM_PORT', 8001))
+        self.host = os.getenv('STUB_LLM_HOST', '127.0.0.1')
+        self.threads = int(os.getenv('STUB_LLM_THREADS', 64))
+
+        # Simulated provider behaviour
+        self.latency_ms = float(os.getenv('STUB_LLM_LATENCY_MS', 300))
+        self.jitter_ms = float(os.getenv('STUB_LLM_LATENCY_JITTER_MS', 0))
+        self.tokens_per_second = float(os.getenv('STUB_LLM_TOKENS_PER_SECOND', 50))
+        self.response_tokens = int(os.getenv('STUB_LLM_RESPONSE_TOKENS', 150))
+        self.error_rate = float(os.getenv('STUB_LLM_ERROR_RATE', 0))
+        self.error_status = int(os.getenv('STUB_LLM_ERROR_STATUS', 500))
+
+        # Seeded so a run with the same settings injects the same errors and jitter
+        self._rng = random.Random(int(os.getenv('STUB_LLM_SEED', 0)))
+        self._lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'streamed': 0,
+            'errors_injected': 0,
+            'completion_tokens': 0,
+            'in_flight': 0,
+            'max_in_flight': 0
+        }
+
+        self._setup_routes()
+        logger.info(f"Stub LLM server initialized on {self.host}:{self.port}")
+
+    def _setup_routes(self):
+        """Setup the OpenAI-compatible routes."""
+
+        @self.app.route('/health', methods=['GET'])
+        def health_check():
+            """Health check endpoint."""
+            return jsonify({
+                'status': 'healthy',
+                'timestamp': datetime.now().isoformat(),
+                'service': 'stub-llm'
+            })
+
+        @self.app.route('/stats', methods=['GET'])
+        def get_stats():
+            """Request counters, e.g. to check how many upstream calls a load test made."""
+            with self._lock:
+                return jsonify(dict(self.stats))
+
+        @self.app.route('/v1/models', methods=['GET'])
+        def list_models():
+            """Models the stub answers for; any requested model name is accepted."""
+            return jsonify({
+                'object': 'list',
+                'data': [{'id': os.getenv('OPENAI_MODEL', 'gpt-4'), 'object': 'model', 'owned_by': 'stub'}]
+            })
+
+        @self.app.route('/v1/chat/completions', methods=['POST'])
+        def chat_completions():
+            """OpenAI chat completion, streamed as server-sent events when requested."""
+            body = request.get_json(silent=True) or {}
+            messages = body.get('messages')
+            if not isinstance(messages, list) or not messages:
+                return self._error(400, "'messages' must be a non-empty list", 'invalid_request_error')
+
+            stream = bool(body.get('stream'))
+            with self._lock:
+                self.stats['requests'] += 1
+                self.stats['streamed'] += stream
+                inject_error = self._rng.random() < self.error_rate
+                delay = max(self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms), 0) / 1000
+                if inject_error:
+                    self.stats['errors_injected'] += 1
+
+            if inject_error:
+                time.sleep(delay)
+                return self._error(self.error_status, "Injected error from the stub LLM server", 'server_error')
+
+            max_tokens = body.get('max_tokens') or self.response_tokens
+            tokens = stub_tokens(messages, min(self.response_tokens, max_tokens))
+            finish_reason = 'length' if max_tokens < self.response_tokens else 'stop'
+            usage = {
+                'prompt_tokens': sum(len(str(m.get('content', ''))) for m in messages) // APPROX_CHARS_PER_TOKEN,
+                'completion_tokens': len(tokens)
+            }
+            usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+            completion = {
+                'id': f"chatcmpl-stub-{uuid.uuid4().hex[:12]}",
+                'created': int(time.time()),
+                'model': body.get('model', 'stub')
+            }
+
+            if stream:
+                include_usage = bool((body.get('stream_options') or {}).get('include_usage'))
+                return Response(
+                    self._tracked(self._stream(completion, tokens, finish_reason, delay, usage if include_usage else None)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'}
+                )
+
+            with self._tracking():
+                time.sleep(delay + self._generation_time(len(tokens)))
+            with self._lock:
+                self.stats['completion_tokens'] += len(tokens)
+            return jsonify({
+                **completion,
+                'object': 'chat.completion',
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                    'finish_reason': finish_reason
+                }],
+                'usage': usage
+            })
+
+    @staticmethod
+    def _error(status: int, message: str, error_type: str):
+        return jsonify({'error': {'message': message, 'type': error_type, 'param': None, 'code': None}}), status
+
+    def _generation_time(self, n_tokens: int) -> float:
+        return n_tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    @contextmanager
+    def _tracking(self) -> Iterator[None]:
+        """Count a request as in flight while it is being answered."""
+        with self._lock:
+            self.stats['in_flight'] += 1
+            self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stats['in_flight'] -= 1
+
+    def _tracked(self, events: Iterator[str]) -> Iterator[str]:
+        with self._tracking():
+            yield from events
+
+    def _stream(
+        self,
+        completion: Dict[str, Any],
+        tokens: List[str],
+        finish_reason: str,
+        delay: float,
+        usage: Dict[str, int] = None
+    ) -> Iterator[str]:
+        """Server-sent events: a role chunk, one chunk per token at the configured rate, then [DONE]."""
+        def event(delta: Dict[str, Any], finish: str = None, **extra) -> str:
+            chunk = {
+                **completion,
+                'object': 'chat.completion.chunk',
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish}],
+                **extra
+            }
+            return f"data: {json.dumps(chunk)}\n\n"
+
+        time.sleep(delay)
+        yield event({'role': 'assistant', 'content': ''})
+        interval = self._generation_time(1)
+        started = time.perf_counter()
+        for i, token in enumerate(tokens):
+            # Paced against the start time so sleep overhead does not slow the simulated rate
+            wait = started + i * interval - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            yield event({'content': token})
+        yield event({}, finish_reason)
+        if usage is not None:
+            yield f"data: {json.dumps({**completion, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})}\n\n"
+        yield "data: [DONE]\n\n"
+
+        with self._lock:
+            self.stats['completion_tokens'] += len(tokens)
+
+    def run(self, debug: bool = False):
+        """Run the stub server."""
+        if debug:
+            self.app.run(host=self.host, port=self.port, debug=True, threaded=True)
+        else:
+            logger.info(f"Running stub LLM server on {self.host}:{self.port} with {self.threads} threads")
+            serve(self.app, host=self.host, port=self.port, threads=self.threads)
+
+
+def main():
+    """Main function to run the stub LLM server."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='OpenAI-compatible stub LLM server for load testing')
+    parser.add_argument('--debug', action='store_true', help='Run in debug mode')
+    parser.add_argument('--port', type=int, default=int(os.getenv('STUB_LLM_PORT', 8001)), help='Port to run server on')
+    parser.add_argument('--host', default=os.getenv('STUB_LLM_HOST', '127.0.0.1'), help='Host to run server on')
+    parser.add_argument('--latency-ms', type=float, help='Time to first token in milliseconds')
+    parser.add_argument('--tokens-per-second', type=float, help='Generation speed (0 = instant)')
+    parser.add_argument('--error-rate', type=float, help='Share of requests answered with an error')
+
+    args = parser.parse_args()
+
+    # Override environment variables with command line args
+    os.environ['STUB_LLM_PORT'] = str(args.port)
+    os.environ['STUB_LLM_HOST'] = args.host
+    for name, value in [('STUB_LLM_LATENCY_MS', args.latency_ms),
+                        ('STUB_LLM_TOKENS_PER_SECOND', args.tokens_per_second),
+                        ('STUB_LLM_ERROR_RATE', args.error_rate)]:
+        if value is not None:
+            os.environ[name] = str(value)
+
+    server = StubLLMServer()
+
+    try:
+        server.run(debug=args.debug)
+    except KeyboardInterrupt:
+        logger.info("Stub LLM server stopped by user")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""
+Per-request tracing for the agent pipeline.
+Each query runs inside a trace whose spans time the pipeline stages (routing,
+knowledge base search, feed fetch, content extraction, prompt build, LLM call)
+and carry byte and token counts and cache-hit flags. Finished traces are kept in
+memory for the Streamlit analytics tab and can be exported to a JSONL file or,
+when the OpenTelemetry SDK is installed, to an OTLP collector.
+"""
+
+import os
+import json
+import atexit
+import time
+import queue
+import uuid
+import inspect
+import logging
+import functools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
+
+from dotenv import load_dotenv
+
+try:
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+except ImportError:  # OTLP export is optional
+    otel_trace = None
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# The trace and span that new spans are children of; contextvars follow async tasks automatically
+_current: contextvars.ContextVar[Optional[Tuple['Trace', 'Span']]] = contextvars.ContextVar(
+    'current_span', default=None
+)
+
+
+class Span:
+    """One timed stage of a request."""
+
+    def __init__(self, name: str, trace_id: str = None, parent_id: str = None, attributes: Dict[str, Any] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self._started = time.perf_counter()
+
+    def set(self, **attributes) -> 'Span':
+        """Add attributes, e.g. result counts or a cache hit."""
+        self.attributes.update(attributes)
+        return self
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000
+
+    def end(self):
+        if self.duration_ms is None:
+            self.duration_ms = self.elapsed_ms()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_time': self.start_time,
+            'duration_ms': self.duration_ms,
+            'error': self.error,
+            'attributes': self.attributes
+        }
+
+
+class Trace:
+    """Spans of one request, collected from every thread and task working on it."""
+
+    def __init__(self, name: str, attributes: Dict[str, Any] = None):
+        self.trace_id = uuid.uuid4().hex
+        self.root = Span(name, self.trace_id, None, attributes)
+        self.spans: List[Span] = []
+        self.finished = False
+        # Spans of background work that ended after the request did; counted, not kept
+        self.late_spans = 0
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            if self.finished:
+                self.late_spans += 1
+            else:
+                self.spans.append(span)
+
+    def finish(self):
+        with self._lock:
+            self.finished = True
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = [span.to_dict() for span in sorted(self.spans, key=lambda span: span.start_time)]
+            late_spans = self.late_spans
+        return {'trace_id': self.trace_id, **self.root.to_dict(), 'spans': spans, 'late_spans': late_spans}
+
+
+class JsonlExporter:
+    """Appends each finished trace as one JSON line."""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv('TRACE_JSONL_PATH', './data/traces.jsonl')
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, trace: Trace):
+        line = json.dumps(trace.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+class OtlpExporter:
+    """Re-emits finished traces as OpenTelemetry spans to an OTLP/HTTP collector."""
+
+    def __init__(self, endpoint: str = None):
+        """Endpoint and headers default to the standard OTEL_EXPORTER_OTLP_* variables."""
+        if otel_trace is None:
+            raise ImportError("OTLP trace export requires opentelemetry-sdk and opentelemetry-exporter-otlp")
+        provider = TracerProvider(
+            resource=Resource.create({'service.name': os.getenv('OTEL_SERVICE_NAME', 'nvidia-ai-agent')})
+        )
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+        self._tracer = provider.get_tracer(__name__)
+
+    @staticmethod
+    def _attributes(span: Span) -> Dict[str, Any]:
+        # OpenTelemetry attributes are primitives only
+        return {
+            key: value if isinstance(value, (bool, int, float, str)) else str(value)
+            for key, value in span.attributes.items() if value is not None
+        }
+
+    def export(self, trace: Trace):
+        emitted = {}
+        for span in [trace.root] + sorted(trace.spans, key=lambda span: span.start_time):
+            parent = emitted.get(span.parent_id)
+            start_ns = int(span.start_time * 1e9)
+            otel_span = self._tracer.start_span(
+                span.name,
+                context=otel_trace.set_span_in_context(parent) if parent is not None else None,
+                attributes=self._attributes(span),
+                start_time=start_ns
+            )
+            if span.error:
+                otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, span.error))
+            otel_span.end(end_time=start_ns + int((span.duration_ms or 0) * 1e6))
+            emitted[span.span_id] = otel_span
+
+
+class Tracer:
+    """Starts request traces, keeps the most recent ones and hands finished ones to exporters."""
+
+    def __init__(self, exporters: List[Any] = None, buffer_size: int = None):
+        """Initialize with the exporters named in TRACE_EXPORTERS (comma separated: jsonl, otlp)."""
+        self.enabled = os.getenv('TRACING_ENABLED', 'true').lower() == 'true'
+        self.recent: deque = deque(maxlen=int(buffer_size or os.getenv('TRACE_BUFFER_SIZE', 200)))
+        self.exporters = exporters if exporters is not None else self._configured_exporters()
+        # Exporters write files and make network calls, so they run on a background thread;
+        # when it falls this far behind, further traces are dropped from export
+        self._exports: queue.Queue = queue.Queue(maxsize=int(os.getenv('TRACE_EXPORT_QUEUE_SIZE', 1000)))
+        self._export_thread: Optional[threading.Thread] = None
+        self._export_lock = threading.Lock()
+        self.dropped_exports = 0
+
+    @staticmethod
+    def _configured_exporters() -> List[Any]:
+        exporters = []
+        for name in filter(None, (name.strip() for name in os.getenv('TRACE_EXPORTERS', '').lower().split(','))):
+            try:
+                if name == 'jsonl':
+                    exporters.append(JsonlExporter())
+                elif name == 'otlp':
+                    exporters.append(OtlpExporter())
+                else:
+                    logger.warning(f"Unknown trace exporter: {name}")
+            except Exception as e:
+                logger.error(f"Error setting up {name} trace exporter: {e}")
+        return exporters
+
+    @contextmanager
+    def trace(self, name: str, **attributes) -> Iterator[Span]:
+        """Trace a request; spans opened inside, in any thread or task it hands work to, belong to it."""
+        if not self.enabled:
+            root = Span(name, attributes=attributes)
+            try:
+                yield root
+            finally:
+                root.end()
+            return
+
+        trace = Trace(name, attributes)
+        token = _current.set((trace, trace.root))
+        try:
+            yield trace.root
+        except Exception as e:
+            trace.root.error = repr(e)
+            raise
+        finally:
+            trace.root.end()
+            try:
+                _current.reset(token)
+            except ValueError:
+                # A streaming generator closed from another context; the variable dies with that context
+                pass
+            self._finish(trace)
+
+    def _finish(self, trace: Trace):
+        trace.finish()
+        self.recent.append(trace)
+        if not self.exporters:
+            return
+        if self._export_thread is None:
+            with self._export_lock:
+                if self._export_thread is None:
+                    self._export_thread = threading.Thread(target=self._export_loop, name='trace-export', daemon=True)
+                    self._export_thread.start()
+        try:
+            self._exports.put_nowait(trace)
+        except queue.Full:
+            self.dropped_exports += 1
+            logger.warning(f"Trace export queue is full, dropped trace {trace.trace_id}")
+
+    def _export_loop(self):
+        while True:
+            trace = self._exports.get()
+            try:
+                for exporter in self.exporters:
+                    try:
+                        exporter.export(trace)
+                    except Exception as e:
+                        logger.error(f"Error exporting trace with {type(exporter).__name__}: {e}")
+            finally:
+                self._exports.task_done()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every finished trace has been exported; returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self._exports.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def recent_traces(self, limit: int = None, **attributes) -> List[Dict[str, Any]]:
+        """Most recent traces first, optionally only those with matching root attributes."""
+        traces = [
+            trace.to_dict() for trace in reversed(self.recent)
+            if all(trace.root.attributes.get(key) == value for key, value in attributes.items())
+        ]
+        return traces[:limit] if limit else traces
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """Time a stage of the current request; outside a trace the span is not recorded."""
+    current = _current.get()
+    if current is None:
+        detached = Span(name, attributes=attributes)
+        try:
+            yield detached
+        finally:
+            detached.end()
+        return
+
+    trace, parent = current
+    child = Span(name, trace.trace_id, parent.span_id, attributes)
+    token = _current.set((trace, child))
+    try:
+        yield child
+    except Exception as e:
+        child.error = repr(e)
+        raise
+    finally:
+        child.end()
+        try:
+            _current.reset(token)
+        except ValueError:
+            pass
+        trace.add(child)
+
+
+def annotate(**attributes):
+    """Add attributes to the innermost open span, if any."""
+    current = _current.get()
+    if current is not None:
+        current[1].set(**attributes)
+
+
+def annotate_trace(**attributes):
+    """Add attributes to the root span of the current request, if any."""
+    current = _current.get()
+    if current is not None:
+        current[0].root.set(**attributes)
+
+
+class _ContextStep:
+    """Awaitable driving a coroutine inside a given context, one step at a time."""
+
+    def __init__(self, coroutine: Any, context: contextvars.Context):
+        self.coroutine = coroutine
+        self.context = context
+
+    def __await__(self):
+        send, value = self.coroutine.send, None
+        while True:
+            try:
+                yielded = self.context.run(send, value)
+            except StopIteration as e:
+                return e.value
+            try:
+                send, value = self.coroutine.send, (yield yielded)
+            except GeneratorExit:
+                self.context.run(self.coroutine.close)
+                raise
+            except BaseException as e:
+                send, value = self.coroutine.throw, e
+
+
+def own_context(fn: Callable) -> Callable:
+    """
+    Run a generator (or async generator) function in a context of its own.
+    A trace opened inside a streaming generator would otherwise stay current in the
+    consumer between yields, so the consumer's own spans would be recorded under it.
+    """
+    if inspect.isasyncgenfunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            context = contextvars.copy_context()
+            generator = context.run(fn, *args, **kwargs)
+            try:
+                while True:
+                    try:
+                        item = await _ContextStep(generator.__anext__(), context)
+                    except StopAsyncIteration:
+                        return
+                    yield item
+            finally:
+                await _ContextStep(generator.aclose(), context)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        context = contextvars.copy_context()
+        generator = context.run(fn, *args, **kwargs)
+        try:
+            while True:
+                try:
+                    item = context.run(next, generator)
+                except StopIteration:
+                    return
+                yield item
+        finally:
+            context.run(generator.close)
+    return wrapper
+
+
+def propagate(fn: Callable) -> Callable:
+    """Bind a callable to the current trace so spans it opens in a worker thread are recorded."""
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer()
+                # Traces still queued for export at interpreter exit would be lost with the daemon thread
+                atexit.register(_tracer.flush)
+    return _tracer
@@ -0,0 +1,409 @@
+"""
+Memory-mapped local vector index for the knowledge base.
+Stores L2-normalised embeddings in a NumPy .npy file opened with mmap and keeps
+documents and metadata in an append-only JSONL sidecar, so retrieval needs no
+database service. Adding vectors appends to both files instead of rewriting them;
+the files are rewritten only when superseded sidecar records pile up.
+"""
+
+import os
+import json
+import struct
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from partitions import PartitionIndex, SearchFilters
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 2
+
+# Rewrite the files once the sidecar holds this many times more records than rows
+COMPACT_RATIO = 2
+
+# .npy magic, version and header length; spare header bytes let the row count grow in place
+NPY_PREFIX_BYTES = 10
+NPY_HEADER_ROOM = 24
+
+# float16 halves the file and page-cache footprint, but has no BLAS kernel, so each
+# query upcasts blocks of this many rows to float32. float32 is the low-latency default.
+FLOAT16_BLOCK_ROWS = 8192
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise each row, leaving all-zero rows untouched."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class MmapVectorIndex:
+    """
+    Flat cosine-similarity index over a memory-mapped embedding matrix.
+    Exposes the subset of the ChromaDB collection API used by the knowledge base
+    (add, query, get, count, name), so it can be swapped in as a backend.
+    """
+
+    EMBEDDINGS_FILE = "embeddings.npy"
+    SIDECAR_FILE = "metadata.jsonl"
+    LEGACY_SIDECAR_FILE = "metadata.json"
+
+    def __init__(self, path: str, name: str = "nvidia_transcripts", dtype: str = None):
+        """Open (or create) the index stored in the given directory."""
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.name = name
+        self.dtype = np.dtype(dtype or os.getenv('VECTOR_INDEX_DTYPE', 'float32'))
+        if self.dtype not in (np.float16, np.float32):
+            raise ValueError(f"Unsupported index dtype: {self.dtype}")
+
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._embeddings: Optional[np.ndarray] = None
+        self._sidecar_records = 0
+        self.partitions = PartitionIndex()
+
+        self._open()
+
+    @property
+    def embeddings_file(self) -> Path:
+        return self.path / self.EMBEDDINGS_FILE
+
+    @property
+    def sidecar_file(self) -> Path:
+        return self.path / self.SIDECAR_FILE
+
+    def _open(self):
+        """Memory-map the embedding matrix and replay the metadata sidecar."""
+        legacy_sidecar = self.path / self.LEGACY_SIDECAR_FILE
+        if not self.embeddings_file.exists() or not (self.sidecar_file.exists() or legacy_sidecar.exists()):
+            return
+
+        needs_rewrite = not self.sidecar_file.exists()
+        if self.sidecar_file.exists():
+            needs_rewrite = not self._replay_sidecar()
+        else:
+            with open(legacy_sidecar, 'r', encoding='utf-8') as f:
+                sidecar = json.load(f)
+            if sidecar.get('format_version') != 1:
+                raise ValueError(
+                    f"Unsupported vector index format {sidecar.get('format_version')} in {self.path}"
+                )
+            self.ids = sidecar['ids']
+            self.documents = sidecar['documents']
+            self.metadatas = sidecar['metadatas']
+
+        self._map()
+        embeddings = self._embeddings
+        if len(embeddings) < len(self.ids):
+            raise ValueError(f"Vector index at {self.path} is inconsistent: "
+                             f"{len(embeddings)} vectors, {len(self.ids)} ids")
+
+        # Rows past the sidecar were appended by an add that did not finish; they are overwritten next time
+        self._embeddings = embeddings[:len(self.ids)]
+        self.dtype = embeddings.dtype
+        self._id_to_row = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self.partitions.add(self.ids, self.metadatas)
+
+        if needs_rewrite:
+            # Converts a format 1 index, or drops a torn record so later appends start on a clean line
+            self._compact()
+            if legacy_sidecar.exists():
+                logger.info(f"Converted vector index at {self.path} to format {INDEX_FORMAT_VERSION}")
+                legacy_sidecar.unlink()
+
+        logger.info(f"Opened vector index with {len(self.ids)} vectors from {self.path}")
+
+    def _replay_sidecar(self) -> bool:
+        """Rebuild ids, documents and metadata from the sidecar log; False if it ends in a torn record."""
+        with open(self.sidecar_file, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            if header.get('format_version') != INDEX_FORMAT_VERSION:
+                raise ValueError(
+                    f"Unsupported vector index format {header.get('format_version')} in {self.path}"
+                )
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from an interrupted add; the vectors it described are ignored
+                    logger.warning(f"Ignoring incomplete record at the end of {self.sidecar_file}")
+                    return False
+                row = record.get('row')
+                if row is None:
+                    self.ids.append(record['id'])
+                    self.documents.append(record['document'])
+                    self.metadatas.append(record['metadata'])
+                else:
+                    self.documents[row] = record['document']
+                    self.metadatas[row] = record['metadata']
+                self._sidecar_records += 1
+        return True
+
+    def _npy_header(self, n_rows: int, dim: int, size: int = None) -> Optional[bytes]:
+        """
+        .npy (v1.0) header for an (n_rows, dim) matrix, padded to size bytes, or by default
+        with room for the row count to grow. None when it does not fit in size bytes.
+        """
+        text = repr({
+            'descr': np.lib.format.dtype_to_descr(self.dtype),
+            'fortran_order': False,
+            'shape': (n_rows, dim)
+        }).encode('latin1')
+        if size is None:
+            size = -(-(NPY_PREFIX_BYTES + len(text) + NPY_HEADER_ROOM + 1) // 64) * 64
+        room = size - NPY_PREFIX_BYTES - 1
+        if len(text) > room:
+            return None
+        return np.lib.format.magic(1, 0) + struct.pack('<H', size - NPY_PREFIX_BYTES) + text.ljust(room) + b'\n'
+
+    def _map(self):
+        """Memory-map the embedding file."""
+        with open(self.embeddings_file, 'rb') as f:
+            version = np.lib.format.read_magic(f)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, _, dtype = read_header(f)
+        if shape[0] == 0:
+            # An empty region cannot be mapped
+            self._embeddings = np.empty(shape, dtype=dtype)
+        else:
+            self._embeddings = np.load(self.embeddings_file, mmap_mode='r')
+
+    def _compact(self, rows: Optional[np.ndarray] = None):
+        """
+        Atomically rewrite the embedding file and sidecar with one record per row, then remap.
+        With rows, only those rows of the current matrix are kept (ids and documents must already match).
+        """
+        tmp_embeddings = self.embeddings_file.with_suffix('.tmp.npy')
+        tmp_sidecar = self.sidecar_file.with_suffix('.tmp')
+        rows = np.arange(len(self._embeddings)) if rows is None else rows
+
+        with open(tmp_embeddings, 'wb') as f:
+            f.write(self._npy_header(len(rows), self._embeddings.shape[1]))
+            # Copied in blocks so the index is never loaded into memory whole
+            for start in range(0, len(rows), FLOAT16_BLOCK_ROWS):
+                block = self._embeddings[rows[start:start + FLOAT16_BLOCK_ROWS]]
+                f.write(np.ascontiguousarray(block, dtype=self.dtype).tobytes())
+
+        with open(tmp_sidecar, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'format_version': INDEX_FORMAT_VERSION,
+                'name': self.name,
+                'dimension': int(self._embeddings.shape[1]),
+                'dtype': self.dtype.name
+            }) + '\n')
+            for doc_id, document, metadata in zip(self.ids, self.documents, self.metadatas):
+                f.write(json.dumps({'id': doc_id, 'document': document, 'metadata': metadata}) + '\n')
+
+        # Drop the old mapping before replacing the file underneath it
+        self._embeddings = None
+        os.replace(tmp_embeddings, self.embeddings_file)
+        os.replace(tmp_sidecar, self.sidecar_file)
+        self._map()
+        self._sidecar_records = len(self.ids)
+
+    def _write_rows(self, updates: Dict[int, np.ndarray], appended: np.ndarray) -> bool:
+        """
+        Overwrite replaced rows in place and append new ones after the last row, updating the
+        row count in the .npy header. Returns False when the header has no room to grow.
+        """
+        n_rows, dim = self._embeddings.shape
+        row_bytes = dim * self.dtype.itemsize
+        with open(self.embeddings_file, 'r+b') as f:
+            if np.lib.format.read_magic(f) != (1, 0):
+                return False
+            np.lib.format.read_array_header_1_0(f)
+            data_offset = f.tell()
+            header = self._npy_header(n_rows + len(appended), dim, size=data_offset)
+            if header is None:
+                return False
+
+            for row, vector in updates.items():
+                f.seek(data_offset + row * row_bytes)
+                f.write(np.ascontiguousarray(vector, dtype=self.dtype).tobytes())
+            if len(appended):
+                f.seek(data_offset + n_rows * row_bytes)
+                f.write(np.ascontiguousarray(appended, dtype=self.dtype).tobytes())
+                # Drops rows left behind by an interrupted add
+                f.truncate()
+                f.seek(0)
+                f.write(header)
+
+        if len(appended):
+            self._embeddings = None
+            self._map()
+        return True
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """
+        Add or replace vectors; existing ids are overwritten in place and a repeated id keeps
+        its last entry. New vectors are appended to the files rather than rewriting them.
+        """
+        new_vectors = normalize_rows(embeddings)
+
+        if self._embeddings is not None and new_vectors.shape[1] != self._embeddings.shape[1]:
+            raise ValueError(f"Embedding dimension {new_vectors.shape[1]} does not match "
+                             f"index dimension {self._embeddings.shape[1]}")
+
+        # Last occurrence of each id wins
+        positions = list({doc_id: i for i, doc_id in enumerate(ids)}.values())
+        ids = [ids[i] for i in positions]
+        documents = [documents[i] for i in positions]
+        metadatas = [metadatas[i] for i in positions]
+        new_vectors = new_vectors[positions]
+
+        if self._embeddings is None:
+            self._embeddings = np.empty((0, new_vectors.shape[1]), dtype=self.dtype)
+            self._compact()
+
+        updates: Dict[int, np.ndarray] = {}
+        appended, records = [], []
+        for doc_id, vector, document, metadata in zip(ids, new_vectors, documents, metadatas):
+            row = self._id_to_row.get(doc_id)
+            if row is not None:
+                updates[row] = vector
+                records.append({'row': row, 'document': document, 'metadata': metadata})
+            else:
+                appended.append(vector)
+                records.append({'id': doc_id, 'document': document, 'metadata': metadata})
+        appended = np.asarray(appended, dtype=np.float32).reshape(-1, new_vectors.shape[1])
+
+        if not self._write_rows(updates, appended):
+            # Written by another version without room in the header; a rewrite adds it
+            self._compact()
+            self._write_rows(updates, appended)
+
+        for record in records:
+            row = record.get('row')
+            if row is None:
+                self._id_to_row[record['id']] = len(self.ids)
+                self.ids.append(record['id'])
+                self.documents.append(record['document'])
+                self.metadatas.append(record['metadata'])
+            else:
+                self.documents[row] = record['document']
+                self.metadatas[row] = record['metadata']
+
+        # Appending to the sidecar commits the add; vectors past the last record are ignored on open
+        with open(self.sidecar_file, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(record) + '\n' for record in records))
+        self._sidecar_records += len(records)
+        if self._sidecar_records > COMPACT_RATIO * len(self.ids):
+            self._compact()
+
+        self.partitions.add(ids, metadatas)
+
+    def delete(self, ids: List[str] = None, **kwargs):
+        """Chroma-compatible delete by ids; the remaining rows are rewritten without them."""
+        doomed = {doc_id for doc_id in ids or [] if doc_id in self._id_to_row}
+        if not doomed:
+            return
+
+        keep = [row for row, doc_id in enumerate(self.ids) if doc_id not in doomed]
+        self.ids = [self.ids[row] for row in keep]
+        self.documents = [self.documents[row] for row in keep]
+        self.metadatas = [self.metadatas[row] for row in keep]
+        self._id_to_row = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self._compact(np.asarray(keep, dtype=np.int64))
+
+        # Rows are renumbered, so the partitions are rebuilt
+        self.partitions = PartitionIndex()
+        self.partitions.add(self.ids, self.metadatas)
+
+    def _scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cosine similarity of a normalised query against every stored vector (or the given rows)."""
+        n_rows = len(self._embeddings) if rows is None else len(rows)
+        if self.dtype == np.float32:
+            matrix = self._embeddings if rows is None else self._embeddings[rows]
+            return matrix @ query
+
+        # Upcast in blocks, one matmul per block
+        scores = np.empty(n_rows, dtype=np.float32)
+        for start in range(0, n_rows, FLOAT16_BLOCK_ROWS):
+            block = (
+                self._embeddings[start:start + FLOAT16_BLOCK_ROWS] if rows is None
+                else self._embeddings[rows[start:start + FLOAT16_BLOCK_ROWS]]
+            )
+            block = np.asarray(block, dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+        return scores
+
+    def top_k(self, query_embedding: List[float], k: int, rows: Optional[np.ndarray] = None) -> List[tuple]:
+        """Return (row, similarity) pairs for the k most similar vectors, optionally within rows."""
+        if self._embeddings is None or k <= 0 or (rows is not None and len(rows) == 0):
+            return []
+
+        query = normalize_rows(query_embedding)[0]
+        scores = self._scores(query, rows)
+
+        k = min(k, len(scores))
+        if k < len(scores):
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(len(scores))
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+        row_ids = order if rows is None else rows[order]
+        return [(int(row), float(score)) for row, score in zip(row_ids, scores[order])]
+
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 5,
+        include: List[str] = None,
+        filters: SearchFilters = None,
+        **kwargs
+    ) -> Dict[str, List[List[Any]]]:
+        """
+        Chroma-compatible query; distances are cosine distances (1 - similarity).
+        With filters, only rows in the precomputed partition for that scope are scored.
+        """
+        results = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+        rows = self.partitions.rows(filters)
+
+        for query_embedding in query_embeddings:
+            hits = self.top_k(query_embedding, n_results, rows)
+            results['ids'].append([self.ids[row] for row, _ in hits])
+            results['documents'].append([self.documents[row] for row, _ in hits])
+            results['metadatas'].append([self.metadatas[row] for row, _ in hits])
+            results['distances'].append([1.0 - score for _, score in hits])
+
+        return results
+
+    def get(self, ids: List[str] = None, include: List[str] = None, **kwargs) -> Dict[str, List[Any]]:
+        """Chroma-compatible get by ids (or everything when ids is None)."""
+        rows = (
+            range(len(self.ids)) if ids is None
+            else [self._id_to_row[doc_id] for doc_id in ids if doc_id in self._id_to_row]
+        )
+        results = {
+            'ids': [self.ids[row] for row in rows],
+            'documents': [self.documents[row] for row in rows],
+            'metadatas': [self.metadatas[row] for row in rows]
+        }
+        if include and 'embeddings' in include:
+            results['embeddings'] = (
+                np.asarray(self._embeddings[list(rows)], dtype=np.float32)
+                if self._embeddings is not None else np.empty((0, 0), dtype=np.float32)
+            )
+        return results
+
+    def count(self) -> int:
+        """Number of vectors in the index."""
+        return len(self.ids)
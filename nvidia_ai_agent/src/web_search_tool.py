@@ -3,17 +3,21 @@ Web search tool for NVIDIA Developer Blog and NVIDIA Blog.
 This module provides functionality to search and retrieve current information from NVIDIA's official blogs.
 """
 
-import re
+import time
+import asyncio
 import logging
-import requests
 from typing import List, Dict, Any, Optional
-from urllib.parse import urlencode, urlparse, parse_qs
-from bs4 import BeautifulSoup
-import feedparser
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import os
 
+from lexical_index import bm25_scores
+from http_client import get_http_session, get_timeouts, close_async_session
+from feed_cache import get_feed_cache
+from blog_index import BlogIndex, get_blog_index
+from article_cache import ArticleCache, get_article_cache
+from tracing import propagate
+
 # Load environment variables
 load_dotenv()
 
@@ -25,15 +29,21 @@ logger = logging.getLogger(__name__)
 class NVIDIABlogSearchTool:
     """Tool for searching NVIDIA Developer Blog and NVIDIA Blog for current information."""
     
-    def __init__(self):
-        """Initialize the NVIDIA blog search tool."""
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+    def __init__(self, blog_index: BlogIndex = None, article_cache: ArticleCache = None):
+        """Initialize the NVIDIA blog search tool, optionally with a specific article index and cache."""
+        # Pooled keep-alive session shared by every tool in the process
+        self.session = get_http_session()
+        # Parsed feeds are shared too and refreshed in the background
+        self.feed_cache = get_feed_cache()
+        # Local index over feed history and the scraped archive; the shared one opens on first search
+        self._blog_index = blog_index
+        # Extracted article text, shared with the webhook server; opened on first use
+        self._article_cache = article_cache
         
-        self.timeout = int(os.getenv('SEARCH_TIMEOUT', 30))
+        self.connect_timeout, read_timeout = get_timeouts()
+        self.timeout = int(read_timeout)
         self.max_results = int(os.getenv('MAX_SEARCH_RESULTS', 5))
+        self.content_top_k = int(os.getenv('CONTENT_EXTRACTION_TOP_K', 2))
         
         # NVIDIA blog URLs and RSS feeds
         self.nvidia_blogs = {
@@ -41,173 +51,212 @@ class NVIDIABlogSearchTool:
                 'base_url': 'https://developer.nvidia.com',
                 'blog_url': 'https://developer.nvidia.com/blog',
                 'rss_feed': 'https://developer.nvidia.com/blog/feed',
-                'search_url': 'https://developer.nvidia.com/search/site'
+                'search_url': 'https://developer.nvidia.com/search/site',
+                'source_name': 'NVIDIA Developer Blog'
             },
             'main': {
                 'base_url': 'https://blogs.nvidia.com',
                 'blog_url': 'https://blogs.nvidia.com',
                 'rss_feed': 'https://blogs.nvidia.com/feed',
-                'search_url': 'https://blogs.nvidia.com/search'
+                'search_url': 'https://blogs.nvidia.com/search',
+                'source_name': 'NVIDIA Blog'
             }
         }
     
-    def search_nvidia_developer_blog(self, query: str, max_results: int = None) -> List[Dict[str, Any]]:
-        """Search NVIDIA Developer Blog for relevant articles."""
-        max_results = max_results or self.max_results
+    @property
+    def blog_index(self) -> BlogIndex:
+        """Local article index used for ranking."""
+        if self._blog_index is None:
+            self._blog_index = get_blog_index()
+        return self._blog_index
+    
+    @property
+    def article_cache(self) -> ArticleCache:
+        """Cache of extracted article text."""
+        if self._article_cache is None:
+            self._article_cache = get_article_cache()
+        return self._article_cache
+    
+    @property
+    def feed_deadline(self) -> float:
+        """Upper bound in seconds on fetching all feeds, concurrently."""
+        return self.connect_timeout + self.timeout
+    
+    async def aclose(self):
+        """Close this event loop's shared aiohttp session, e.g. before the loop is shut down."""
+        await close_async_session()
+    
+    def prefetch_feeds(self):
+        """Start downloading both feeds in the background, e.g. at application startup."""
+        self.feed_cache.prefetch([blog['rss_feed'] for blog in self.nvidia_blogs.values()])
+    
+    def _fetch_feeds(self, blog_types: List[str]) -> Dict[str, List[Any]]:
+        """Parsed entries per blog from the feed cache; only cold feeds are downloaded, concurrently."""
+        urls = {blog_type: self.nvidia_blogs[blog_type]['rss_feed'] for blog_type in blog_types}
+        feeds = self.feed_cache.get_many(list(urls.values()), timeout=self.feed_deadline)
+        return {blog_type: feeds[url] for blog_type, url in urls.items() if url in feeds}
+    
+    async def _fetch_feeds_async(self, blog_types: List[str]) -> Dict[str, List[Any]]:
+        """Async variant of _fetch_feeds."""
+        urls = {blog_type: self.nvidia_blogs[blog_type]['rss_feed'] for blog_type in blog_types}
+        feeds = await self.feed_cache.get_many_async(list(urls.values()), timeout=self.feed_deadline)
+        return {blog_type: feeds[url] for blog_type, url in urls.items() if url in feeds}
+    
+    def _rank_entries(self, query: str, entries: List[Any], blog_type: str, max_results: int) -> List[Dict[str, Any]]:
+        """Rank recent feed entries by BM25 relevance over title and summary."""
         results = []
+        entries = entries[:20]  # Check recent 20 entries
+        scores = bm25_scores(query, [
+            f"{entry.get('title', '')} {entry.get('summary', '')}" for entry in entries
+        ])
         
-        try:
-            # First try RSS feed for recent articles
-            logger.info(f"Searching NVIDIA Developer Blog for: {query}")
-            
-            # Parse RSS feed
-            feed_url = self.nvidia_blogs['developer']['rss_feed']
-            feed = feedparser.parse(feed_url)
-            
-            # Filter entries by query relevance
-            for entry in feed.entries[:20]:  # Check recent 20 entries
-                title = entry.get('title', '')
-                summary = entry.get('summary', '')
-                content = f"{title} {summary}".lower()
-                
-                # Simple relevance check
-                query_words = query.lower().split()
-                relevance_score = sum(1 for word in query_words if word in content)
+        for entry, relevance_score in zip(entries, scores):
+            if relevance_score > 0:
+                published = entry.get('published_parsed')
+                pub_date = datetime(*published[:6]) if published else datetime.now()
                 
-                if relevance_score > 0:
-                    published = entry.get('published_parsed')
-                    pub_date = datetime(*published[:6]) if published else datetime.now()
-                    
-                    results.append({
-                        'title': title,
-                        'url': entry.get('link', ''),
-                        'summary': summary,
-                        'published_date': pub_date.strftime('%Y-%m-%d'),
-                        'source': 'NVIDIA Developer Blog',
-                        'relevance_score': relevance_score
-                    })
-            
-            # Sort by relevance and recency
-            results.sort(key=lambda x: (x['relevance_score'], x['published_date']), reverse=True)
-            
-        except Exception as e:
-            logger.error(f"Error searching NVIDIA Developer Blog: {e}")
+                results.append({
+                    'title': entry.get('title', ''),
+                    'url': entry.get('link', ''),
+                    'summary': entry.get('summary', ''),
+                    'published_date': pub_date.strftime('%Y-%m-%d'),
+                    'source': self.nvidia_blogs[blog_type]['source_name'],
+                    'relevance_score': float(relevance_score)
+                })
         
+        # Sort by relevance and recency
+        results.sort(key=lambda x: (x['relevance_score'], x['published_date']), reverse=True)
         return results[:max_results]
     
-    def search_nvidia_main_blog(self, query: str, max_results: int = None) -> List[Dict[str, Any]]:
-        """Search NVIDIA main blog for relevant articles."""
-        max_results = max_results or self.max_results
-        results = []
-        
+    def _search_index(
+        self,
+        query: str,
+        feeds: Dict[str, List[Any]],
+        blog_types: List[str],
+        max_results: int
+    ) -> List[List[Dict[str, Any]]]:
+        """Per-blog results from the local index after adding any refreshed feed entries."""
         try:
-            logger.info(f"Searching NVIDIA Main Blog for: {query}")
-            
-            # Parse RSS feed
-            feed_url = self.nvidia_blogs['main']['rss_feed']
-            feed = feedparser.parse(feed_url)
-            
-            # Filter entries by query relevance
-            for entry in feed.entries[:20]:  # Check recent 20 entries
-                title = entry.get('title', '')
-                summary = entry.get('summary', '')
-                content = f"{title} {summary}".lower()
-                
-                # Simple relevance check
-                query_words = query.lower().split()
-                relevance_score = sum(1 for word in query_words if word in content)
-                
-                if relevance_score > 0:
-                    published = entry.get('published_parsed')
-                    pub_date = datetime(*published[:6]) if published else datetime.now()
-                    
-                    results.append({
-                        'title': title,
-                        'url': entry.get('link', ''),
-                        'summary': summary,
-                        'published_date': pub_date.strftime('%Y-%m-%d'),
-                        'source': 'NVIDIA Blog',
-                        'relevance_score': relevance_score
-                    })
-            
-            # Sort by relevance and recency
-            results.sort(key=lambda x: (x['relevance_score'], x['published_date']), reverse=True)
+            for blog_type, entries in feeds.items():
+                blog = self.nvidia_blogs[blog_type]
+                version = self.feed_cache.get_version(blog['rss_feed'])
+                self.blog_index.index_feed(blog['rss_feed'], entries, version, blog['source_name'])
+            self.blog_index.sync_archive_if_due()
             
+            return [
+                self.blog_index.search(query, max_results, source=self.nvidia_blogs[blog_type]['source_name'])
+                for blog_type in blog_types
+            ]
         except Exception as e:
-            logger.error(f"Error searching NVIDIA Main Blog: {e}")
-        
-        return results[:max_results]
+            # Still answer from the in-memory feed entries if the index is unavailable
+            logger.error(f"Error searching local blog index: {e}")
+            return [
+                self._rank_entries(query, feeds.get(blog_type, []), blog_type, max_results)
+                for blog_type in blog_types
+            ]
     
-    def get_article_content(self, url: str) -> Optional[str]:
-        """Extract full content from an NVIDIA blog article."""
+    def _search_blog(self, blog_type: str, query: str, max_results: int = None) -> List[Dict[str, Any]]:
+        """Search one blog for relevant articles."""
+        source_name = self.nvidia_blogs[blog_type]['source_name']
         try:
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Common content selectors for NVIDIA blogs
-            content_selectors = [
-                '.post-content',
-                '.entry-content', 
-                '.article-content',
-                '.content',
-                'main article',
-                '.post-body'
-            ]
-            
-            content = None
-            for selector in content_selectors:
-                content_elem = soup.select_one(selector)
-                if content_elem:
-                    content = content_elem.get_text(separator=' ', strip=True)
-                    break
-            
-            if not content:
-                # Fallback: get all paragraph text
-                paragraphs = soup.find_all('p')
-                content = ' '.join([p.get_text(strip=True) for p in paragraphs])
-            
-            return content[:2000] if content else None  # Limit content length
-            
+            logger.info(f"Searching {source_name} for: {query}")
+            feeds = self._fetch_feeds([blog_type])
+            return self._search_index(query, feeds, [blog_type], max_results or self.max_results)[0]
         except Exception as e:
-            logger.error(f"Error extracting content from {url}: {e}")
-            return None
+            logger.error(f"Error searching {source_name}: {e}")
+            return []
     
-    def search_both_blogs(self, query: str, max_results_per_blog: int = 3) -> List[Dict[str, Any]]:
-        """Search both NVIDIA Developer Blog and NVIDIA main blog."""
-        all_results = []
-        
-        # Search developer blog
-        dev_results = self.search_nvidia_developer_blog(query, max_results_per_blog)
-        all_results.extend(dev_results)
-        
-        # Search main blog
-        main_results = self.search_nvidia_main_blog(query, max_results_per_blog)
-        all_results.extend(main_results)
-        
-        # Remove duplicates and sort by relevance
+    def search_nvidia_developer_blog(self, query: str, max_results: int = None) -> List[Dict[str, Any]]:
+        """Search NVIDIA Developer Blog for relevant articles."""
+        return self._search_blog('developer', query, max_results)
+    
+    def search_nvidia_main_blog(self, query: str, max_results: int = None) -> List[Dict[str, Any]]:
+        """Search NVIDIA main blog for relevant articles."""
+        return self._search_blog('main', query, max_results)
+    
+    def get_article_content(self, url: str) -> Optional[str]:
+        """Extract full content from an NVIDIA blog article, served from the article cache when possible."""
+        content = self.article_cache.fetch(url, timeout=self.feed_deadline)
+        return content[:2000] if content else None  # Limit content length
+    
+    def _merge_results(self, result_lists: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Remove duplicate URLs across blogs and sort by relevance and date."""
         seen_urls = set()
         unique_results = []
-        for result in all_results:
-            if result['url'] not in seen_urls:
-                seen_urls.add(result['url'])
-                unique_results.append(result)
+        for results in result_lists:
+            for result in results:
+                if result['url'] not in seen_urls:
+                    seen_urls.add(result['url'])
+                    unique_results.append(result)
         
-        # Sort by relevance score and date
         unique_results.sort(key=lambda x: (x['relevance_score'], x['published_date']), reverse=True)
-        
         return unique_results[:self.max_results]
     
-    def search_with_content_extraction(self, query: str, extract_full_content: bool = False) -> List[Dict[str, Any]]:
-        """Search blogs and optionally extract full content from top results."""
+    def search_both_blogs(self, query: str, max_results_per_blog: int = 3) -> List[Dict[str, Any]]:
+        """Search both NVIDIA Developer Blog and NVIDIA main blog over the local article index."""
+        logger.info(f"Searching NVIDIA blogs for: {query}")
+        feeds = self._fetch_feeds(list(self.nvidia_blogs))
+        return self._merge_results(self._search_index(query, feeds, list(self.nvidia_blogs), max_results_per_blog))
+    
+    async def asearch_both_blogs(self, query: str, max_results_per_blog: int = 3) -> List[Dict[str, Any]]:
+        """Async variant of search_both_blogs for callers running an event loop."""
+        logger.info(f"Searching NVIDIA blogs for: {query}")
+        feeds = await self._fetch_feeds_async(list(self.nvidia_blogs))
+        # Indexing refreshed feeds, saving and archive rescans touch the disk, so they run in a worker thread
+        result_lists = await asyncio.get_running_loop().run_in_executor(
+            None, propagate(self._search_index), query, feeds, list(self.nvidia_blogs), max_results_per_blog
+        )
+        return self._merge_results(result_lists)
+    
+    def _content_timeout(self, started: float, timeout: Optional[float]) -> float:
+        """Extraction gets whatever the search left of the timeout; late articles keep only their summary."""
+        if timeout is None:
+            return self.feed_deadline
+        return max(timeout - (time.monotonic() - started), 0.01)
+    
+    @staticmethod
+    def _attach_content(top_results: List[Dict[str, Any]], contents: Dict[str, str]):
+        for result in top_results:
+            full_content = contents.get(result['url'])
+            if full_content:
+                result['full_content'] = full_content[:2000]
+    
+    def search_with_content_extraction(
+        self,
+        query: str,
+        extract_full_content: bool = False,
+        timeout: float = None
+    ) -> List[Dict[str, Any]]:
+        """Search blogs and optionally extract full content from top results within the timeout."""
+        started = time.monotonic()
         results = self.search_both_blogs(query)
         
         if extract_full_content:
-            for result in results[:2]:  # Only extract content for top 2 results
-                full_content = self.get_article_content(result['url'])
-                if full_content:
-                    result['full_content'] = full_content
+            # Only extract content for the top results, downloading uncached pages concurrently
+            top_results = results[:self.content_top_k]
+            contents = self.article_cache.fetch_many(
+                [result['url'] for result in top_results], timeout=self._content_timeout(started, timeout)
+            )
+            self._attach_content(top_results, contents)
+        
+        return results
+    
+    async def asearch_with_content_extraction(
+        self,
+        query: str,
+        extract_full_content: bool = False,
+        timeout: float = None
+    ) -> List[Dict[str, Any]]:
+        """Async variant of search_with_content_extraction; network I/O never blocks the event loop."""
+        started = time.monotonic()
+        results = await self.asearch_both_blogs(query)
+        
+        if extract_full_content:
+            top_results = results[:self.content_top_k]
+            contents = await self.article_cache.fetch_many_async(
+                [result['url'] for result in top_results], timeout=self._content_timeout(started, timeout)
+            )
+            self._attach_content(top_results, contents)
         
         return results
     
@@ -218,13 +267,10 @@ class NVIDIABlogSearchTool:
         
         try:
             # Get from both RSS feeds
-            for blog_type in ['developer', 'main']:
-                feed_url = self.nvidia_blogs[blog_type]['rss_feed']
-                feed = feedparser.parse(feed_url)
-                
-                source_name = 'NVIDIA Developer Blog' if blog_type == 'developer' else 'NVIDIA Blog'
+            for blog_type, entries in self._fetch_feeds(list(self.nvidia_blogs)).items():
+                source_name = self.nvidia_blogs[blog_type]['source_name']
                 
-                for entry in feed.entries:
+                for entry in entries:
                     published = entry.get('published_parsed')
                     if published:
                         pub_date = datetime(*published[:6])
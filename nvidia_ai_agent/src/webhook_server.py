@@ -65,6 +65,7 @@ class WebhookServer:
         try:
             self.knowledge_base = KnowledgeBaseProcessor()
             self.blog_tool = NVIDIABlogSearchTool()
+            self.blog_tool.prefetch_feeds()
             logger.info("Components initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize components: {e}")
@@ -161,31 +162,38 @@ class WebhookServer:
             # Add to knowledge base
             if self.knowledge_base:
                 try:
-                    # Use async method in sync context
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    
-                    loop.run_until_complete(
-                        self.knowledge_base.add_web_content(
-                            title=title,
-                            content=content,
-                            source_url=url,
-                            metadata={
-                                'source': source,
-                                'published_date': published_date,
-                                'added_via_webhook': True,
-                                'webhook_timestamp': datetime.now().isoformat()
-                            }
-                        )
+                    # Stored as source_type 'web_article' with its publication date for filtered search
+                    self.knowledge_base.add_web_content(
+                        title=title,
+                        content=content,
+                        source_url=url,
+                        metadata={
+                            'source': source,
+                            'published_date': published_date,
+                            'added_via_webhook': True,
+                            'webhook_timestamp': datetime.now().isoformat()
+                        }
                     )
                     
-                    loop.close()
-                    
                     logger.info(f"Added to knowledge base: {title}")
                     
                 except Exception as e:
                     logger.error(f"Failed to add to knowledge base: {e}")
             
+            # Make the post searchable by blog search right away
+            if self.blog_tool:
+                try:
+                    self.blog_tool.blog_index.add_article(
+                        url=url,
+                        title=title,
+                        content=content,
+                        published_date=published_date,
+                        source=source
+                    )
+                    self.blog_tool.blog_index.save()
+                except Exception as e:
+                    logger.error(f"Failed to add to blog index: {e}")
+            
             # Save webhook event for Streamlit app to pick up
             self._save_webhook_event({
                 'title': title,
@@ -225,24 +233,10 @@ class WebhookServer:
             }
     
     def _extract_full_content(self, url: str) -> str:
-        """Extract full content from blog URL."""
+        """Extract full content from blog URL through the article cache shared with the search tools."""
         try:
             if self.blog_tool:
-                # Create a mock result object to use the extraction method
-                class MockResult:
-                    def __init__(self, url):
-                        self.url = url
-                        self.full_content = None
-                
-                mock_result = MockResult(url)
-                
-                # Use async method in sync context
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(self.blog_tool._fetch_content(mock_result))
-                loop.close()
-                
-                return mock_result.full_content or ""
+                return self.blog_tool.article_cache.fetch(url) or ""
             
         except Exception as e:
             logger.error(f"Failed to extract full content: {e}")
@@ -24,9 +24,8 @@ import time
 sys.path.append(str(Path(__file__).parent / "src"))
 
 try:
-    from nvidia_agent import NVIDIAConversationalAgent
-    from knowledge_base import KnowledgeBaseProcessor
-    from web_search_tool import NVIDIABlogSearchTool
+    from nvidia_agent import get_agent
+    from snapshot import restore_if_empty
     from cloud_webhook_handler import cloud_webhook_handler
 except ImportError as e:
     st.error(f"Import error: {e}")
@@ -110,6 +109,7 @@ class StreamlitNVIDIAAgent:
     def __init__(self):
         """Initialize the Streamlit agent wrapper."""
         self.agent = None
+        self.session = None
         self.kb_processor = None
         self.web_search_tool = None
     
@@ -124,9 +124,13 @@ class StreamlitNVIDIAAgent:
             # Initialize components
             if self.agent is None:
                 with st.spinner("🔧 Initializing NVIDIA AI Agent..."):
-                    self.agent = NVIDIAConversationalAgent()
-                    self.kb_processor = KnowledgeBaseProcessor()
-                    self.web_search_tool = NVIDIABlogSearchTool()
+                    # Browser sessions share one agent and keep only their conversation to themselves
+                    self.agent = get_agent()
+                    self.agent.warm_up()
+                    self.session = self.agent.get_session()
+                    # Reuse the agent's tools rather than loading a second model and client
+                    self.kb_processor = self.agent.knowledge_base
+                    self.web_search_tool = self.agent.web_search_tool
                 
                 st.success("✅ NVIDIA AI Agent initialized successfully!")
                 return True
@@ -142,6 +146,11 @@ class StreamlitNVIDIAAgent:
         """Set up knowledge base if needed."""
         try:
             if self.kb_processor:
+                # A prebuilt snapshot restores the index without re-embedding anything
+                restored = restore_if_empty(self.kb_processor)
+                if restored:
+                    st.success(f"✅ Knowledge base restored from snapshot ({restored} chunks)")
+                
                 stats = self.kb_processor.get_collection_stats()
                 if stats.get('total_documents', 0) == 0:
                     with st.spinner("📖 Setting up knowledge base from course transcripts..."):
@@ -291,7 +300,7 @@ def display_sidebar():
             
             # Agent statistics
             if st.session_state.agent_wrapper.agent:
-                stats = st.session_state.agent_wrapper.agent.get_agent_stats()
+                stats = st.session_state.agent_wrapper.agent.get_agent_stats(st.session_state.agent_wrapper.session)
                 
                 st.markdown("### 📊 Agent Statistics")
                 st.markdown(f"""
@@ -336,8 +345,7 @@ def display_sidebar():
         if st.button("🗑️ Clear Chat"):
             st.session_state.messages = []
             if st.session_state.agent_wrapper.agent:
-                st.session_state.agent_wrapper.agent.conversation_history.clear()
-                st.session_state.agent_wrapper.agent.memory.clear()
+                st.session_state.agent_wrapper.session.clear()
             st.session_state.conversation_stats = {
                 'total_queries': 0,
                 'sources_used': {},
@@ -430,45 +438,50 @@ def display_chat_interface():
         
         # Generate and display assistant response
         with st.chat_message("assistant"):
-            with st.spinner("🤔 Thinking..."):
-                try:
-                    # Get response from agent
-                    response = st.session_state.agent_wrapper.agent.process_query(prompt)
-                    
-                    # Get conversation context for sources
-                    sources_used = []
-                    if st.session_state.agent_wrapper.agent.conversation_history:
-                        last_context = st.session_state.agent_wrapper.agent.conversation_history[-1]
-                        sources_used = last_context.sources_used
-                    
-                    # Display response
-                    st.write(response)
-                    
-                    # Update statistics
-                    st.session_state.conversation_stats['total_queries'] += 1
-                    for source in sources_used:
-                        if source in st.session_state.conversation_stats['sources_used']:
-                            st.session_state.conversation_stats['sources_used'][source] += 1
-                        else:
-                            st.session_state.conversation_stats['sources_used'][source] = 1
-                    
-                    # Add assistant message to history
-                    assistant_message = {
-                        "role": "assistant",
-                        "content": response,
-                        "timestamp": datetime.now(),
-                        "sources": sources_used
-                    }
-                    st.session_state.messages.append(assistant_message)
-                    
-                    # Show sources and timestamp
-                    st.caption(f"🕒 {assistant_message['timestamp'].strftime('%H:%M:%S')}")
-                    if sources_used:
-                        st.caption("📚 Sources: " + ", ".join(sources_used))
-                    
-                except Exception as e:
-                    st.error(f"❌ Error generating response: {e}")
-                    logger.error(f"Response generation failed: {e}")
+            try:
+                # Stream the response from the agent; the spinner covers retrieval and the first token
+                chunks = st.session_state.agent_wrapper.agent.stream_query(prompt, st.session_state.agent_wrapper.session)
+                with st.spinner("🤔 Thinking..."):
+                    response = next(chunks, "")
+                
+                response_placeholder = st.empty()
+                response_placeholder.markdown(response + "▌")
+                for chunk in chunks:
+                    response += chunk
+                    response_placeholder.markdown(response + "▌")
+                response_placeholder.markdown(response)
+                
+                # Get conversation context for sources
+                sources_used = []
+                if st.session_state.agent_wrapper.session.conversation_history:
+                    last_context = st.session_state.agent_wrapper.session.conversation_history[-1]
+                    sources_used = last_context.sources_used
+                
+                # Update statistics
+                st.session_state.conversation_stats['total_queries'] += 1
+                for source in sources_used:
+                    if source in st.session_state.conversation_stats['sources_used']:
+                        st.session_state.conversation_stats['sources_used'][source] += 1
+                    else:
+                        st.session_state.conversation_stats['sources_used'][source] = 1
+                
+                # Add assistant message to history
+                assistant_message = {
+                    "role": "assistant",
+                    "content": response,
+                    "timestamp": datetime.now(),
+                    "sources": sources_used
+                }
+                st.session_state.messages.append(assistant_message)
+                
+                # Show sources and timestamp
+                st.caption(f"🕒 {assistant_message['timestamp'].strftime('%H:%M:%S')}")
+                if sources_used:
+                    st.caption("📚 Sources: " + ", ".join(sources_used))
+                
+            except Exception as e:
+                st.error(f"❌ Error generating response: {e}")
+                logger.error(f"Response generation failed: {e}")
 
 
 def display_analytics_tab():
@@ -536,6 +549,66 @@ def display_analytics_tab():
                 title="Message Length Over Time"
             )
             st.plotly_chart(fig, use_container_width=True)
+    
+    # Per-stage latency of this session's recent requests
+    if st.session_state.agent_wrapper.agent:
+        display_request_traces(
+            st.session_state.agent_wrapper.agent.tracer.recent_traces(
+                limit=20, session_id=st.session_state.agent_wrapper.session.session_id
+            )
+        )
+
+
+def display_request_traces(traces: List[Dict[str, Any]]):
+    """Display stage timings, sizes and cache hits of recent requests."""
+    if not traces:
+        return
+    
+    st.subheader("🔬 Request Latency by Stage")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Avg Request Time", f"{sum(t['duration_ms'] for t in traces) / len(traces):.0f} ms")
+    with col2:
+        first_tokens = [
+            s['attributes']['time_to_first_token_ms'] for t in traces for s in t['spans']
+            if 'time_to_first_token_ms' in s['attributes']
+        ]
+        st.metric("Avg Time to First Token", f"{sum(first_tokens) / len(first_tokens):.0f} ms" if first_tokens else "-")
+    with col3:
+        cache_hits = sum(bool(t['attributes'].get('response_cache_hit')) for t in traces)
+        st.metric("Answered from Cache", f"{cache_hits} of {len(traces)}")
+    
+    # Oldest request first; stages may overlap (retrieval legs run concurrently)
+    stage_rows = [
+        {'Request': i, 'Stage': s['name'], 'Duration (ms)': s['duration_ms'] or 0}
+        for i, trace in enumerate(reversed(traces), 1) for s in trace['spans']
+    ]
+    if stage_rows:
+        fig = px.bar(
+            pd.DataFrame(stage_rows),
+            x='Request',
+            y='Duration (ms)',
+            color='Stage',
+            barmode='group',
+            title="Stage Durations per Request"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    
+    latest = traces[0]
+    st.caption(f"Latest request: {latest['attributes'].get('query', '')} ({latest['duration_ms']:.0f} ms)")
+    st.dataframe(pd.DataFrame([
+        {
+            'Stage': s['name'],
+            'Duration (ms)': round(s['duration_ms'] or 0, 1),
+            'Cache Hit': s['attributes'].get('cache_hit'),
+            'Bytes': s['attributes'].get('bytes'),
+            'Prompt Tokens': s['attributes'].get('prompt_tokens'),
+            'Completion Tokens': s['attributes'].get('completion_tokens'),
+            'Error': s['error']
+        }
+        for s in latest['spans']
+    ]), use_container_width=True)
 
 
 def display_help_tab():
@@ -4,6 +4,8 @@ Test suite for the NVIDIA AI Conversational Agent.
 
 import sys
 import os
+import time
+import asyncio
 from pathlib import Path
 import pytest
 from unittest.mock import Mock, patch
@@ -12,76 +14,11 @@ from unittest.mock import Mock, patch
 sys.path.append(str(Path(__file__).parent.parent / "src"))
 
 from nvidia_agent import NVIDIAConversationalAgent, ConversationContext
-from knowledge_base import KnowledgeBaseProcessor, TranscriptDocument
+from knowledge_base import KnowledgeBaseProcessor
 from web_search_tool import NVIDIABlogSearchTool
-
-
-class TestKnowledgeBase:
-    """Test the knowledge base functionality."""
-    
-    def test_transcript_document_creation(self):
-        """Test creation of TranscriptDocument."""
-        doc = TranscriptDocument(
-            course_name="Test Course",
-            lesson_title="Test Lesson",
-            content="This is test content",
-            video_url="https://test.com",
-            file_path="/test/path"
-        )
-        
-        assert doc.course_name == "Test Course"
-        assert doc.lesson_title == "Test Lesson"
-        assert doc.content == "This is test content"
-    
-    def test_chunk_content(self):
-        """Test content chunking functionality."""
-        kb_processor = KnowledgeBaseProcessor()
-        
-        # Test small content (shouldn't be chunked)
-        small_content = "This is a small piece of content."
-        chunks = kb_processor.chunk_content(small_content, chunk_size=100)
-        assert len(chunks) == 1
-        assert chunks[0] == small_content
-        
-        # Test large content (should be chunked)
-        large_content = "This is a test. " * 100  # Create long content
-        chunks = kb_processor.chunk_content(large_content, chunk_size=100, overlap=20)
-        assert len(chunks) > 1
-
-
-class TestWebSearchTool:
-    """Test the web search functionality."""
-    
-    def test_nvidia_blog_search_tool_init(self):
-        """Test initialization of NVIDIA blog search tool."""
-        search_tool = NVIDIABlogSearchTool()
-        
-        assert search_tool.timeout > 0
-        assert search_tool.max_results > 0
-        assert 'developer' in search_tool.nvidia_blogs
-        assert 'main' in search_tool.nvidia_blogs
-    
-    def test_format_search_results(self):
-        """Test formatting of search results."""
-        search_tool = NVIDIABlogSearchTool()
-        
-        # Test empty results
-        empty_results = []
-        formatted = search_tool.format_search_results(empty_results)
-        assert "No relevant articles found" in formatted
-        
-        # Test with results
-        test_results = [{
-            'title': 'Test Article',
-            'source': 'NVIDIA Developer Blog',
-            'published_date': '2024-01-01',
-            'url': 'https://test.com',
-            'summary': 'This is a test summary'
-        }]
-        
-        formatted = search_tool.format_search_results(test_results)
-        assert "Test Article" in formatted
-        assert "NVIDIA Developer Blog" in formatted
+from blog_index import BlogIndex
+from article_cache import ArticleCache
+from query_router import QueryRouter
 
 
 class TestNVIDIAAgent:
@@ -156,6 +93,255 @@ class TestNVIDIAAgent:
                 # Test non-command
                 non_command = agent.handle_special_commands("regular query")
                 assert non_command is None
+    
+    @pytest.fixture
+    def agent(self):
+        """Agent with a mocked LLM, knowledge base and web search tool."""
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
+            with patch('nvidia_agent.ChatOpenAI'), \
+                 patch('nvidia_agent.KnowledgeBaseProcessor'), \
+                 patch('nvidia_agent.NVIDIABlogSearchTool'):
+                yield NVIDIAConversationalAgent()
+    
+    def test_construction_loads_nothing_until_warm_up(self):
+        """Test that building the agent loads no model and fetches no feeds until warm_up is called."""
+        from unittest.mock import PropertyMock
+        
+        knowledge_base = Mock()
+        embedding_model = PropertyMock(return_value=Mock())
+        type(knowledge_base).embedding_model = embedding_model
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
+            with patch('nvidia_agent.ChatOpenAI'):
+                agent = NVIDIAConversationalAgent(knowledge_base=knowledge_base, web_search_tool=Mock())
+        
+        time.sleep(0.05)
+        embedding_model.assert_not_called()
+        agent.web_search_tool.prefetch_feeds.assert_not_called()
+        
+        agent.warm_up().result(timeout=5)
+        assert embedding_model.called
+        agent.web_search_tool.prefetch_feeds.assert_called_once()
+        assert agent.warm_up() is agent.warm_up()
+    
+    def test_retrieval_legs_run_concurrently_within_deadlines(self, agent):
+        """Test that a slow source is dropped at its deadline instead of delaying the answer."""
+        agent.web_search_deadline = 0.2
+        
+        def slow_kb_search(query, n_results, query_embedding=None):
+            time.sleep(0.1)
+            return [{'course_name': 'RAG', 'lesson_title': 'Intro', 'content': 'chunk', 'relevance_score': 0.9}]
+        
+        def slow_web_search(query, extract_content, timeout):
+            time.sleep(0.5)
+            return [{'title': 'Late article'}]
+        
+        agent.knowledge_base.search_knowledge_base.side_effect = slow_kb_search
+        agent.web_search_tool.search_with_content_extraction.side_effect = slow_web_search
+        
+        start = time.perf_counter()
+        knowledge_results, web_results = agent._gather_context(
+            "What is RAG?", {'use_knowledge_base': True, 'use_web_search': True}
+        )
+        elapsed = time.perf_counter() - start
+        
+        assert knowledge_results[0]['course_name'] == 'RAG'
+        assert web_results == []
+        assert elapsed < 0.4
+    
+    def test_web_leg_skipped_when_knowledge_base_covers_query(self, agent):
+        """Test that the router reuses the query embedding and only searches the web on weak coverage."""
+        agent.router = QueryRouter(
+            encode=lambda texts: [[1.0, 0.0] if text == "news" else [0.0, 1.0] for text in texts],
+            current_examples=["news"], foundational_examples=["basics"]
+        )
+        agent.knowledge_base.embed_query.return_value = [0.0, 1.0]
+        agent.web_search_tool.search_with_content_extraction.return_value = [{'title': 'NIM article'}]
+        
+        agent.knowledge_base.search_knowledge_base.return_value = [
+            {'course_name': 'NIM', 'content': 'NIM overview', 'vector_score': 0.9, 'relevance_score': 0.9}
+        ]
+        knowledge_results, web_results = agent._retrieve("What is NIM?")
+        
+        assert knowledge_results and web_results == []
+        agent.web_search_tool.search_with_content_extraction.assert_not_called()
+        agent.knowledge_base.embed_query.assert_called_once_with("What is NIM?")
+        assert agent.knowledge_base.search_knowledge_base.call_args.kwargs['query_embedding'] == [0.0, 1.0]
+        
+        agent.knowledge_base.search_knowledge_base.return_value = [
+            {'course_name': 'NIM', 'content': 'NIM overview', 'vector_score': 0.1, 'relevance_score': 0.1}
+        ]
+        knowledge_results, web_results = agent._retrieve("What is Cosmos?")
+        
+        assert web_results == [{'title': 'NIM article'}]
+        assert agent.get_agent_stats()['routing']['web_skip_rate'] == 0.5
+    
+    def test_deferred_web_leg_shares_the_overall_deadline(self, agent):
+        """Test that a web leg started after weak knowledge base results only gets the time left."""
+        agent.knowledge_base_deadline = agent.web_search_deadline = 0.4
+        agent.router = QueryRouter()
+        
+        def slow_kb_search(query, n_results, query_embedding=None):
+            time.sleep(0.25)
+            return [{'course_name': 'NIM', 'content': 'chunk', 'vector_score': 0.1, 'relevance_score': 0.1}]
+        
+        def slow_web_search(query, extract_content, timeout):
+            time.sleep(0.4)
+            return [{'title': 'Late article'}]
+        
+        agent.knowledge_base.search_knowledge_base.side_effect = slow_kb_search
+        agent.web_search_tool.search_with_content_extraction.side_effect = slow_web_search
+        strategy = {'use_knowledge_base': True, 'use_web_search': None, 'extract_content': False,
+                    'prioritize_web': False, 'reason': 'coverage', 'web_score': 0.0, 'kb_score': None}
+        
+        start = time.perf_counter()
+        knowledge_results, web_results = agent._gather_context("What is Cosmos?", strategy)
+        elapsed = time.perf_counter() - start
+        
+        assert knowledge_results and web_results == []
+        assert agent.web_search_tool.search_with_content_extraction.call_args.args[2] < 0.2
+        assert elapsed < 0.55
+    
+    def test_process_query_records_stage_spans(self, agent):
+        """Test that a query is traced stage by stage with token counts and cache flags."""
+        from tracing import Tracer
+        agent.tracer = Tracer(exporters=[])
+        agent.knowledge_base.embed_query.return_value = None
+        agent.knowledge_base.search_knowledge_base.return_value = [
+            {'course_name': 'NIM', 'lesson_title': 'Intro', 'content': 'NIM overview', 'relevance_score': 0.9}
+        ]
+        agent.web_search_tool.search_with_content_extraction.return_value = []
+        agent.llm.return_value = Mock(content="NIM serves models.")
+        
+        agent.process_query("Latest NIM news")
+        agent.process_query("Latest NIM news")
+        
+        cached, generated = agent.tracer.recent_traces(session_id=agent.default_session.session_id)
+        spans = {span['name']: span for span in generated['spans']}
+        assert set(spans) == {'strategy', 'knowledge_base_search', 'web_search', 'prompt_build', 'llm_call'}
+        assert spans['knowledge_base_search']['attributes']['bytes'] == len('NIM overview')
+        assert spans['llm_call']['attributes']['completion_tokens'] > 0
+        assert spans['prompt_build']['attributes']['prompt_tokens'] > 0
+        assert generated['attributes']['route_reason'] == 'keywords'
+        assert generated['attributes']['response_cache_hit'] is False
+        assert cached['attributes']['response_cache_hit'] is True
+        assert 'llm_call' not in {span['name'] for span in cached['spans']}
+    
+    def test_stream_query_yields_tokens_and_records_exchange(self, agent):
+        """Test that streamed chunks arrive incrementally and the full answer is kept in history."""
+        agent.knowledge_base.search_knowledge_base.return_value = []
+        agent.web_search_tool.search_with_content_extraction.return_value = []
+        agent.llm.stream.return_value = iter([Mock(content="NIM "), Mock(content=""), Mock(content="serves models.")])
+        
+        chunks = list(agent.stream_query("What is NIM?"))
+        
+        assert chunks == ["NIM ", "serves models."]
+        assert agent.conversation_history[-1].response == "NIM serves models."
+        
+        # A failing LLM yields the error message and records nothing
+        agent.llm.stream.side_effect = RuntimeError("connection reset")
+        assert "error" in "".join(agent.stream_query("What is NIMs?"))
+        assert len(agent.conversation_history) == 1
+    
+    def test_repeated_query_answered_from_response_cache(self, agent):
+        """Test that a repeat over the same context skips the LLM and ingest invalidates."""
+        agent.knowledge_base.search_knowledge_base.return_value = [
+            {'course_name': 'NIM', 'lesson_title': 'Intro', 'content': 'NIM overview', 'relevance_score': 0.9}
+        ]
+        agent.web_search_tool.search_with_content_extraction.return_value = []
+        agent.llm.return_value = Mock(content="NIM serves models.")
+        
+        assert agent.process_query("What is NIM?") == "NIM serves models."
+        assert agent.process_query("what is NIM") == "NIM serves models."
+        assert agent.llm.call_count == 1
+        assert len(agent.conversation_history) == 2
+        
+        agent.knowledge_base.add_ingest_listener.assert_called_once_with(agent.response_cache.invalidate)
+        agent.response_cache.invalidate()
+        agent.process_query("What is NIM?")
+        assert agent.llm.call_count == 2
+        
+        # Generated answers record token usage, cached ones spend none
+        assert agent.conversation_history[0].token_usage['prompt_tokens'] > 0
+        assert agent.conversation_history[1].token_usage == {}
+        assert agent.get_agent_stats()['token_usage']['requests'] == 2
+    
+    def test_async_sessions_run_concurrently_with_separate_history(self, agent):
+        """Test that one agent serves concurrent sessions without mixing their conversations."""
+        agent.response_cache = None
+        agent.knowledge_base.search_knowledge_base.return_value = []
+        
+        async def slow_web_search(query, extract_content, timeout):
+            await asyncio.sleep(0.2)
+            return []
+        
+        async def slow_llm(messages):
+            await asyncio.sleep(0.2)
+            return Mock(content="NIM news")
+        
+        agent.web_search_tool.asearch_with_content_extraction.side_effect = slow_web_search
+        agent.llm.ainvoke.side_effect = slow_llm
+        alice, bob = agent.get_session('alice'), agent.get_session('bob')
+        
+        async def ask_all():
+            return await asyncio.gather(*(
+                agent.aprocess_query(f"Latest NIM news {i}", session)
+                for i, session in enumerate([alice, bob] * 5)
+            ))
+        
+        start = time.perf_counter()
+        answers = asyncio.run(ask_all())
+        elapsed = time.perf_counter() - start
+        
+        # Ten queries of 0.4s each overlap instead of running back to back
+        assert answers == ["NIM news"] * 10
+        assert elapsed < 1.5
+        assert len(alice.conversation_history) == 5 and len(bob.conversation_history) == 5
+        assert len(agent.conversation_history) == 0
+        assert agent.get_session('alice') is alice
+    
+    
+    def test_active_sessions_survive_idle_eviction(self, agent):
+        """Test that querying keeps a session alive past the idle timeout of its last lookup."""
+        agent.response_cache = None
+        agent.knowledge_base.search_knowledge_base.return_value = []
+        agent.web_search_tool.search_with_content_extraction.return_value = []
+        agent.llm.return_value = Mock(content="NIM serves models.")
+        agent.session_idle_timeout = 0.2
+        alice = agent.get_session('alice')
+        
+        for i in range(3):
+            time.sleep(0.1)
+            agent.process_query(f"What is NIM? {i}", alice)
+        
+        agent.get_session('bob')
+        assert agent.sessions.get('alice') is alice
+        assert len(alice.conversation_history) == 3
+    
+    def test_dropped_sessions_delete_spilled_history(self, agent, tmp_path):
+        """Test that ending or evicting a session removes its spilled exchanges."""
+        from datetime import datetime
+        
+        agent.max_sessions = 2
+        with patch.dict(os.environ, {'HISTORY_SPILL_PATH': str(tmp_path / "history.db"),
+                                     'HISTORY_MAX_ENTRIES': '1'}):
+            sessions = [agent.get_session(name) for name in ("alice", "bob")]
+        for session in sessions:
+            for i in range(3):
+                session.conversation_history.append(ConversationContext(
+                    user_query=f"Question {i}", response="Answer", timestamp=datetime.now(),
+                    sources_used=[], relevance_scores={}
+                ))
+        alice, bob = sessions
+        assert len(list(alice.conversation_history.iter_all())) == 3
+        
+        agent.end_session("alice")
+        assert list(alice.conversation_history.iter_all()) == []
+        
+        agent.get_session("carol")
+        agent.get_session("dave")
+        assert "bob" not in agent.sessions
+        assert list(bob.conversation_history.iter_all()) == []
+        assert agent.default_session.session_id != "default"
 
 
 class TestIntegration:
@@ -178,10 +364,11 @@ class TestIntegration:
             pytest.skip(f"Integration test skipped due to: {e}")
     
     @pytest.mark.integration  
-    def test_web_search_integration(self):
+    def test_web_search_integration(self, tmp_path):
         """Test web search with real NVIDIA blogs (requires internet)."""
         try:
-            search_tool = NVIDIABlogSearchTool()
+            search_tool = NVIDIABlogSearchTool(blog_index=BlogIndex(str(tmp_path)),
+                                               article_cache=ArticleCache(str(tmp_path / "article_cache.sqlite")))
             
             # Test search (will work if internet is available)
             results = search_tool.search_both_blogs("NVIDIA", max_results_per_blog=1)
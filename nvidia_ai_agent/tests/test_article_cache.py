@@ -0,0 +1,93 @@
+"""
+Tests for the extracted article text cache.
+"""
+
+import sys
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from article_cache import ArticleCache
+
+
+class TestArticleCache:
+    """Test the persistent cache of extracted article text."""
+    
+    PAGE = b"<html><body><nav>Menu</nav><div class='post-content'><p>Triton serves models.</p></div></body></html>"
+    
+    def _session(self, delay=0.0, status_code=200):
+        def get(url, headers=None, timeout=None):
+            time.sleep(delay)
+            return Mock(status_code=status_code, content=self.PAGE, headers={"ETag": '"a1"'},
+                        raise_for_status=Mock())
+        
+        session = Mock()
+        session.get.side_effect = get
+        return session
+    
+    def test_concurrent_fetch_and_persistent_hits(self, tmp_path):
+        """Test uncached pages download in parallel and later hits need no network."""
+        path = str(tmp_path / "articles.sqlite")
+        cache = ArticleCache(path, session=self._session(delay=0.3))
+        urls = ["https://test/a", "https://test/b"]
+        
+        start = time.perf_counter()
+        contents = cache.fetch_many(urls)
+        assert time.perf_counter() - start < 0.55
+        assert contents == {url: "Triton serves models." for url in urls}
+        
+        assert cache.fetch_many(urls) == contents
+        assert cache.session.get.call_count == 2
+        
+        reopened = ArticleCache(path, session=self._session())
+        assert reopened.get("https://test/a") == "Triton serves models."
+        assert reopened.session.get.call_count == 0
+        assert reopened.get_stats()["disk_hits"] == 1
+    
+    def test_stale_entry_revalidated_with_etag(self, tmp_path):
+        """Test a stale entry is revalidated by ETag and kept on 304 Not Modified."""
+        cache = ArticleCache(str(tmp_path / "articles.sqlite"), ttl_seconds=0, session=self._session())
+        cache.fetch("https://test/a")
+        
+        cache.session = self._session(status_code=304)
+        time.sleep(0.01)
+        assert cache.fetch("https://test/a") == "Triton serves models."
+        assert cache.session.get.call_args.kwargs["headers"] == {"If-None-Match": '"a1"'}
+        assert cache.get_stats()["not_modified"] == 1
+    
+    def test_async_fetch_keeps_event_loop_responsive(self, tmp_path):
+        """Test async downloads overlap and other coroutines keep running meanwhile."""
+        import asyncio
+        
+        async def slow_fetch(url, headers=None):
+            await asyncio.sleep(0.3)
+            return 200, {"ETag": '"a1"'}, self.PAGE
+        
+        async def run():
+            ticks = 0
+            
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+            
+            ticking = asyncio.ensure_future(ticker())
+            start = time.perf_counter()
+            contents = await cache.fetch_many_async(["https://test/a", "https://test/b"])
+            elapsed = time.perf_counter() - start
+            ticking.cancel()
+            return contents, elapsed, ticks
+        
+        cache = ArticleCache(str(tmp_path / "articles.sqlite"), session=Mock())
+        with patch("article_cache.fetch_async", slow_fetch), \
+             patch("article_cache.async_available", return_value=True):
+            contents, elapsed, ticks = asyncio.run(run())
+        
+        assert contents["https://test/b"] == "Triton serves models."
+        assert elapsed < 0.55
+        assert ticks >= 15
+        assert cache.session.get.call_count == 0
@@ -0,0 +1,83 @@
+"""
+Tests for the persistent blog article index.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from blog_index import BlogIndex, parse_archive_file
+
+
+class TestBlogIndex:
+    """Test the persistent local index over blog feeds and the article archive."""
+    
+    def _write_archive(self, directory):
+        """One markdown and one text article in the scraper's layouts."""
+        (directory / "rag_systems").mkdir(parents=True)
+        (directory / "rag_systems" / "2024-05-01_Hybrid-Search.md").write_text(
+            "# Hybrid Search for RAG\n\n**URL:** https://developer.nvidia.com/blog/hybrid-search/\n\n"
+            "**Published:** 2024-05-01\n\n**Categories:** rag_systems\n\n---\n\n"
+            "Combine BM25 keyword retrieval with dense embeddings for better recall.", encoding="utf-8")
+        (directory / "rag_systems" / "2023-11-02_Omniverse.txt").write_text(
+            "-" * 100 + "\nOmniverse Digital Twins\nURL: https://blogs.nvidia.com/blog/omniverse-twins/\n"
+            "Published: 2023-11-02\nCategories: general\n" + "-" * 100 + "\n"
+            "Factories simulate production lines with Omniverse digital twins.", encoding="utf-8")
+    
+    def test_archive_parsing_and_incremental_sync(self, tmp_path):
+        """Test both archive layouts are parsed and unchanged files are skipped on resync."""
+        archive = tmp_path / "archive"
+        self._write_archive(archive)
+        
+        article = parse_archive_file(archive / "rag_systems" / "2023-11-02_Omniverse.txt")
+        assert article["title"] == "Omniverse Digital Twins"
+        assert article["published_date"] == "2023-11-02"
+        
+        index = BlogIndex(str(tmp_path / "index"), archive_directory=str(archive))
+        assert index.sync_archive() == 2
+        assert index.sync_archive() == 0
+        
+        results = index.search("BM25 keyword retrieval", k=5)
+        assert results[0]["url"] == "https://developer.nvidia.com/blog/hybrid-search/"
+        assert results[0]["source"] == "NVIDIA Developer Blog"
+        assert index.search("digital twins", k=5, source="NVIDIA Developer Blog") == []
+        
+        reopened = BlogIndex(str(tmp_path / "index"))
+        assert len(reopened) == 2
+        assert reopened.search("omniverse")[0]["published_date"] == "2023-11-02"
+    
+    def test_feed_entries_merge_with_archived_content(self, tmp_path):
+        """Test a feed entry updates an archived article without dropping its body."""
+        archive = tmp_path / "archive"
+        self._write_archive(archive)
+        index = BlogIndex(str(tmp_path / "index"))
+        index.sync_archive(str(archive))
+        
+        entry = {"title": "Hybrid Search for RAG", "link": "https://developer.nvidia.com/blog/hybrid-search/",
+                 "summary": "<p>How to fuse <b>sparse</b> and dense retrieval.</p>"}
+        assert index.index_feed("https://feed", [entry], version=1) == 1
+        assert index.index_feed("https://feed", [entry], version=1) == 0
+        
+        article = index.articles["https://developer.nvidia.com/blog/hybrid-search/"]
+        assert article["summary"] == "How to fuse sparse and dense retrieval."
+        assert "dense embeddings" in article["content"]
+        assert index.search("sparse dense embeddings")[0]["title"] == "Hybrid Search for RAG"
+    
+    def test_concurrent_writers_merge_instead_of_overwriting(self, tmp_path):
+        """Test two processes' saves to one index directory keep each other's articles."""
+        agent_index = BlogIndex(str(tmp_path / "index"))
+        scraper_index = BlogIndex(str(tmp_path / "index"))
+        
+        agent_index.add_article("https://blogs.nvidia.com/blog/a/", "Jetson Robotics", content="edge robots")
+        agent_index.save()
+        scraper_index.add_article("https://blogs.nvidia.com/blog/b/", "Grace Hopper", content="superchip memory")
+        scraper_index.save()
+        
+        reopened = BlogIndex(str(tmp_path / "index"))
+        assert sorted(reopened.articles) == ["https://blogs.nvidia.com/blog/a/", "https://blogs.nvidia.com/blog/b/"]
+        assert reopened.search("superchip")[0]["title"] == "Grace Hopper"
+        
+        assert agent_index.refresh() == 1
+        assert agent_index.search("superchip")[0]["url"] == "https://blogs.nvidia.com/blog/b/"
@@ -0,0 +1,56 @@
+"""
+Tests for token-aware transcript chunking.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from chunking import TokenChunker
+
+
+class TestTokenChunker:
+    """Test the token-aware chunking engine."""
+    
+    def test_chunks_fit_token_budget(self):
+        """Test that every chunk fits within the token budget."""
+        chunker = TokenChunker(max_tokens=60, overlap_tokens=10)
+        text = "NVIDIA NIM packages optimized inference engines. " * 50
+        
+        chunks = chunker.chunk(text)
+        
+        assert len(chunks) > 1
+        assert all(chunk.token_count <= 60 for chunk in chunks)
+    
+    def test_transcript_line_layout(self):
+        """Test that one-sentence-per-line transcripts split on line boundaries."""
+        chunker = TokenChunker(max_tokens=30, overlap_tokens=0)
+        lines = [f" Sentence number {i} talks about batching." for i in range(20)]
+        text = "\n".join(lines)
+        
+        chunks = chunker.chunk_text(text)
+        
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk.startswith("Sentence number")
+            assert chunk.endswith("batching.")
+    
+    def test_overlap_between_chunks(self):
+        """Test that consecutive chunks share trailing sentences."""
+        chunker = TokenChunker(max_tokens=40, overlap_tokens=12)
+        text = " ".join(f"Fact {i} is here." for i in range(40))
+        
+        chunks = chunker.chunk_text(text)
+        
+        assert chunks[0].split(".")[-2].strip() in chunks[1]
+    
+    def test_long_sentence_is_split(self):
+        """Test that a sentence longer than the budget is still split."""
+        chunker = TokenChunker(max_tokens=20, overlap_tokens=0)
+        
+        chunks = chunker.chunk("word " * 200)
+        
+        assert len(chunks) > 1
+        assert all(chunk.token_count <= 20 for chunk in chunks)
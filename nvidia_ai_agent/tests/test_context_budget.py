@@ -0,0 +1,61 @@
+"""
+Tests for token-budgeted prompt context assembly.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from context_budget import ContextBudgeter, TokenCounter
+
+
+class TestContextBudgeter:
+    """Test deduplication and trimming of retrieved context to a token budget."""
+    
+    @staticmethod
+    def _budgeter(max_tokens):
+        counter = TokenCounter()
+        counter.encoding = None  # Deterministic approximate counts whether or not tiktoken is installed
+        return ContextBudgeter(max_tokens=max_tokens, counter=counter)
+    
+    def test_overlapping_chunks_are_deduplicated(self):
+        """Test that sentences repeated by overlapping chunks appear once, and duplicates drop out."""
+        budgeter = self._budgeter(1000)
+        knowledge = [
+            {'course_name': 'RAG', 'lesson_title': 'Intro', 'content': 'RAG retrieves documents. It grounds answers.'},
+            {'course_name': 'RAG', 'lesson_title': 'Intro', 'content': 'It grounds answers. Rerankers sort results.'},
+            {'course_name': 'RAG', 'lesson_title': 'Intro', 'content': 'RAG retrieves documents.'}
+        ]
+        web = [{'title': 'RAG 101', 'url': 'https://blogs.nvidia.com/rag', 'summary': 'RAG explained',
+                'full_content': 'Rerankers sort results. NIM serves rerankers.'}]
+        
+        knowledge_out, web_out, usage = budgeter.fit(knowledge, web)
+        
+        # Sources alternate by rank, so the article comes before the second chunk and covers it
+        assert [r['content'] for r in knowledge_out] == ['RAG retrieves documents. It grounds answers.']
+        assert web_out[0]['full_content'] == 'Rerankers sort results. NIM serves rerankers.'
+        assert usage['duplicate_sentences'] == 3
+        assert usage['dropped_results'] == 2
+        assert knowledge[1]['content'].startswith('It grounds')  # Inputs are not modified
+    
+    def test_results_trimmed_to_budget(self):
+        """Test that context stays within budget, truncating and dropping in rank order."""
+        budgeter = self._budgeter(150)
+        knowledge = [
+            {'course_name': 'NIM', 'lesson_title': f'Lesson {i}',
+             'content': ' '.join(f'Sentence {j} of lesson {i} about NIM.' for j in range(40))}
+            for i in range(3)
+        ]
+        web = [{'title': 'NIM news', 'url': 'https://blogs.nvidia.com/nim', 'summary': 'NIM update',
+                'full_content': ' '.join(f'Release detail {j}.' for j in range(40))}]
+        
+        knowledge_out, web_out, usage = budgeter.fit(knowledge, web)
+        
+        assert usage['context_tokens'] <= 150
+        # Neither source can crowd out the other
+        assert len(knowledge_out) == 1 and knowledge_out[0]['content'].endswith('...')
+        assert web_out[0]['summary'] == 'NIM update' and web_out[0]['full_content'].endswith('...')
+        assert usage['dropped_results'] == 2
+        assert budgeter.get_stats()['requests'] == 1
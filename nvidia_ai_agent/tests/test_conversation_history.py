@@ -0,0 +1,64 @@
+"""
+Tests for bounded per-session conversation history.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from conversation_history import ConversationHistory
+
+
+class TestConversationHistory:
+    """Test the bounded conversation history and its SQLite spill."""
+    
+    @staticmethod
+    def _exchange(i):
+        from datetime import datetime
+        from conversation_history import ConversationContext
+        return ConversationContext(
+            user_query=f"Question {i}",
+            response=f"Answer {i}",
+            timestamp=datetime.now(),
+            sources_used=["Knowledge Base"] if i % 2 else ["Knowledge Base", "NVIDIA Blogs"],
+            relevance_scores={},
+            token_usage={'prompt_tokens': 10, 'completion_tokens': 2}
+        )
+    
+    def test_ring_buffer_keeps_recent_exchanges_and_totals(self):
+        """Test that only the newest exchanges stay in memory while counters cover all of them."""
+        history = ConversationHistory(max_entries=3)
+        for i in range(10):
+            history.append(self._exchange(i))
+        
+        assert len(history) == 3
+        assert [ctx.user_query for ctx in history] == ["Question 7", "Question 8", "Question 9"]
+        assert history[-1].response == "Answer 9"
+        assert [ctx.response for ctx in history[-2:]] == ["Answer 8", "Answer 9"]
+        
+        stats = history.get_stats()
+        assert stats['total_exchanges'] == 10
+        assert stats['sources_used'] == {"Knowledge Base": 10, "NVIDIA Blogs": 5}
+        assert stats['token_usage'] == {'prompt_tokens': 100, 'completion_tokens': 20}
+        
+        history.clear()
+        assert len(history) == 0 and history.get_stats()['total_exchanges'] == 0
+    
+    def test_evicted_exchanges_spill_to_sqlite(self, tmp_path):
+        """Test that exchanges leaving the buffer are kept on disk per session."""
+        spill_path = str(tmp_path / "history.db")
+        alice = ConversationHistory(max_entries=2, spill_path=spill_path, session_id="alice")
+        bob = ConversationHistory(max_entries=2, spill_path=spill_path, session_id="bob")
+        for i in range(5):
+            alice.append(self._exchange(i))
+        bob.append(self._exchange(0))
+        
+        assert alice.get_stats()['spilled'] == 3
+        assert [ctx.user_query for ctx in alice.iter_all()] == [f"Question {i}" for i in range(5)]
+        assert list(alice.iter_all())[0].token_usage == {'prompt_tokens': 10, 'completion_tokens': 2}
+        
+        alice.clear()
+        assert list(alice.iter_all()) == []
+        assert len(list(bob.iter_all())) == 1
@@ -0,0 +1,69 @@
+"""
+Tests for the shared RSS feed cache.
+"""
+
+import sys
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from feed_cache import FeedCache
+
+
+class TestFeedCache:
+    """Test the shared TTL feed cache with background refresh."""
+    
+    RSS = (b'<?xml version="1.0"?><rss version="2.0"><channel><title>Feed</title>'
+           b'<item><title>CUDA release</title><link>https://test/cuda</link></item></channel></rss>')
+    
+    def _session(self, status_code=200, delay=0.0):
+        def get(url, headers=None, timeout=None):
+            time.sleep(delay)
+            return Mock(status_code=status_code, content=self.RSS, headers={'ETag': '"v1"'},
+                        raise_for_status=Mock())
+        
+        session = Mock()
+        session.get.side_effect = get
+        return session
+    
+    def test_fresh_entries_come_from_memory(self):
+        """Test that a fresh feed is downloaded once and then served from memory."""
+        cache = FeedCache(ttl_seconds=60, session=self._session())
+        
+        assert cache.get("https://test/feed")[0].title == "CUDA release"
+        assert cache.get("https://test/feed")[0].title == "CUDA release"
+        assert cache.session.get.call_count == 1
+        assert cache.get_stats()['hits'] == 1
+    
+    def test_stale_entries_served_while_revalidating(self):
+        """Test that stale entries return immediately while a conditional refresh runs."""
+        cache = FeedCache(ttl_seconds=60, session=self._session())
+        cache.get("https://test/feed")
+        cache._feeds["https://test/feed"].fetched_at -= 120
+        
+        cache.session = self._session(status_code=304, delay=0.3)
+        start = time.perf_counter()
+        entries = cache.get("https://test/feed")
+        assert time.perf_counter() - start < 0.1
+        assert entries[0].title == "CUDA release"
+        
+        cache._inflight["https://test/feed"].result(timeout=5)
+        assert cache.session.get.call_args.kwargs['headers'] == {'If-None-Match': '"v1"'}
+        assert cache.get_stats()['not_modified'] == 1
+        assert cache.get_stats()['feeds']["https://test/feed"]['age_seconds'] < 5
+    
+    def test_failed_refresh_keeps_stale_entries(self):
+        """Test that a failed refresh keeps serving old entries and backs off."""
+        cache = FeedCache(ttl_seconds=0, session=self._session())
+        cache.get("https://test/feed")
+        
+        cache.session.get.side_effect = ConnectionError("offline")
+        time.sleep(0.01)
+        cache._schedule("https://test/feed").result(timeout=5)
+        
+        assert cache.get("https://test/feed")[0].title == "CUDA release"
+        assert cache._feeds["https://test/feed"].retry_after > time.time()
+        assert "https://test/feed" not in cache._inflight
@@ -0,0 +1,92 @@
+"""
+Tests for the BM25 lexical index and rank fusion.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from lexical_index import BM25Index, tokenize, reciprocal_rank_fusion
+
+
+class TestBM25Index:
+    """Test the BM25 lexical index used for hybrid search."""
+    
+    def test_tokenize_keeps_compound_terms(self):
+        """Test that product names are indexed whole and by part."""
+        tokens = tokenize("Benchmark TensorRT-LLM with GenAI-Perf")
+        
+        assert "tensorrt-llm" in tokens
+        assert "tensorrt" in tokens
+        assert "genai-perf" in tokens
+    
+    def test_acronym_query_ranks_exact_match_first(self):
+        """Test that an acronym query finds the chunk that mentions it."""
+        index = BM25Index()
+        index.add(
+            ["a", "b", "c"],
+            [
+                "Large language models generate text from prompts.",
+                "GenAI-Perf measures time to first token and throughput.",
+                "Inference servers batch requests to improve utilization."
+            ]
+        )
+        
+        results = index.search("How do I use GenAI-Perf?", k=3)
+        
+        assert results[0][0] == "b"
+        assert all(doc_id != "a" for doc_id, _ in results)
+    
+    def test_incremental_add_and_persistence(self, tmp_path):
+        """Test that saved indexes reload and accept incremental updates."""
+        path = tmp_path / "lexical_index.npz"
+        index = BM25Index(str(path))
+        index.add(["a"], ["NIM microservices package inference engines"])
+        index.save()
+        
+        reloaded = BM25Index(str(path))
+        reloaded.add(["b", "a"], ["TensorRT-LLM kernels", "Replaced text about RAG"])
+        
+        assert len(reloaded) == 2
+        assert reloaded.search("tensorrt-llm")[0][0] == "b"
+        assert reloaded.search("microservices") == []
+    
+    def test_small_updates_save_only_the_delta(self, tmp_path):
+        """Test that saves write a delta file until it outgrows the compaction ratio."""
+        path = tmp_path / "lexical_index.npz"
+        delta_path = tmp_path / "lexical_index.delta.npz"
+        index = BM25Index(str(path))
+        index.compact_ratio = 0.7
+        index.add(["a", "b", "c", "d"], ["NIM microservices", "Triton server", "CUDA kernels", "RAG pipelines"])
+        index.save()
+        compacted = path.read_bytes()
+        
+        index.add(["e", "b"], ["TensorRT-LLM engines", "Triton inference server"])
+        index.delete(["a"])
+        index.save()
+        
+        assert path.read_bytes() == compacted
+        assert delta_path.exists()
+        reloaded = BM25Index(str(path))
+        assert len(reloaded) == 4
+        assert reloaded.search("tensorrt-llm")[0][0] == "e"
+        assert reloaded.search("inference")[0][0] == "b"
+        assert reloaded.search("microservices") == []
+        
+        reloaded.compact_ratio = 0.7
+        reloaded.add(["f", "g"], ["Omniverse scenes", "DGX systems"])
+        reloaded.save()
+        
+        assert path.read_bytes() != compacted
+        assert not delta_path.exists()
+        assert len(BM25Index(str(path))) == 6
+        assert BM25Index(str(path)).search("omniverse")[0][0] == "f"
+    
+    def test_reciprocal_rank_fusion(self):
+        """Test that items ranked by both retrievers come first."""
+        fused = reciprocal_rank_fusion([["x", "y"], ["y", "z"]])
+        
+        assert fused[0][0] == "y"
+        assert {doc_id for doc_id, _ in fused} == {"x", "y", "z"}
@@ -0,0 +1,173 @@
+"""
+Tests for single-flight sharing and batching of LLM calls.
+"""
+
+import sys
+import time
+import asyncio
+from pathlib import Path
+import pytest
+from unittest.mock import Mock
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from llm_coalescer import LLMCoalescer
+
+
+class TestLLMCoalescer:
+    """Test single-flight sharing and batching of LLM calls."""
+    
+    @staticmethod
+    def _prompt(text):
+        return [Mock(type='system', content='You are helpful.'), Mock(type='human', content=text)]
+    
+    def test_concurrent_identical_prompts_share_one_call(self):
+        """Test that identical prompts in flight together make one call and distinct ones do not."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        llm = Mock(side_effect=lambda messages: time.sleep(0.2) or Mock(content=messages[1].content.upper()))
+        coalescer = LLMCoalescer(lambda: llm)
+        
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            prompts = ["what is nim?"] * 5 + ["what is rag?"]
+            answers = list(executor.map(lambda text: coalescer.invoke(self._prompt(text)).content, prompts))
+        
+        assert answers == ["WHAT IS NIM?"] * 5 + ["WHAT IS RAG?"]
+        assert llm.call_count == 2
+        assert coalescer.get_stats()['coalesced'] == 4
+    
+    def test_streams_and_errors_are_shared(self):
+        """Test that concurrent readers of an identical stream get every chunk, or the same error."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        def stream(messages):
+            for word in ["NIM ", "serves ", "models."]:
+                time.sleep(0.05)
+                yield Mock(content=word)
+        
+        llm = Mock()
+        llm.stream.side_effect = stream
+        coalescer = LLMCoalescer(lambda: llm)
+        
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            texts = list(executor.map(
+                lambda _: "".join(chunk.content for chunk in coalescer.stream(self._prompt("what is nim?"))), range(3)
+            ))
+        
+        assert texts == ["NIM serves models."] * 3
+        assert llm.stream.call_count == 1
+        
+        llm.stream.side_effect = RuntimeError("rate limited")
+        with pytest.raises(RuntimeError):
+            list(coalescer.stream(self._prompt("what is nim?")))
+    
+    def test_batching_window_groups_distinct_prompts(self):
+        """Test that distinct prompts arriving within the window go out as one batch."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        llm = Mock()
+        llm.batch.side_effect = lambda prompts, **kwargs: [Mock(content=messages[1].content) for messages in prompts]
+        coalescer = LLMCoalescer(lambda: llm, batch_window_ms=100, max_batch_size=3)
+        
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            answers = list(executor.map(lambda text: coalescer.invoke(self._prompt(text)).content, ["a", "b", "c"]))
+        
+        assert answers == ["a", "b", "c"]
+        assert llm.batch.call_count == 1 and llm.call_count == 0
+        assert coalescer.get_stats()['avg_batch_size'] == 3
+    
+    def test_async_identical_prompts_share_one_call(self):
+        """Test single-flight sharing for ainvoke and astream on one event loop."""
+        llm = Mock()
+        
+        async def ainvoke(messages):
+            await asyncio.sleep(0.1)
+            return Mock(content="NIM")
+        
+        async def astream(messages):
+            for word in ["NIM ", "news"]:
+                await asyncio.sleep(0.05)
+                yield Mock(content=word)
+        
+        llm.ainvoke.side_effect = ainvoke
+        llm.astream.side_effect = astream
+        coalescer = LLMCoalescer(lambda: llm)
+        
+        async def read(messages):
+            return "".join([chunk.content async for chunk in coalescer.astream(messages)])
+        
+        async def run():
+            answers = await asyncio.gather(*(coalescer.ainvoke(self._prompt("nim")) for _ in range(4)))
+            texts = await asyncio.gather(*(read(self._prompt("nim")) for _ in range(3)))
+            return [answer.content for answer in answers], texts
+        
+        answers, texts = asyncio.run(run())
+        
+        assert answers == ["NIM"] * 4 and texts == ["NIM news"] * 3
+        assert llm.ainvoke.call_count == 1 and llm.astream.call_count == 1
+    
+    def test_failed_prompt_does_not_fail_its_batch(self):
+        """Test that an error for one batched prompt only reaches that prompt's caller."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        llm = Mock()
+        llm.batch.side_effect = lambda prompts, return_exceptions: [
+            ValueError("context too long") if messages[1].content == "b" else Mock(content=messages[1].content)
+            for messages in prompts
+        ]
+        coalescer = LLMCoalescer(lambda: llm, batch_window_ms=100, max_batch_size=3)
+        
+        def ask(text):
+            try:
+                return coalescer.invoke(self._prompt(text)).content
+            except ValueError as e:
+                return str(e)
+        
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            answers = list(executor.map(ask, ["a", "b", "c"]))
+        
+        assert answers == ["a", "context too long", "c"]
+    
+    def test_abandoned_streams_close_the_upstream_stream(self):
+        """Test that generation stops once every reader of a shared stream has left."""
+        closed = []
+        
+        def stream(messages):
+            try:
+                for i in range(100):
+                    time.sleep(0.01)
+                    yield Mock(content=f"{i} ")
+            finally:
+                closed.append("sync")
+        
+        async def astream(messages):
+            try:
+                for i in range(100):
+                    await asyncio.sleep(0.01)
+                    yield Mock(content=f"{i} ")
+            finally:
+                closed.append("async")
+        
+        llm = Mock()
+        llm.stream.side_effect = stream
+        llm.astream.side_effect = astream
+        coalescer = LLMCoalescer(lambda: llm)
+        
+        reader = coalescer.stream(self._prompt("nim"))
+        assert next(reader).content == "0 "
+        reader.close()
+        time.sleep(0.1)
+        assert closed == ["sync"]
+        assert coalescer._streams == {}
+        
+        async def read_one():
+            reader = coalescer.astream(self._prompt("nim"))
+            first = await reader.__anext__()
+            await reader.aclose()
+            await asyncio.sleep(0.05)
+            return first.content
+        
+        assert asyncio.run(read_one()) == "0 "
+        assert closed == ["sync", "async"]
+        assert coalescer._async_streams == {}
@@ -0,0 +1,60 @@
+"""
+Tests for the shared embedding model registry.
+"""
+
+import sys
+import os
+from pathlib import Path
+import pytest
+from unittest.mock import Mock, patch
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+import model_registry
+from knowledge_base import KnowledgeBaseProcessor
+
+
+class TestModelRegistry:
+    """Test lazy, process-wide sharing of models and vector stores."""
+    
+    def test_resource_created_once(self):
+        """Test that concurrent lookups share a single instance."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        model_registry.clear_registry()
+        factory = Mock(side_effect=lambda: object())
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            resources = list(pool.map(
+                lambda _: model_registry._get_or_create(('test', 'resource'), factory), range(32)
+            ))
+        
+        assert factory.call_count == 1
+        assert all(resource is resources[0] for resource in resources)
+        model_registry.clear_registry()
+    
+    def test_stats_do_not_load_embedding_model(self, tmp_path):
+        """Test that knowledge base stats never touch the embedding model."""
+        model_registry.clear_registry()
+        
+        with patch('knowledge_base.get_embedding_model') as get_model:
+            first = KnowledgeBaseProcessor(persist_directory=str(tmp_path), vector_backend='mmap')
+            second = KnowledgeBaseProcessor(persist_directory=str(tmp_path), vector_backend='mmap')
+            stats = first.get_collection_stats()
+        
+        get_model.assert_not_called()
+        assert stats['total_documents'] == 0
+        assert stats['embedding_model_loaded'] is False
+        assert first.collection is second.collection
+        model_registry.clear_registry()
+    
+    def test_embedding_backend_validation(self):
+        """Test that an unknown embedding backend is rejected."""
+        from embeddings import get_embedding_backend
+        
+        with patch.dict(os.environ, {'EMBEDDING_BACKEND': 'ONNX'}):
+            assert get_embedding_backend() == 'onnx'
+        with patch.dict(os.environ, {'EMBEDDING_BACKEND': 'tpu'}):
+            with pytest.raises(ValueError):
+                get_embedding_backend()
@@ -0,0 +1,69 @@
+"""
+Tests for metadata partitions and filtered vector search.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from vector_index import MmapVectorIndex
+from partitions import PartitionIndex, SearchFilters, parse_date
+
+
+class TestFilteredSearch:
+    """Test metadata partitions and filtered retrieval."""
+    
+    METADATAS = [
+        {"course_name": "RAG Agents", "lesson_title": "Intro", "source_type": "transcript", "published_date": 0},
+        {"course_name": "RAG Agents", "lesson_title": "Retrieval", "source_type": "transcript", "published_date": 0},
+        {"course_name": "NVIDIA Blog", "lesson_title": "NIM launch", "source_type": "web_article", "published_date": 20240318},
+        {"course_name": "NVIDIA Blog", "lesson_title": "Blackwell", "source_type": "web_article", "published_date": 20250105},
+    ]
+    
+    def test_parse_date(self):
+        """Test ISO and RFC 822 dates are normalised to YYYYMMDD."""
+        assert parse_date("2024-03-18") == 20240318
+        assert parse_date("Mon, 18 Mar 2024 16:00:00 +0000") == 20240318
+        assert parse_date("") == 0
+    
+    def test_partition_rows(self):
+        """Test partition lookups for single fields, combinations and date ranges."""
+        partitions = PartitionIndex()
+        partitions.add([f"chunk_{i}" for i in range(4)], self.METADATAS)
+        
+        assert partitions.ids_for(SearchFilters(course="RAG Agents")) == {"chunk_0", "chunk_1"}
+        assert partitions.ids_for(SearchFilters(course="RAG Agents", lesson="Retrieval")) == {"chunk_1"}
+        assert partitions.ids_for(SearchFilters(source_type="web_article", published_after="2025-01-01")) == {"chunk_3"}
+        assert partitions.ids_for(SearchFilters(published_before="2024-12-31")) == {"chunk_2"}
+        assert partitions.ids_for(SearchFilters(course="Unknown")) == set()
+        assert partitions.rows(SearchFilters()) is None
+    
+    def test_where_clause_matches_partitions(self):
+        """Test the Chroma where clause mirrors the in-memory filter."""
+        filters = SearchFilters(course="NVIDIA Blog", published_after="2025-01-01")
+        
+        assert filters.to_where() == {"$and": [
+            {"course_name": {"$eq": "NVIDIA Blog"}},
+            {"published_date": {"$gte": 20250101}}
+        ]}
+        assert [filters.matches(m) for m in self.METADATAS] == [False, False, False, True]
+    
+    def test_mmap_query_scoped_to_partition(self, tmp_path):
+        """Test that a filtered query never returns rows outside its partition."""
+        import numpy as np
+        
+        index = MmapVectorIndex(tmp_path)
+        index.add(
+            [f"chunk_{i}" for i in range(4)],
+            np.eye(4, dtype=np.float32),
+            [f"doc {i}" for i in range(4)],
+            self.METADATAS
+        )
+        
+        results = index.query([[1.0, 0.0, 0.0, 0.0]], n_results=2, filters=SearchFilters(source_type="web_article"))
+        assert set(results['ids'][0]) == {"chunk_2", "chunk_3"}
+        
+        reopened = MmapVectorIndex(tmp_path)
+        assert reopened.partitions.values("course_name") == ["NVIDIA Blog", "RAG Agents"]
@@ -0,0 +1,62 @@
+"""
+Tests for embedding-similarity query routing.
+"""
+
+import sys
+from pathlib import Path
+import pytest
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from query_router import QueryRouter
+
+
+class TestQueryRouter:
+    """Test embedding-similarity routing of queries to the web search leg."""
+    
+    VECTORS = {
+        "news": [1.0, 0.0, 0.0],
+        "basics": [0.0, 1.0, 0.0]
+    }
+    
+    def _router(self):
+        return QueryRouter(
+            encode=lambda texts: [self.VECTORS[text] for text in texts],
+            web_margin=0.1, kb_coverage=0.6, extract_below=0.3,
+            current_examples=["news"], foundational_examples=["basics"]
+        )
+    
+    def test_current_intent_goes_to_web_immediately(self):
+        """Test that a query close to the news examples searches the web with content extraction."""
+        router = self._router()
+        strategy = router.route("What did NVIDIA announce?", [0.9, 0.2, 0.1])
+        
+        assert strategy['use_web_search'] is True and strategy['extract_content'] is True
+        assert strategy['reason'] == 'intent' and strategy['web_score'] > 0.1
+    
+    def test_foundational_queries_wait_for_knowledge_base_coverage(self):
+        """Test that the web leg is skipped when the transcripts match well and used when they do not."""
+        router = self._router()
+        strategy = router.route("What is NIM?", [0.1, 0.9, 0.3])
+        assert strategy['use_web_search'] is None
+        
+        covered = router.check_coverage("What is NIM?", strategy, [{'vector_score': 0.8, 'relevance_score': 1.0}])
+        partial = router.check_coverage("What is NIM?", strategy, [{'vector_score': None, 'relevance_score': 0.45}])
+        missing = router.check_coverage("What is NIM?", strategy, [])
+        
+        assert covered['use_web_search'] is False and covered['kb_score'] == 0.8
+        assert partial['use_web_search'] is True and partial['extract_content'] is False
+        assert missing['use_web_search'] is True and missing['extract_content'] is True
+        
+        stats = router.get_stats()
+        assert stats['queries'] == 3 and stats['web_skipped'] == 1
+        assert stats['web_skip_rate'] == pytest.approx(1 / 3)
+    
+    def test_keyword_rules_without_embedding(self):
+        """Test that queries are routed by keywords when no embedding is available."""
+        router = self._router()
+        
+        assert router.route("Latest NIM announcements")['use_web_search'] is True
+        assert router.route("Explain the basics of RAG")['use_web_search'] is False
+        assert router.get_stats()['decided_by_keywords'] == 2
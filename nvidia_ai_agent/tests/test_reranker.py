@@ -0,0 +1,55 @@
+"""
+Tests for budgeted cross-encoder reranking.
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from reranker import CrossEncoderReranker
+
+
+class TestCrossEncoderReranker:
+    """Test budgeted, cached cross-encoder reranking."""
+    
+    RESULTS = [
+        {"chunk_id": f"chunk_{i}", "content": text, "relevance_score": 1.0 - i / 10}
+        for i, text in enumerate(["GPU pricing", "NIM deploys models", "NIM overview and NIM setup"])
+    ]
+    
+    @staticmethod
+    def _model():
+        """Cross-encoder stand-in scoring by occurrences of 'NIM'."""
+        model = Mock()
+        model.predict.side_effect = lambda pairs, batch_size: [float(doc.count("NIM")) for _, doc in pairs]
+        return model
+    
+    def test_rerank_orders_by_cross_encoder_and_caches(self):
+        """Test that results are reordered and repeated pairs come from the cache."""
+        model = self._model()
+        reranker = CrossEncoderReranker(budget_ms=1000, batch_size=2)
+        
+        with patch('reranker.get_cross_encoder', return_value=model):
+            first = reranker.rerank("what is NIM", self.RESULTS, top_k=2)
+            second = reranker.rerank("what is NIM", self.RESULTS, top_k=2)
+        
+        assert [r["chunk_id"] for r in first] == ["chunk_2", "chunk_1"]
+        assert first[0]["retrieval_score"] == 0.8
+        assert second == first
+        assert model.predict.call_count == 2  # two batches, then all cached
+        assert reranker.get_stats()["cache_hits"] == 3
+    
+    def test_budget_leaves_remaining_candidates_in_order(self):
+        """Test that candidates past the time budget keep first-stage order."""
+        reranker = CrossEncoderReranker(budget_ms=5, batch_size=1)
+        reranker._ms_per_pair = 10.0  # every batch is estimated to overrun the budget
+        
+        with patch('reranker.get_cross_encoder', return_value=self._model()):
+            results = reranker.rerank("what is NIM", self.RESULTS, top_k=3)
+        
+        assert [r["chunk_id"] for r in results] == ["chunk_0", "chunk_1", "chunk_2"]
+        assert "rerank_score" not in results[0]
+        assert reranker.get_stats()["budget_exhausted"] == 1
@@ -0,0 +1,51 @@
+"""
+Tests for the agent answer cache.
+"""
+
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from response_cache import ResponseCache, context_fingerprint
+
+
+class TestResponseCache:
+    """Test the agent response cache."""
+    
+    KB_RESULTS = [{"course_name": "NIM", "lesson_title": "Intro", "content": "NIM overview", "relevance_score": 0.91}]
+    
+    def test_normalised_query_and_context_fingerprint(self):
+        """Test that near-identical queries hit while changed context misses."""
+        cache = ResponseCache(ttl_seconds=60, max_entries=4)
+        fingerprint = context_fingerprint(self.KB_RESULTS, [])
+        cache.put("What is NIM?", fingerprint, "NIM is ...", ["Knowledge Base"])
+        
+        # Scores do not change the fingerprint, new material does
+        rescored = [{**self.KB_RESULTS[0], "relevance_score": 0.87}]
+        assert context_fingerprint(rescored, []) == fingerprint
+        assert context_fingerprint(self.KB_RESULTS, [{"url": "https://blogs.nvidia.com/nim"}]) != fingerprint
+        
+        assert cache.get("  what is nim ", fingerprint).response == "NIM is ..."
+        assert cache.get("What is NIM?", context_fingerprint([], [])) is None
+        assert cache.get_stats()["hit_rate"] == 0.5
+    
+    def test_ttl_eviction_and_invalidation(self):
+        """Test expiry, LRU eviction at capacity and invalidation."""
+        cache = ResponseCache(ttl_seconds=60, max_entries=2)
+        cache.put("a", "f", "A", [])
+        cache.put("b", "f", "B", [])
+        cache.get("a", "f")  # "a" is now most recently used
+        cache.put("c", "f", "C", [])
+        
+        assert cache.get("b", "f") is None
+        assert cache.get_stats()["evictions"] == 1
+        
+        with patch('response_cache.time.time', return_value=time.time() + 120):
+            assert cache.get("a", "f") is None
+        
+        cache.invalidate()
+        assert len(cache) == 0
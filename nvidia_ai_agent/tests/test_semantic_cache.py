@@ -0,0 +1,47 @@
+"""
+Tests for the similarity-threshold search result cache.
+"""
+
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from semantic_cache import SemanticCache
+
+
+class TestSemanticCache:
+    """Test the similarity-threshold search result cache."""
+    
+    RESULTS = [{"chunk_id": "chunk_0", "content": "NIM overview"}]
+    
+    def test_similar_query_hits_and_dissimilar_misses(self):
+        """Test threshold hits, exact-text hits and parameter isolation."""
+        cache = SemanticCache(threshold=0.9, ttl_seconds=60, max_entries=4)
+        cache.put("What is NIM?", [1.0, 0.0], (5,), self.RESULTS, version=1)
+        
+        assert cache.get([0.95, 0.1], (5,), version=1) == self.RESULTS
+        assert cache.get([0.0, 1.0], (5,), version=1) is None
+        assert cache.get([1.0, 0.0], (3,), version=1) is None
+        assert cache.get_exact("what is  nim?", (5,), version=1) == self.RESULTS
+        assert cache.get_stats()["hit_rate"] == 0.5
+    
+    def test_ttl_eviction_and_invalidation(self):
+        """Test expiry, LRU eviction at capacity and collection-change invalidation."""
+        cache = SemanticCache(threshold=0.9, ttl_seconds=60, max_entries=2)
+        cache.put("a", [1.0, 0.0, 0.0], (5,), self.RESULTS, version=1)
+        cache.put("b", [0.0, 1.0, 0.0], (5,), self.RESULTS, version=1)
+        cache.get([1.0, 0.0, 0.0], (5,), version=1)  # "a" is now most recently used
+        cache.put("c", [0.0, 0.0, 1.0], (5,), self.RESULTS, version=1)
+        
+        assert cache.get([0.0, 1.0, 0.0], (5,), version=1) is None
+        assert cache.get_stats()["evictions"] == 1
+        
+        with patch('semantic_cache.time.time', return_value=time.time() + 120):
+            assert cache.get([1.0, 0.0, 0.0], (5,), version=1) is None
+        
+        assert cache.get([0.0, 0.0, 1.0], (5,), version=2) is None
+        assert len(cache) == 0
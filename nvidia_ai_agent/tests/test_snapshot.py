@@ -0,0 +1,56 @@
+"""
+Tests for knowledge base snapshot export and import.
+"""
+
+import sys
+from pathlib import Path
+import pytest
+from unittest.mock import patch
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from knowledge_base import KnowledgeBaseProcessor
+from snapshot import export_snapshot, import_snapshot, read_snapshot
+
+
+class TestSnapshot:
+    """Test knowledge base snapshot export and import."""
+    
+    @staticmethod
+    def _knowledge_base(path):
+        """Memory-mapped knowledge base holding three pre-embedded chunks."""
+        import numpy as np
+        
+        kb = KnowledgeBaseProcessor(persist_directory=str(path), vector_backend='mmap')
+        kb.add_embedded_chunks(
+            ["chunk_0", "chunk_1", "chunk_2"],
+            ["NIM microservices", "RAG pipelines", "CUDA kernels"],
+            [{"course_name": "Test Course", "lesson_title": f"Lesson {i}"} for i in range(3)],
+            np.eye(3, dtype=np.float32)
+        )
+        return kb
+    
+    def test_round_trip_skips_embedding(self, tmp_path):
+        """Test that an imported snapshot is searchable without re-embedding."""
+        source = self._knowledge_base(tmp_path / "source")
+        manifest = export_snapshot(source, tmp_path / "kb.npz")
+        assert manifest["count"] == 3 and manifest["dimension"] == 3
+        
+        target = KnowledgeBaseProcessor(persist_directory=str(tmp_path / "target"), vector_backend='mmap')
+        with patch('knowledge_base.get_embedding_model') as get_model:
+            assert import_snapshot(target, tmp_path / "kb.npz") == 3
+            get_model.assert_not_called()
+        
+        assert target.collection.get(ids=["chunk_1"])["documents"] == ["RAG pipelines"]
+        assert target.lexical_index.search("CUDA", 1)[0][0] == "chunk_2"
+    
+    def test_model_mismatch_is_rejected(self, tmp_path):
+        """Test that a snapshot from a different embedding model is not loaded."""
+        export_snapshot(self._knowledge_base(tmp_path / "source"), tmp_path / "kb.npz")
+        
+        target = KnowledgeBaseProcessor(persist_directory=str(tmp_path / "target"), vector_backend='mmap')
+        target.embedding_model_name = "other/model"
+        with pytest.raises(ValueError):
+            import_snapshot(target, tmp_path / "kb.npz")
+        assert read_snapshot(tmp_path / "kb.npz").manifest["format_version"] == 1
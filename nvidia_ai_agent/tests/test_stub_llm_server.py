@@ -0,0 +1,60 @@
+"""
+Tests for the OpenAI-compatible stub LLM server.
+"""
+
+import sys
+from pathlib import Path
+import pytest
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from stub_llm_server import StubLLMServer
+
+
+class TestStubLLMServer:
+    """Test the OpenAI-compatible stub LLM server used for load testing."""
+    
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setenv('STUB_LLM_LATENCY_MS', '0')
+        monkeypatch.setenv('STUB_LLM_TOKENS_PER_SECOND', '0')
+        monkeypatch.setenv('STUB_LLM_RESPONSE_TOKENS', '12')
+        server = StubLLMServer()
+        return server, server.app.test_client()
+    
+    def test_completions_are_deterministic_and_streamable(self, client):
+        """Test that a prompt always gets the same answer, streamed or not, and max_tokens truncates it."""
+        import json
+        
+        server, http = client
+        body = {'model': 'gpt-4', 'messages': [{'role': 'user', 'content': 'What is NIM?'}]}
+        
+        first = http.post('/v1/chat/completions', json=body).get_json()
+        second = http.post('/v1/chat/completions', json=body).get_json()
+        other = http.post('/v1/chat/completions', json={'messages': [{'role': 'user', 'content': 'RAG?'}]}).get_json()
+        answer = first['choices'][0]['message']['content']
+        assert answer == second['choices'][0]['message']['content'] != other['choices'][0]['message']['content']
+        assert first['usage']['completion_tokens'] == 12 and first['choices'][0]['finish_reason'] == 'stop'
+        
+        streamed = http.post('/v1/chat/completions', json=dict(body, stream=True, stream_options={'include_usage': True}))
+        events = [line[len('data: '):] for line in streamed.get_data(as_text=True).split('\n\n') if line]
+        assert events[-1] == '[DONE]'
+        chunks = [json.loads(event) for event in events[:-1]]
+        assert "".join(c['choices'][0]['delta'].get('content', '') for c in chunks if c['choices']) == answer
+        assert chunks[-1]['usage']['completion_tokens'] == 12
+        
+        short = http.post('/v1/chat/completions', json=dict(body, max_tokens=3)).get_json()
+        assert short['usage']['completion_tokens'] == 3 and short['choices'][0]['finish_reason'] == 'length'
+        assert server.stats['requests'] == 5 and server.stats['streamed'] == 1
+    
+    def test_injected_errors_and_bad_requests(self, client, monkeypatch):
+        """Test that error injection answers with the configured status in OpenAI's error format."""
+        server, http = client
+        assert http.post('/v1/chat/completions', json={'messages': []}).status_code == 400
+        
+        server.error_rate, server.error_status = 1.0, 429
+        response = http.post('/v1/chat/completions', json={'messages': [{'role': 'user', 'content': 'hi'}]})
+        assert response.status_code == 429
+        assert response.get_json()['error']['type'] == 'server_error'
+        assert server.stats['errors_injected'] == 1
@@ -0,0 +1,110 @@
+"""
+Tests for per-request stage tracing.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from tracing import Tracer, JsonlExporter, span, annotate, propagate, own_context
+
+
+class TestTracing:
+    """Test request traces, span propagation and JSONL export."""
+    
+    def test_spans_nest_across_threads_and_export_to_jsonl(self, tmp_path):
+        """Test that spans opened in worker threads join the request trace and the trace is exported."""
+        import json
+        from concurrent.futures import ThreadPoolExecutor
+        
+        path = tmp_path / "traces.jsonl"
+        tracer = Tracer(exporters=[JsonlExporter(str(path))])
+        
+        def search():
+            with span('knowledge_base_search', cache_hit=False) as search_span:
+                annotate(cache_hit=True)
+                search_span.set(results=3)
+        
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            with tracer.trace('process_query', session_id='alice') as root:
+                with span('strategy'):
+                    executor.submit(propagate(search)).result()
+                root.set(response_cache_hit=False)
+        
+        assert tracer.flush()
+        trace = tracer.recent_traces(session_id='alice')[0]
+        strategy, search_span = trace['spans']
+        assert trace['name'] == 'process_query' and trace['duration_ms'] > 0
+        assert search_span['parent_id'] == strategy['span_id'] and strategy['parent_id'] == trace['span_id']
+        assert search_span['attributes'] == {'cache_hit': True, 'results': 3}
+        assert json.loads(path.read_text())['trace_id'] == trace['trace_id']
+        assert tracer.recent_traces(session_id='bob') == []
+    
+    def test_spans_outside_a_trace_are_not_recorded(self):
+        """Test that instrumented code runs normally when no request is being traced."""
+        tracer = Tracer(exporters=[])
+        with span('feed_fetch') as fetch_span:
+            fetch_span.set(bytes=10)
+        
+        assert fetch_span.duration_ms is not None
+        assert tracer.recent_traces() == []
+    
+    def test_streaming_generators_do_not_leak_their_trace(self):
+        """Test that a consumer's spans between yields stay out of a generator's trace, sync and async."""
+        import asyncio
+        
+        tracer = Tracer(exporters=[])
+        
+        @own_context
+        def stream():
+            with tracer.trace('stream_query', session_id='sync'):
+                for word in ["NIM ", "news"]:
+                    with span('llm_chunk'):
+                        pass
+                    yield word
+        
+        @own_context
+        async def astream():
+            with tracer.trace('astream_query', session_id='async'):
+                for word in ["NIM ", "news"]:
+                    await asyncio.sleep(0)
+                    yield word
+        
+        with tracer.trace('consumer', session_id='ui'):
+            for word in stream():
+                with span('render'):
+                    pass
+        
+        async def consume():
+            words = []
+            async for word in astream():
+                with span('render'):
+                    words.append(word)
+            return words
+        
+        assert asyncio.run(consume()) == ["NIM ", "news"]
+        assert [s['name'] for s in tracer.recent_traces(session_id='sync')[0]['spans']] == ['llm_chunk'] * 2
+        assert [s['name'] for s in tracer.recent_traces(session_id='ui')[0]['spans']] == ['render'] * 2
+        assert tracer.recent_traces(session_id='async')[0]['spans'] == []
+    
+    def test_spans_ending_after_the_trace_are_counted_as_late(self):
+        """Test that background work outliving its request is not added to the finished trace."""
+        import threading
+        
+        tracer = Tracer(exporters=[])
+        release, done = threading.Event(), threading.Event()
+        
+        def background():
+            with span('web_search'):
+                release.wait()
+            done.set()
+        
+        with tracer.trace('process_query', session_id='alice'):
+            threading.Thread(target=propagate(background)).start()
+        release.set()
+        done.wait()
+        
+        trace = tracer.recent_traces(session_id='alice')[0]
+        assert trace['spans'] == [] and trace['late_spans'] == 1
@@ -0,0 +1,104 @@
+"""
+Tests for the memory-mapped vector index.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from vector_index import MmapVectorIndex
+
+
+class TestMmapVectorIndex:
+    """Test the memory-mapped vector index backend."""
+    
+    def _add_vectors(self, index, count=10, dim=8):
+        """Add orthogonal-ish vectors to an index."""
+        import numpy as np
+        vectors = np.eye(count, dim, dtype=np.float32) + 0.01
+        index.add(
+            ids=[f"chunk_{i}" for i in range(count)],
+            embeddings=vectors.tolist(),
+            documents=[f"document {i}" for i in range(count)],
+            metadatas=[{"course_name": "Test Course", "chunk_index": i} for i in range(count)]
+        )
+        return vectors
+    
+    def test_query_returns_nearest_first(self, tmp_path):
+        """Test that the closest vector is ranked first with distance near zero."""
+        index = MmapVectorIndex(str(tmp_path))
+        vectors = self._add_vectors(index, count=8)
+        
+        results = index.query(query_embeddings=[vectors[3].tolist()], n_results=3)
+        
+        assert results['ids'][0][0] == "chunk_3"
+        assert results['documents'][0][0] == "document 3"
+        assert results['distances'][0][0] < 1e-5
+        assert len(results['ids'][0]) == 3
+    
+    def test_reopen_and_upsert(self, tmp_path):
+        """Test that the index persists and existing ids are replaced."""
+        index = MmapVectorIndex(str(tmp_path), dtype="float16")
+        vectors = self._add_vectors(index, count=8)
+        
+        reopened = MmapVectorIndex(str(tmp_path))
+        assert reopened.count() == 8
+        
+        reopened.add(["chunk_0"], [vectors[5].tolist()], ["replaced"], [{"chunk_index": 0}])
+        assert reopened.count() == 8
+        assert reopened.get(ids=["chunk_0"])['documents'] == ["replaced"]
+    
+    def test_duplicate_ids_in_one_add_keep_the_last(self, tmp_path):
+        """Test that an id repeated within one call is stored once, with its last entry."""
+        index = MmapVectorIndex(str(tmp_path))
+        vectors = self._add_vectors(index, count=4)
+        
+        last = [0.0] * 7 + [1.0]
+        index.add(["chunk_9", "chunk_9", "chunk_1"], [vectors[0].tolist(), last, vectors[3].tolist()],
+                  ["first", "last", "updated"], [{}, {}, {}])
+        
+        assert index.count() == 5
+        assert index.get(ids=["chunk_9"])['documents'] == ["last"]
+        assert MmapVectorIndex(str(tmp_path)).query([last], n_results=1)['ids'][0][0] == "chunk_9"
+    
+    def test_adds_append_without_rewriting_the_files(self, tmp_path):
+        """Test that adds append to the embedding file and sidecar until compaction is due."""
+        import os
+        import numpy as np
+        index = MmapVectorIndex(str(tmp_path))
+        self._add_vectors(index, count=4)
+        inode = os.stat(index.embeddings_file).st_ino
+        
+        for i in range(4, 8):
+            index.add([f"chunk_{i}"], [np.eye(8)[i].tolist()], [f"document {i}"], [{}])
+        
+        assert os.stat(index.embeddings_file).st_ino == inode
+        reopened = MmapVectorIndex(str(tmp_path))
+        assert reopened.count() == 8
+        assert reopened.query([np.eye(8)[6].tolist()], n_results=1)['ids'][0][0] == "chunk_6"
+        
+        # Superseded sidecar records are dropped by a rewrite once they pile up
+        for i in range(20):
+            reopened.add(["chunk_0"], [np.eye(8)[0].tolist()], [f"version {i}"], [{}])
+        assert reopened._sidecar_records <= 2 * reopened.count()
+        assert MmapVectorIndex(str(tmp_path)).get(ids=["chunk_0"])['documents'] == ["version 19"]
+    
+    def test_converts_format_1_index(self, tmp_path):
+        """Test that an index written with a JSON sidecar is opened and converted."""
+        import json
+        import numpy as np
+        vectors = np.eye(3, 4, dtype=np.float32)
+        np.save(tmp_path / "embeddings.npy", vectors)
+        with open(tmp_path / "metadata.json", 'w') as f:
+            json.dump({'format_version': 1, 'ids': ["a", "b", "c"], 'documents': ["A", "B", "C"],
+                       'metadatas': [{}, {}, {}]}, f)
+        
+        index = MmapVectorIndex(str(tmp_path))
+        index.add(["d"], [[0.0, 0.0, 0.0, 1.0]], ["D"], [{}])
+        
+        assert not (tmp_path / "metadata.json").exists()
+        reopened = MmapVectorIndex(str(tmp_path))
+        assert reopened.get()['documents'] == ["A", "B", "C", "D"]
+        assert reopened.query([[0.0, 1.0, 0.0, 0.0]], n_results=1)['ids'][0][0] == "b"
@@ -0,0 +1,135 @@
+"""
+Tests for the NVIDIA blog search tool.
+"""
+
+import sys
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+# Add src directory to path
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+
+from web_search_tool import NVIDIABlogSearchTool
+from feed_cache import FeedCache
+from blog_index import BlogIndex
+
+
+class TestWebSearchTool:
+    """Test the web search functionality."""
+    
+    def test_nvidia_blog_search_tool_init(self):
+        """Test initialization of NVIDIA blog search tool."""
+        search_tool = NVIDIABlogSearchTool()
+        
+        assert search_tool.timeout > 0
+        assert search_tool.max_results > 0
+        assert 'developer' in search_tool.nvidia_blogs
+        assert 'main' in search_tool.nvidia_blogs
+    
+    def test_format_search_results(self):
+        """Test formatting of search results."""
+        search_tool = NVIDIABlogSearchTool()
+        
+        # Test empty results
+        empty_results = []
+        formatted = search_tool.format_search_results(empty_results)
+        assert "No relevant articles found" in formatted
+        
+        # Test with results
+        test_results = [{
+            'title': 'Test Article',
+            'source': 'NVIDIA Developer Blog',
+            'published_date': '2024-01-01',
+            'url': 'https://test.com',
+            'summary': 'This is a test summary'
+        }]
+        
+        formatted = search_tool.format_search_results(test_results)
+        assert "Test Article" in formatted
+        assert "NVIDIA Developer Blog" in formatted
+    
+    @staticmethod
+    def _slow_feed_session(delay):
+        """Mock session whose feed downloads each take `delay` seconds."""
+        def get(url, headers=None, timeout=None):
+            time.sleep(delay)
+            slug = 'dev' if 'developer' in url else 'main'
+            response = Mock(status_code=200, headers={})
+            response.content = (
+                '<?xml version="1.0"?><rss version="2.0"><channel><title>Feed</title>'
+                f'<item><title>TensorRT inference on {slug}</title><link>https://{slug}.test/trt</link>'
+                '<description>Faster TensorRT inference</description>'
+                '<pubDate>Mon, 01 Jan 2024 00:00:00 GMT</pubDate></item>'
+                '</channel></rss>'
+            ).encode('utf-8')
+            return response
+        
+        session = Mock()
+        session.get.side_effect = get
+        return session
+    
+    def test_search_both_blogs_fetches_feeds_concurrently(self, tmp_path):
+        """Test that both feeds download in parallel, bounded by the slowest one."""
+        search_tool = NVIDIABlogSearchTool(blog_index=BlogIndex(str(tmp_path)))
+        search_tool.feed_cache = FeedCache(session=self._slow_feed_session(0.3))
+        
+        start = time.perf_counter()
+        results = search_tool.search_both_blogs("TensorRT inference")
+        elapsed = time.perf_counter() - start
+        
+        assert {r['source'] for r in results} == {'NVIDIA Developer Blog', 'NVIDIA Blog'}
+        assert elapsed < 0.55
+    
+    def test_feed_failures_and_deadline(self, tmp_path):
+        """Test that a failing or slow feed is dropped without losing the other one."""
+        search_tool = NVIDIABlogSearchTool(blog_index=BlogIndex(str(tmp_path / "first")))
+        slow = self._slow_feed_session(0.0).get.side_effect
+        
+        def get(url, headers=None, timeout=None):
+            if 'blogs.nvidia.com' in url:
+                raise ConnectionError("feed unavailable")
+            return slow(url, headers, timeout)
+        
+        session = Mock()
+        session.get.side_effect = get
+        search_tool.feed_cache = FeedCache(session=session)
+        results = search_tool.search_both_blogs("TensorRT")
+        assert [r['source'] for r in results] == ['NVIDIA Developer Blog']
+        
+        search_tool.feed_cache = FeedCache(session=self._slow_feed_session(0.5))
+        search_tool._blog_index = BlogIndex(str(tmp_path / "second"))
+        search_tool.connect_timeout, search_tool.timeout = 0.05, 0.05
+        assert search_tool.search_both_blogs("TensorRT") == []
+    
+    def test_async_search_both_blogs(self, tmp_path):
+        """Test the async variant returns the same results, indexing off the event loop thread."""
+        import asyncio
+        import threading
+        
+        search_tool = NVIDIABlogSearchTool(blog_index=BlogIndex(str(tmp_path)))
+        search_tool.feed_cache = FeedCache(session=self._slow_feed_session(0.0))
+        index_threads = []
+        search_index = search_tool._search_index
+        search_tool._search_index = lambda *args: index_threads.append(threading.current_thread()) or search_index(*args)
+        
+        results = asyncio.run(search_tool.asearch_both_blogs("TensorRT inference"))
+        
+        assert index_threads[0] is not threading.main_thread()
+        assert results == search_tool.search_both_blogs("TensorRT inference")
+        assert len(results) == 2
+    
+    def test_aclose_releases_the_loop_http_session(self, tmp_path):
+        """Test that aclose closes the aiohttp session opened for the running event loop."""
+        import asyncio
+        from http_client import get_async_session
+        
+        search_tool = NVIDIABlogSearchTool(blog_index=BlogIndex(str(tmp_path)))
+        
+        async def open_and_close():
+            session = get_async_session()
+            await search_tool.aclose()
+            return session
+        
+        session = asyncio.run(open_and_close())
+        assert session.closed
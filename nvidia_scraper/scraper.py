@@ -4,6 +4,7 @@ NVIDIA Blog Scraper - Core scraping functionality
 
 import os
 import re
+import sys
 import time
 import logging
 import hashlib
@@ -20,6 +21,13 @@ from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
 import feedparser
 
+# Keep the agent's local blog index current as articles are scraped
+sys.path.append(str(Path(__file__).resolve().parents[1] / "nvidia_ai_agent" / "src"))
+try:
+    from blog_index import BlogIndex
+except ImportError:
+    BlogIndex = None
+
 console = Console()
 
 
@@ -36,6 +44,7 @@ class NVIDIABlogScraper:
         self.base_output_dir = Path(self.config["output"]["base_directory"])
         self.base_output_dir.mkdir(exist_ok=True)
         self._load_scraped_urls()
+        self.blog_index = self._open_blog_index()
     
     def _load_config(self, config_path: str) -> Dict:
         """Load configuration from YAML file."""
@@ -75,6 +84,17 @@ class NVIDIABlogScraper:
         )
         self.logger = logging.getLogger(__name__)
     
+    def _open_blog_index(self):
+        """Open the agent's blog index if one is configured and available."""
+        index_directory = self.config["output"].get("blog_index_directory")
+        if not index_directory or BlogIndex is None:
+            return None
+        try:
+            return BlogIndex(index_directory)
+        except Exception as e:
+            self.logger.error(f"Error opening blog index {index_directory}: {e}")
+            return None
+    
     def _load_scraped_urls(self):
         """Load previously scraped URLs to avoid duplicates."""
         scraped_file = self.base_output_dir / "scraped_urls.txt"
@@ -308,6 +328,15 @@ class NVIDIABlogScraper:
             self._save_scraped_url(article['url'])
             self.logger.info(f"Saved article: {article['title']}")
             
+            if self.blog_index is not None:
+                self.blog_index.add_article(
+                    url=article['url'],
+                    title=article['title'],
+                    content=article['content'],
+                    published_date=article['date_published'],
+                    categories=article['categories']
+                )
+            
         except Exception as e:
             self.logger.error(f"Error saving article {article['title']}: {e}")
     
@@ -407,5 +436,8 @@ class NVIDIABlogScraper:
                 progress.advance(task)
                 time.sleep(self.config["scraping"]["delay_between_requests"])
         
+        if self.blog_index is not None:
+            self.blog_index.save()
+        
         console.print(f"[bold green]Successfully scraped {articles_scraped} articles![/bold green]")
         return articles_scraped